@@ -1,14 +1,41 @@
 from pathlib import Path
+from typing import Optional
+import base64
 import os
 
 from dataclasses import dataclass
 
+from geonoderest.session import (
+    DEFAULT_POOL_CONNECTIONS,
+    DEFAULT_POOL_MAXSIZE,
+    DEFAULT_RETRIES,
+    DEFAULT_RETRY_BACKOFF,
+    DEFAULT_RETRY_BACKOFF_MAX,
+)
+from geonoderest.cache import DEFAULT_CACHE_MAX_SIZE
+
 
 @dataclass
 class GeonodeApiConf:
     url: str
     auth_basic: str
     verify: bool
+    pool_connections: int = DEFAULT_POOL_CONNECTIONS
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE
+    pool_block: bool = False
+    keep_alive: bool = True
+    retries: int = DEFAULT_RETRIES
+    retry_backoff: float = DEFAULT_RETRY_BACKOFF
+    retry_backoff_max: float = DEFAULT_RETRY_BACKOFF_MAX
+    retry_all_methods: bool = False
+    max_rps: float = 0.0
+    max_in_flight: int = 0
+    latency_tolerance: float = 0.0
+    max_upload_rate: float = 0.0
+    max_download_rate: float = 0.0
+    cache_path: Optional[Path] = None
+    cache_ttl: float = 0.0
+    cache_max_size: int = DEFAULT_CACHE_MAX_SIZE
 
     @staticmethod
     def from_env_file(path: Path) -> "GeonodeApiConf":
@@ -48,5 +75,12 @@ class GeonodeApiConf:
         verify = True if "True" == os.getenv("GEONODE_API_VERIFY", "True") else False
         return GeonodeApiConf(url=url, auth_basic=auth_basic, verify=verify)
 
+    @property
+    def username(self) -> str:
+        """
+        Name of the user authenticated by auth_basic
+        """
+        return base64.b64decode(self.auth_basic).decode("utf-8").split(":", 1)[0]
+
     def get_geonode_base_url(self) -> str:
         return self.url[:-8]
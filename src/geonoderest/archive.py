@@ -0,0 +1,101 @@
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, Optional
+import io
+import os
+import tarfile
+import time
+
+# archive suffixes and their tarfile compression, "zst" is handled separately
+ARCHIVE_COMPRESSIONS: Dict[str, str] = {
+    ".tar": "",
+    ".tar.gz": "gz",
+    ".tgz": "gz",
+    ".tar.xz": "xz",
+    ".txz": "xz",
+    ".tar.bz2": "bz2",
+    ".tar.zst": "zst",
+    ".tzst": "zst",
+}
+ARCHIVE_PART_SUFFIX: str = ".part"
+
+
+def archive_compression(path: Path) -> Optional[str]:
+    """
+    Returns the compression of an archive path by its suffix ("" for plain tar),
+    None if path is not an archive.
+    """
+    name = path.name.lower()
+    for suffix, compression in ARCHIVE_COMPRESSIONS.items():
+        if name.endswith(suffix):
+            return compression
+    return None
+
+
+def __open_zstd__(path: Path) -> BinaryIO:
+    """
+    Internal function opening a zstd compressed file for writing, with the zstd module of the
+    standard library (python >= 3.14) or the optional zstandard package.
+    """
+    try:
+        from compression import zstd  # type: ignore[import-not-found]
+
+        return zstd.ZstdFile(path, "wb")
+    except ImportError:
+        pass
+    try:
+        import zstandard  # type: ignore[import-not-found]
+    except ImportError:
+        raise SystemExit(
+            "writing .tar.zst archives requires python >= 3.14 or the zstandard package "
+            "(pip install geonodectl[zstd]), or use .tar.gz / .tar.xz ..."
+        )
+    return zstandard.ZstdCompressor().stream_writer(path.open("wb"))
+
+
+@contextmanager
+def open_archive(path: Path) -> Iterator[tarfile.TarFile]:
+    """
+    Opens a (compressed) tar archive for streamed writing, the compression is chosen by the
+    suffix of path, see ARCHIVE_COMPRESSIONS. The archive is written to path + ARCHIVE_PART_SUFFIX
+    and only renamed to path once it is complete.
+
+    Args:
+        path (Path): archive to write
+
+    Raises:
+        ValueError: if path has no archive suffix
+
+    Returns:
+        Iterator[tarfile.TarFile]: archive, members are added with add_bytes()
+    """
+    compression = archive_compression(path)
+    if compression is None:
+        raise ValueError(
+            f"{path} is not an archive, supported: {', '.join(ARCHIVE_COMPRESSIONS)} ..."
+        )
+    part = path.with_name(path.name + ARCHIVE_PART_SUFFIX)
+    if compression == "zst":
+        f = __open_zstd__(part)
+        try:
+            with tarfile.open(fileobj=f, mode="w|") as tar:
+                yield tar
+        finally:
+            f.close()
+    else:
+        with tarfile.open(str(part), mode=f"w|{compression}") as tar:  # type: ignore[call-overload]
+            yield tar
+    os.replace(part, path)
+
+
+def add_bytes(
+    tar: tarfile.TarFile, name: str, data: bytes, mtime: Optional[float] = None
+):
+    """
+    Adds data as regular file member name to tar.
+    """
+    info = tarfile.TarInfo(name=name)
+    info.size = len(data)
+    info.mtime = int(mtime if mtime is not None else time.time())
+    info.mode = 0o644
+    tar.addfile(info, io.BytesIO(data))
@@ -0,0 +1,225 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import requests
+
+DEFAULT_CACHE_PATH: Path = (
+    Path(os.getenv("XDG_CACHE_HOME", Path.home() / ".cache"))
+    / "geonodectl"
+    / "responses.sqlite"
+)
+DEFAULT_CACHE_MAX_SIZE: int = 256 * 1024 * 1024
+# endpoints whose responses change while they are polled, e.g. import status, never cached
+VOLATILE_ENDPOINTS: Tuple[str, ...] = ("executionrequest", "uploads")
+# pk of the object written by a POST, PATCH or DELETE on endpoint/{pk}/...
+WRITTEN_PK_PATTERN = re.compile(r"^[^/]+/(\d+)(?:/|$)")
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_type: Optional[str]
+    stored: float
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """headers to revalidate the entry, the server answers 304 if it did not change"""
+        headers = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def to_response(self, url: str) -> requests.Response:
+        """the entry as requests response, so callers can use r.json(), r.text, r.content"""
+        r = requests.Response()
+        r.status_code = 200
+        r.url = url
+        r._content = self.body
+        if self.content_type is not None:
+            r.headers["Content-Type"] = self.content_type
+        if self.etag is not None:
+            r.headers["ETag"] = self.etag
+        if self.last_modified is not None:
+            r.headers["Last-Modified"] = self.last_modified
+        return r
+
+
+class ResponseCache:
+    """
+    Persistent SQLite cache of GET response bodies.
+
+    Entries are keyed by url, query parameters and credentials, so users never see the cached
+    responses of other users. Entries younger than ttl are served without request, older ones
+    are revalidated with If-None-Match / If-Modified-Since and served again on 304 Not Modified.
+    The least recently used entries are evicted once the bodies exceed max_size bytes.
+    """
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_CACHE_PATH,
+        ttl: float = 0.0,
+        max_size: int = DEFAULT_CACHE_MAX_SIZE,
+    ):
+        """
+        Args:
+            path (Path, optional): sqlite file, created if missing. Defaults to DEFAULT_CACHE_PATH.
+            ttl (float, optional): seconds an entry is served without revalidation. Defaults to 0,
+                                   every use is revalidated.
+            max_size (int, optional): max bytes of all cached bodies. Defaults to DEFAULT_CACHE_MAX_SIZE.
+        """
+        # the cached bodies are responses to authenticated requests: owner access only
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        os.close(os.open(path, os.O_RDWR | os.O_CREAT, 0o600))
+        os.chmod(path, 0o600)
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, url TEXT NOT NULL, body BLOB NOT NULL, "
+                "etag TEXT, last_modified TEXT, content_type TEXT, "
+                "stored REAL NOT NULL, accessed REAL NOT NULL, size INTEGER NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)"
+            )
+
+    def close(self):
+        self._db.close()
+
+    @staticmethod
+    def is_volatile(base_url: str, url: str) -> bool:
+        """True if url is an endpoint of VOLATILE_ENDPOINTS below the api url base_url"""
+        return url.startswith(base_url) and url[len(base_url) :].startswith(
+            VOLATILE_ENDPOINTS
+        )
+
+    @staticmethod
+    def key(url: str, params: Dict, authorization: str) -> str:
+        """cache key of a GET request: sha256 over url, sorted params and credentials"""
+        canonical = json.dumps(
+            [url, sorted((str(k), str(v)) for k, v in params.items()), authorization]
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def lookup(self, key: str) -> Optional[CachedResponse]:
+        """
+        Returns the entry of key and marks it as recently used, None if it is not cached
+        """
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT body, etag, last_modified, content_type, stored FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key)
+            )
+        return CachedResponse(*row)
+
+    def is_fresh(self, entry: CachedResponse) -> bool:
+        """True if entry is younger than ttl and may be served without revalidation"""
+        return time.time() - entry.stored < self.ttl
+
+    def touch(self, key: str):
+        """
+        Restarts the ttl of an entry after the server confirmed it (304 Not Modified)
+        """
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE responses SET stored = ? WHERE key = ?", (time.time(), key)
+            )
+
+    def store(self, key: str, url: str, r: requests.Response):
+        """
+        Stores the body of a 200 response. Responses marked no-store and, with a ttl of 0,
+        responses without validator (ETag, Last-Modified) are not cached.
+        """
+        if "no-store" in r.headers.get("Cache-Control", ""):
+            return
+        etag = r.headers.get("ETag")
+        last_modified = r.headers.get("Last-Modified")
+        if etag is None and last_modified is None and self.ttl <= 0:
+            return
+        body = r.content
+        if len(body) > self.max_size:
+            return
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    url,
+                    body,
+                    etag,
+                    last_modified,
+                    r.headers.get("Content-Type"),
+                    now,
+                    now,
+                    len(body),
+                ),
+            )
+            self.__evict__()
+
+    def __evict__(self):
+        """
+        Internal method deleting the least recently used entries until the bodies fit into max_size.
+        Must be called with the lock held, inside a transaction.
+        """
+        total = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        if total <= self.max_size:
+            return
+        rows = self._db.execute(
+            "SELECT key, size FROM responses ORDER BY accessed ASC"
+        ).fetchall()
+        evict = []
+        for key, size in rows:
+            if total <= self.max_size:
+                break
+            evict.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", evict)
+
+    def invalidate(self, base_url: str, endpoint: str):
+        """
+        Drops the entries of the object written by a POST, PATCH or DELETE on endpoint. The object
+        may be cached under several endpoints (resources/5, datasets/5), so every entry of its pk
+        is dropped, as well as all listings.
+
+        Args:
+            base_url (str): api url, e.g. https://geonode.example.com/api/v2/
+            endpoint (str): written endpoint, e.g. datasets/5/ or resources/5/delete
+        """
+        like_base = base_url.replace("%", r"\%").replace("_", r"\_")
+        match = WRITTEN_PK_PATTERN.match(endpoint)
+        with self._lock, self._db:
+            # listings end with "/" and may contain the written object
+            self._db.execute(
+                r"DELETE FROM responses WHERE url LIKE ? ESCAPE '\' AND url LIKE '%/'",
+                (like_base + "%",),
+            )
+            if match is not None:
+                pk = match.group(1)
+                self._db.execute(
+                    r"DELETE FROM responses WHERE url LIKE ? ESCAPE '\' "
+                    "AND (url LIKE ? OR url LIKE ?)",
+                    (like_base + "%", f"%/{pk}", f"%/{pk}/%"),
+                )
@@ -1,11 +1,14 @@
-from typing import List, Union, Dict
+from typing import List, Union, Dict, Iterable
 from tabulate import tabulate
+import csv
 import json
 import logging
 import sys
 
 from .geonodetypes import GeonodeCmdOutObjectKey
 
+STREAM_OUTPUT_FORMATS: List[str] = ["ndjson", "csv", "tsv"]
+
 
 def show_list(headers: List[str], values: List[List[str]], tablefmt="github"):
     """_summary_: prints pretty table to commandline
@@ -27,7 +30,9 @@ def __cmd_list_header__(cmdout_header: List[GeonodeCmdOutObjectKey]) -> List[str
     return [str(cmdoutkey) for cmdoutkey in cmdout_header]
 
 
-def print_list_on_cmd(obj: Dict, cmdout_header: List[GeonodeCmdOutObjectKey]):
+def print_list_on_cmd(
+    obj: Union[Dict, List[Dict]], cmdout_header: List[GeonodeCmdOutObjectKey]
+):
     """print a beautiful list on the cmdline
 
     Args:
@@ -37,19 +42,19 @@ def print_list_on_cmd(obj: Dict, cmdout_header: List[GeonodeCmdOutObjectKey]):
         logging.warning("return from geonode api was broken, not output ...")
         return
 
-    def generate_line(i, obj: Dict, headers: List[GeonodeCmdOutObjectKey]) -> List:
+    def generate_line(i, obj, headers: List[GeonodeCmdOutObjectKey]) -> List:
         return [cmdoutkey.get_key(obj[i]) for cmdoutkey in headers]
 
     values = [generate_line(i, obj, cmdout_header) for i in range(len(obj))]
     show_list(headers=__cmd_list_header__(cmdout_header), values=values)
 
 
-def print_json(json_str: Union[str, dict]):
+def print_json(json_str: Union[str, dict, list]):
     """
     Print the given JSON string or dictionary with an indentation of 2 spaces.
 
     Args:
-        json_str (Union[str, dict]): The JSON string or dictionary to be printed.
+        json_str (Union[str, dict, list]): The JSON string, dictionary or list to be printed.
 
     Returns:
         None
@@ -60,6 +65,43 @@ def print_json(json_str: Union[str, dict]):
     print(json.dumps(json_str, indent=2, ensure_ascii=False))
 
 
+def print_stream(
+    objs: Iterable[Dict], cmdout_header: List[GeonodeCmdOutObjectKey], output: str
+):
+    """write records to stdout one by one as they arrive, without collecting them first
+
+    Args:
+        objs (Iterable[Dict]): records to print, e.g. a paginating generator
+        cmdout_header (List[GeonodeCmdOutObjectKey]): columns for csv and tsv output
+        output (str): one of STREAM_OUTPUT_FORMATS. ndjson writes the full records,
+                      csv and tsv write one row with the header columns per record
+    """
+    if output not in STREAM_OUTPUT_FORMATS:
+        raise ValueError(f"unsupported output format: {output} ...")
+
+    if output == "ndjson":
+
+        def write_record(obj: Dict):
+            sys.stdout.write(json.dumps(obj, ensure_ascii=False) + "\n")
+
+    else:
+        writer = csv.writer(
+            sys.stdout, delimiter="\t" if output == "tsv" else ",", lineterminator="\n"
+        )
+        writer.writerow(__cmd_list_header__(cmdout_header))
+        sys.stdout.flush()
+
+        def write_record(obj: Dict):
+            writer.writerow([cmdoutkey.get_key(obj) for cmdoutkey in cmdout_header])
+
+    for i, obj in enumerate(objs):
+        write_record(obj)
+        # show the first record immediately, afterwards let stdout buffer
+        if i == 0:
+            sys.stdout.flush()
+    sys.stdout.flush()
+
+
 def json_decode_error_handler(json_str: str, error: json.decoder.JSONDecodeError):
     logging.error(f"Error decoding json string:\n {json_str} ...")
     logging.error(f"{error}")
@@ -1,15 +1,51 @@
+import datetime
+import glob
 import os
 import sys
 import time
 from pathlib import Path
 from typing import List, Dict, Optional
 import logging
+import zipfile
 
 from geonoderest.resources import GeonodeResourceHandler
 from geonoderest.geonodetypes import GeonodeHTTPFile
+from geonoderest.progress import UploadProgress
 from geonoderest.cmdprint import show_list, print_json
 from geonoderest.geonodetypes import GeonodeCmdOutListKey, GeonodeCmdOutDictKey
-from geonoderest.executionrequest import GeonodeExecutionRequestHandler
+from geonoderest.executionrequest import (
+    GeonodeExecutionRequestHandler,
+    GeonodeExecutionRequestWatcher,
+    FINAL_STATUSES,
+    notice_latency,
+    poll_intervals,
+)
+from geonoderest.exceptions import GeoNodeRestException, DatasetValidationError
+from geonoderest.validation import validate_dataset
+from geonoderest.multipart import ZipArchive
+from geonoderest.ledger import UploadLedger, DEFAULT_LEDGER_PATH
+
+# file types picked up when uploading a directory or glob, other files with the stem of such
+# a file (.dbf, .shx, .prj, .cpg, .sld, .xml, ...) are treated as its sidecar files
+UPLOAD_SUFFIXES = [
+    ".shp",
+    ".zip",
+    ".gpkg",
+    ".geojson",
+    ".json",
+    ".kml",
+    ".kmz",
+    ".csv",
+    ".tif",
+    ".tiff",
+]
+# sidecars added to a streamed shapefile zip, if they exist
+SHAPEFILE_OPTIONAL_SIDECARS = [".cpg", ".sld", ".xml", ".shp.xml"]
+# seconds subtracted from the journaled transfer start when looking for its execution request
+RESUME_CLOCK_SKEW: int = 300
+# form field carrying the journaled transfer id, identifies the execution request of a transfer
+TRANSFER_ID_FIELD: str = "geonodectl_transfer_id"
+ZIP_COMPRESSIONS = {"stored": zipfile.ZIP_STORED, "deflated": zipfile.ZIP_DEFLATED}
 
 
 class GeonodeDatasetsHandler(GeonodeResourceHandler):
@@ -38,31 +74,50 @@ class GeonodeDatasetsHandler(GeonodeResourceHandler):
         overwrite_existing_layer: bool = False,
         skip_existing_layers: bool = False,
         wait: bool = False,
+        timeout: Optional[float] = None,
         **kwargs,
     ):
         """upload data and show them on the cmdline
 
         Args:
-            file_path (Path): Path to the file to upload.
+            file_path (Path): Path to the file to upload. A directory or glob uploads all datasets found.
             charset (str, optional): charset of data Defaults to "UTF-8".
             time (bool, optional): set if data is timeseries data Defaults to False.
             mosaic (bool, optional): declare dataset as mosaic
             wait (bool, optional): wait for upload to finish and show resulting dataset(s). Defaults to False.
+            timeout (float, optional): max seconds to wait for the upload to finish. Defaults to no timeout.
         """
-        r = self.upload(
-            file_path=file_path,
-            charset=charset,
-            time=time,
-            mosaic=mosaic,
-            overwrite_existing_layer=overwrite_existing_layer,
-            skip_existing_layers=skip_existing_layers,
-            **kwargs,
-        )
+        if file_path.is_dir() or glob.has_magic(str(file_path)):
+            self.__cmd_upload_batch__(
+                file_paths=self.__collect_upload_files__(file_path),
+                charset=charset,
+                time=time,
+                mosaic=mosaic,
+                overwrite_existing_layer=overwrite_existing_layer,
+                skip_existing_layers=skip_existing_layers,
+                wait=wait,
+                timeout=timeout,
+                **kwargs,
+            )
+            return
+
+        try:
+            r = self.upload(
+                file_path=file_path,
+                charset=charset,
+                time=time,
+                mosaic=mosaic,
+                overwrite_existing_layer=overwrite_existing_layer,
+                skip_existing_layers=skip_existing_layers,
+                **kwargs,
+            )
+        except DatasetValidationError as err:
+            raise SystemExit(f"invalid dataset, upload skipped ...\n{err}")
         if "execution_id" not in r:
             raise SystemExit(f"unexpected API response ...\n{r}")
 
         execution_request_handler = GeonodeExecutionRequestHandler(
-            env=self.gn_credentials
+            env=self.gn_credentials, session=self.session
         )
         er = execution_request_handler.get(exec_id=str(r["execution_id"]), **kwargs)
         if er is None:
@@ -70,7 +125,11 @@ class GeonodeDatasetsHandler(GeonodeResourceHandler):
             return
 
         if wait:
-            pks = self.__wait_for_upload__(exec_id=str(r["execution_id"]))
+            pks = self.__wait_for_upload__(
+                exec_id=str(r["execution_id"]),
+                timeout=timeout,
+                size=self.__upload_size__(file_path),
+            )
             for pk in pks:
                 obj = self.get(pk=pk, **kwargs)
                 if kwargs.get("json"):
@@ -91,42 +150,393 @@ class GeonodeDatasetsHandler(GeonodeResourceHandler):
             ]
             show_list(values=list_items, headers=["key", "value"])
 
-    def __wait_for_upload__(self, exec_id: str, poll_interval: int = 5) -> List[int]:
+    @staticmethod
+    def __collect_upload_files__(path: Path) -> List[Path]:
+        """Collect the datasets to upload from a directory or glob.
+
+        Shapefile sidecars are not uploaded on their own, upload() picks them up next to the .shp.
+
+        Args:
+            path (Path): directory or glob pattern, e.g. data/*.shp
+
+        Returns:
+            List[Path]: sorted list of files to upload
+        """
+        if path.is_dir():
+            candidates = [p for p in path.iterdir() if p.is_file()]
+        else:
+            candidates = [Path(p) for p in glob.glob(str(path)) if os.path.isfile(p)]
+
+        datasets = sorted(p for p in candidates if p.suffix.lower() in UPLOAD_SUFFIXES)
+        dataset_stems = {(p.parent, p.stem) for p in datasets}
+        for p in sorted(set(candidates) - set(datasets)):
+            sidecar_of = {(p.parent, p.stem), (p.parent, p.name.split(".")[0])}
+            if not sidecar_of & dataset_stems:
+                logging.warning(f"skipping {p}, unsupported file type ...")
+        if not datasets:
+            raise SystemExit(f"no datasets to upload found in {path} ...")
+        return datasets
+
+    @staticmethod
+    def __upload_size__(file_path: Path) -> int:
+        """size in bytes of a dataset file, including the sidecars of a shapefile, 0 if it does not exist"""
+        if not file_path.is_file():
+            return 0
+        if file_path.suffix.lower() != ".shp":
+            return file_path.stat().st_size
+        return sum(
+            p.stat().st_size
+            for p in file_path.parent.glob(glob.escape(file_path.stem) + ".*")
+            if p.is_file()
+        )
+
+    def __cmd_upload_batch__(
+        self,
+        file_paths: List[Path],
+        wait: bool = False,
+        timeout: Optional[float] = None,
+        concurrency: int = 1,
+        **kwargs,
+    ):
+        """upload multiple datasets with up to concurrency parallel uploads and show a summary per file
+
+        Args:
+            file_paths (List[Path]): files to upload
+            wait (bool, optional): wait for the uploads to finish and show the resulting pks. Defaults to False.
+            timeout (float, optional): max seconds to wait for the uploads to finish. Defaults to no timeout.
+            concurrency (int, optional): number of parallel uploads. Defaults to 1.
+        """
+        # parallel bars would overwrite each other on the same stderr line
+        if concurrency > 1 and kwargs.get("progress") == "bar":
+            logging.warning(
+                "--progress bar is not supported for parallel uploads, reporting json lines ..."
+            )
+            kwargs["progress"] = "json"
+
+        def _upload(file_path: Path) -> Dict:
+            result: Dict = {
+                "file": str(file_path),
+                "exec_id": None,
+                "status": None,
+                "skipped": False,
+                "pks": [],
+            }
+            try:
+                r = self.upload(file_path=file_path, **kwargs)
+                if r is None or "execution_id" not in r:
+                    raise GeoNodeRestException(f"unexpected API response ...\n{r}")
+                result["exec_id"] = str(r["execution_id"])
+                result["status"] = r.get("status", "started")
+                result["skipped"] = r.get("skipped", False)
+            except (FileNotFoundError, GeoNodeRestException) as err:
+                logging.error(f"upload of {file_path} failed: {err} ...")
+                result["status"] = "failed"
+            return result
+
+        results = list(self.__map_concurrent__(_upload, file_paths, concurrency))
+        if wait:
+            self.__wait_for_uploads__(
+                results,
+                timeout=timeout,
+                size=max(self.__upload_size__(p) for p in file_paths),
+            )
+        if kwargs.get("json"):
+            print_json(results)
+        else:
+            show_list(
+                values=[
+                    [
+                        r["file"],
+                        r["exec_id"],
+                        r["status"],
+                        r["skipped"],
+                        ",".join(str(pk) for pk in r["pks"]),
+                    ]
+                    for r in results
+                ],
+                headers=["file", "exec_id", "status", "skipped", "pks"],
+            )
+        failed = sum(1 for r in results if r["status"] in ("failed", "timeout"))
+        if failed:
+            logging.error(f"{failed} of {len(results)} uploads failed ...")
+            sys.exit(1)
+
+    def __wait_for_uploads__(
+        self, results: List[Dict], timeout: Optional[float] = None, size: int = 0
+    ):
+        """Wait for the execution requests of multiple uploads with one poller for all of them.
+
+        Every upload is reported as soon as it is done, its result gets the final status and pks.
+        Uploads still running at the timeout get the status "timeout".
+
+        Args:
+            results (List[Dict]): upload results with exec_id, status and pks, updated in place
+            timeout (float, optional): max seconds to wait. Defaults to no timeout.
+            size (int, optional): size in bytes of the largest upload, scales the poll intervals.
+        """
+        by_exec_id = {r["exec_id"]: r for r in results if r["exec_id"] is not None}
+        watcher = GeonodeExecutionRequestWatcher(
+            handler=GeonodeExecutionRequestHandler(
+                env=self.gn_credentials, session=self.session
+            ),
+            exec_ids=by_exec_id.keys(),
+            timeout=timeout,
+            size=size,
+        )
+        for er in watcher.watch():
+            result = by_exec_id[str(er["exec_id"])]
+            result["status"] = er["status"]
+            if er["status"] == "failed":
+                logging.error(f"upload of {result['file']} failed ...")
+                logging.error(er)
+                continue
+            result["pks"] = self.__resource_pks__(er)
+            logging.info(f"upload of {result['file']} finished ...")
+        for exec_id in watcher.pending:
+            logging.error(
+                f"upload of {by_exec_id[exec_id]['file']} did not finish within {timeout}s ..."
+            )
+            by_exec_id[exec_id]["status"] = "timeout"
+
+    def __reusable_upload_status__(
+        self,
+        ledger: UploadLedger,
+        content_hash: str,
+        entry: Dict,
+        execution_request_handler: GeonodeExecutionRequestHandler,
+        resume: bool = False,
+    ) -> Optional[str]:
+        """Check if the upload of a ledger entry can be reused instead of uploading again.
+
+        The execution request must not have failed and, once it is finished, its datasets must still
+        exist on the server. With resume, the execution request of an entry with known pks is not
+        requested again. The pks of newly finished execution requests are recorded in the ledger.
+
+        Args:
+            ledger (UploadLedger): upload ledger
+            content_hash (str): content hash of the entry
+            entry (Dict): ledger entry with exec_id and pks
+            execution_request_handler (GeonodeExecutionRequestHandler): handler to look up the exec_id
+            resume (bool, optional): trust the execution request status recorded in the ledger. Defaults to False.
+
+        Returns:
+            Optional[str]: status of the execution request, None if the dataset must be uploaded again
+        """
+        pks = entry["pks"]
+        status: Optional[str] = "finished"
+        if not resume or pks is None:
+            ers = execution_request_handler.list_by_exec_ids([entry["exec_id"]])
+            if not ers or ers[0].get("status") == "failed":
+                return None
+            status = ers[0].get("status")
+            if status == "finished":
+                pks = self.__resource_pks__(ers[0])
+
+        if status == "finished" and pks is not None:
+            # the datasets may have been deleted on the server since the upload
+            existing = {
+                int(ds["pk"]) for ds in self.list_by_pks(pks, include_fields=["pk"])
+            }
+            missing = [pk for pk in pks if int(pk) not in existing]
+            if missing:
+                logging.info(
+                    f"datasets {', '.join(str(pk) for pk in missing)} of upload {entry['exec_id']} "
+                    "do not exist anymore, uploading again ..."
+                )
+                return None
+            if pks != entry["pks"]:
+                ledger.set_pks(self.url, content_hash, pks)
+        return status
+
+    @staticmethod
+    def __resource_pks__(er: Dict) -> List[int]:
+        """returns the pks of the datasets created/updated by an execution request"""
+        return [
+            resource["id"]
+            for resource in er.get("output_params", {}).get("resources", [])
+        ]
+
+    def __wait_for_upload__(
+        self,
+        exec_id: str,
+        poll_interval: Optional[float] = None,
+        timeout: Optional[float] = None,
+        size: int = 0,
+    ) -> List[int]:
         """Wait for an upload execution request to finish and return the resulting dataset PKs.
 
+        Polls start fast and back off exponentially up to a cap, scaled with the upload size.
+
         Args:
             exec_id (str): The execution request ID returned by the upload endpoint.
-            poll_interval (int): Seconds between status polls. Defaults to 5.
+            poll_interval (float, optional): Fixed seconds between status polls. Defaults to adaptive backoff.
+            timeout (float, optional): Max seconds to wait. Defaults to no timeout.
+            size (int, optional): Size in bytes of the upload, scales the poll intervals. Defaults to 0.
 
         Returns:
             List[int]: PKs of the created/updated datasets.
 
         Raises:
-            SystemExit: If the upload fails.
+            SystemExit: If the upload fails or does not finish within timeout.
         """
         execution_request_handler = GeonodeExecutionRequestHandler(
-            env=self.gn_credentials
+            env=self.gn_credentials, session=self.session
         )
-        elapsed = 0
+        intervals = poll_intervals(poll_interval=poll_interval, size=size)
+        started = time.monotonic()
         while True:
             er = execution_request_handler.get(exec_id=exec_id)
             status = er.get("status", "")
-            if status in ("finished", "failed"):
+            if status in FINAL_STATUSES:
                 break
-            logging.info(f"waiting for upload to finish ({elapsed}s) ...")
-            time.sleep(poll_interval)
-            elapsed += poll_interval
+            elapsed = time.monotonic() - started
+            interval = next(intervals)
+            if timeout is not None:
+                if elapsed >= timeout:
+                    logging.error(f"upload did not finish within {timeout}s ...")
+                    sys.exit(1)
+                interval = min(interval, timeout - elapsed)
+            logging.info(f"waiting for upload to finish ({elapsed:.0f}s) ...")
+            time.sleep(interval)
 
         if er.get("status") == "failed":
             logging.error("upload failed ...")
             logging.error(er)
             sys.exit(1)
 
-        logging.info("upload finished ...")
-        pks = []
-        for resource in er.get("output_params", {}).get("resources", []):
-            pks.append(resource["id"])
-        return pks
+        latency = notice_latency(er)
+        if latency is not None:
+            logging.info(
+                f"upload finished, noticed {latency:.1f}s after the server ..."
+            )
+        else:
+            logging.info("upload finished ...")
+        return self.__resource_pks__(er)
+
+    @staticmethod
+    def __dataset_file_set__(dataset_path: Path) -> List[Path]:
+        """returns the files of a dataset: the shapefile with its (existing optional) sidecars or the file itself"""
+        if dataset_path.suffix == ".shp":
+            return [
+                dataset_path.with_suffix(suffix)
+                for suffix in [".shp", ".dbf", ".shx", ".prj"]
+            ] + [
+                dataset_path.parent / (dataset_path.stem + suffix)
+                for suffix in SHAPEFILE_OPTIONAL_SIDECARS
+                if (dataset_path.parent / (dataset_path.stem + suffix)).is_file()
+            ]
+        return [dataset_path]
+
+    def __upload_with_ledger__(
+        self,
+        ledger: UploadLedger,
+        file_path: Path,
+        resume: bool = False,
+        **kwargs,
+    ) -> Dict:
+        """Upload a dataset unless the ledger knows an upload of the same content to this geonode.
+
+        A previous upload is reused if its execution request did not fail, the ledger entry gets
+        its pks once the execution request is finished. With resume, uploads known to be finished
+        are skipped without asking the server and a journaled transfer which was interrupted before
+        the server answered is re-attached to the execution request the server created for it.
+
+        Args:
+            ledger (UploadLedger): upload ledger
+            file_path (Path): dataset to upload
+            resume (bool, optional): re-attach interrupted transfers. Defaults to False.
+
+        Returns:
+            Dict: upload response, or for reused uploads execution_id, status and skipped=True
+        """
+        if not file_path.exists():
+            raise FileNotFoundError
+        content_hash = ledger.hash_file_set(self.__dataset_file_set__(file_path))
+        execution_request_handler = GeonodeExecutionRequestHandler(
+            env=self.gn_credentials, session=self.session
+        )
+
+        entry = ledger.lookup(self.url, content_hash)
+        if entry is not None:
+            status = self.__reusable_upload_status__(
+                ledger, content_hash, entry, execution_request_handler, resume
+            )
+            if status is not None:
+                logging.info(
+                    f"{file_path} unchanged since upload {entry['exec_id']} ({entry['uploaded']}), skipping ..."
+                )
+                return {
+                    "execution_id": entry["exec_id"],
+                    "status": status,
+                    "skipped": True,
+                }
+            ledger.forget(self.url, content_hash)
+
+        transfer = ledger.pending_transfer(self.url, content_hash)
+        if resume and transfer is not None:
+            # the server may have received the file although its answer got lost
+            since = datetime.datetime.fromisoformat(
+                transfer["started"]
+            ) - datetime.timedelta(seconds=RESUME_CLOCK_SKEW)
+            attached = execution_request_handler.find_latest(
+                name=transfer["name"],
+                created_since=since.isoformat(),
+                match=lambda er: self.__is_own_transfer__(er, transfer["transfer_id"]),
+            )
+            if attached is not None and attached.get("status") != "failed":
+                logging.info(
+                    f"re-attaching interrupted upload of {file_path} to {attached['exec_id']} ..."
+                )
+                ledger.record(
+                    url=self.url,
+                    content_hash=content_hash,
+                    file=str(file_path),
+                    exec_id=str(attached["exec_id"]),
+                )
+                ledger.end_transfer(self.url, content_hash)
+                return {
+                    "execution_id": attached["exec_id"],
+                    "status": attached.get("status"),
+                    "skipped": True,
+                }
+
+        upload_name = (
+            file_path.stem + ".zip"
+            if file_path.suffix == ".shp" and kwargs.get("zip_shapefile")
+            else file_path.name
+        )
+        transfer_id = ledger.begin_transfer(
+            url=self.url,
+            content_hash=content_hash,
+            file=str(file_path),
+            name=upload_name,
+        )
+        r = self.upload(file_path=file_path, transfer_id=transfer_id, **kwargs)
+        if r is not None and "execution_id" in r:
+            ledger.record(
+                url=self.url,
+                content_hash=content_hash,
+                file=str(file_path),
+                exec_id=str(r["execution_id"]),
+            )
+        # the server answered, there is no lost execution request to re-attach
+        ledger.end_transfer(self.url, content_hash)
+        return r
+
+    def __is_own_transfer__(self, er: Dict, transfer_id: str) -> bool:
+        """
+        Internal method telling whether an execution request was created by the current user for
+        the journaled transfer. Servers which do not keep the transfer id in the input params of
+        the execution request never match, the file is then uploaded again.
+        """
+        user = er.get("user")
+        if isinstance(user, dict):
+            user = user.get("username")
+        input_params = er.get("input_params") or {}
+        return (
+            user == self.gn_credentials.username
+            and input_params.get(TRANSFER_ID_FIELD) == transfer_id
+        )
 
     def upload(
         self,
@@ -136,6 +546,13 @@ class GeonodeDatasetsHandler(GeonodeResourceHandler):
         mosaic: bool = False,
         overwrite_existing_layer: bool = False,
         skip_existing_layers: bool = False,
+        progress: Optional[str] = None,
+        skip_unchanged: bool = False,
+        ledger_path: Path = DEFAULT_LEDGER_PATH,
+        validate: bool = True,
+        zip_shapefile: Optional[str] = None,
+        resume: bool = False,
+        transfer_id: Optional[str] = None,
         **kwargs,
     ) -> Dict:
         """Upload dataset to geonode.
@@ -146,10 +563,43 @@ class GeonodeDatasetsHandler(GeonodeResourceHandler):
             charset (str, optional): Fileencoding Defaults to "UTF-8".
             time (bool, optional): True if the dataset is a timeseries dataset. Defaults to False.
             mosaic (bool, optional): declare dataset as mosaic
+            progress (Optional[str], optional): report upload progress on stderr as "bar" or "json". Defaults to None.
+            skip_unchanged (bool, optional): skip the transfer if the ledger has an upload of the same content
+                                             to this geonode, which did not fail. Defaults to False.
+            ledger_path (Path, optional): sqlite upload ledger used by skip_unchanged and resume.
+                                          Defaults to DEFAULT_LEDGER_PATH.
+            validate (bool, optional): check the file headers before the upload. Defaults to True.
+            zip_shapefile (Optional[str], optional): send a shapefile with all its sidecars as zip archive,
+                                                     generated while it is sent, "stored" or "deflated". Defaults to None.
+            resume (bool, optional): like skip_unchanged, and re-attach a transfer that was interrupted before the
+                                     server answered to the execution request the server created. Defaults to False.
+            transfer_id (Optional[str], optional): journaled id of the transfer, sent along to find its execution
+                                                   request on resume. Defaults to None.
 
         Raises:
             FileNotFoundError: raised when given file is not found
+            DatasetValidationError: raised when the dataset files are broken
         """
+        if validate:
+            validate_dataset(file_path)
+
+        if skip_unchanged or resume:
+            with UploadLedger(ledger_path) as ledger:
+                return self.__upload_with_ledger__(
+                    ledger,
+                    file_path=file_path,
+                    resume=resume,
+                    charset=charset,
+                    time=time,
+                    mosaic=mosaic,
+                    overwrite_existing_layer=overwrite_existing_layer,
+                    skip_existing_layers=skip_existing_layers,
+                    progress=progress,
+                    validate=False,
+                    zip_shapefile=zip_shapefile,
+                    **kwargs,
+                )
+
         dataset_path: Path = file_path
         files: List[GeonodeHTTPFile] = []
         # handle shape files different
@@ -164,7 +614,9 @@ class GeonodeDatasetsHandler(GeonodeResourceHandler):
                 os.path.join(dataset_path.parent, dataset_path.stem + ".prj")
             )
 
-            if not any(x.exists for x in [dataset_path, dbf_file, shx_file, prj_file]):
+            if not all(
+                x.exists() for x in [dataset_path, dbf_file, shx_file, prj_file]
+            ):
                 raise FileNotFoundError
 
             content_length: int = sum(
@@ -174,28 +626,54 @@ class GeonodeDatasetsHandler(GeonodeResourceHandler):
                 ]
             )
 
-            files = [
-                (
-                    "base_file",
+            if zip_shapefile:
+                zip_name = dataset_path.stem + ".zip"
+                archive = ZipArchive(
+                    self.__dataset_file_set__(dataset_path),
+                    compression=ZIP_COMPRESSIONS[zip_shapefile],
+                )
+                # the importer takes the archive as base_file and zip_file, both fields
+                # stream the same archive, a deflated one is sized only once
+                files = [
+                    (field, (zip_name, archive.open(), "application/zip"))
+                    for field in ("base_file", "zip_file")
+                ]
+
+            else:
+                files = [
                     (
-                        dataset_path.name,
-                        open(dataset_path, "rb"),
-                        "application/octet-stream",
+                        "base_file",
+                        (
+                            dataset_path.name,
+                            open(dataset_path, "rb"),
+                            "application/octet-stream",
+                        ),
                     ),
-                ),
-                (
-                    "dbf_file",
-                    (dbf_file.name, open(dbf_file, "rb"), "application/octet-stream"),
-                ),
-                (
-                    "shx_file",
-                    (shx_file.name, open(shx_file, "rb"), "application/octet-stream"),
-                ),
-                (
-                    "prj_file",
-                    (prj_file.name, open(prj_file, "rb"), "application/octet-stream"),
-                ),
-            ]
+                    (
+                        "dbf_file",
+                        (
+                            dbf_file.name,
+                            open(dbf_file, "rb"),
+                            "application/octet-stream",
+                        ),
+                    ),
+                    (
+                        "shx_file",
+                        (
+                            shx_file.name,
+                            open(shx_file, "rb"),
+                            "application/octet-stream",
+                        ),
+                    ),
+                    (
+                        "prj_file",
+                        (
+                            prj_file.name,
+                            open(prj_file, "rb"),
+                            "application/octet-stream",
+                        ),
+                    ),
+                ]
 
         else:
             if not dataset_path.exists():
@@ -220,12 +698,19 @@ class GeonodeDatasetsHandler(GeonodeResourceHandler):
             "overwrite_existing_layer": overwrite_existing_layer,
             "skip_existing_layers": skip_existing_layers,
         }
+        if transfer_id is not None:
+            json[TRANSFER_ID_FIELD] = transfer_id
 
         return self.http_post(
             endpoint="uploads/upload",
             files=files,
             data=json,
             content_length=content_length,
+            progress=(
+                UploadProgress(name=dataset_path.name, format=progress)
+                if progress
+                else None
+            ),
         )
 
     def patch(
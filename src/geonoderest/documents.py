@@ -8,6 +8,7 @@ from geonoderest.geonodetypes import GeonodeCmdOutListKey, GeonodeCmdOutDictKey
 from geonoderest.cmdprint import show_list, print_json
 from geonoderest.resources import GeonodeResourceHandler
 from geonoderest.geonodetypes import GeonodeHTTPFile
+from geonoderest.progress import UploadProgress
 
 
 class GeonodeDocumentsHandler(GeonodeResourceHandler):
@@ -60,11 +61,26 @@ class GeonodeDocumentsHandler(GeonodeResourceHandler):
         else:
             show_list(values=list_items, headers=["key", "value"])
 
+    def download_url(self, pk: int) -> Optional[str]:
+        """url of the binary of a document (its href)
+
+        Args:
+            pk (int): pk of the document
+
+        Returns:
+            Optional[str]: download url, None if the document has none
+        """
+        obj = self.get(pk=pk)
+        if obj is None:
+            return None
+        return obj.get("href") or obj.get("download_url")
+
     def upload(
         self,
         file_path: Path,
         charset: str = "UTF-8",
         metadata_only: bool = False,
+        progress: Optional[str] = None,
         **kwargs,
     ) -> Optional[Dict]:
         """upload a document to geonode
@@ -73,6 +89,7 @@ class GeonodeDocumentsHandler(GeonodeResourceHandler):
             file_path (Path): file to upload
             charset (str, optional): charset. Defaults to "UTF-8".
             metadata_only (bool, optional):  set upload as metadata_only. Defaults to False.
+            progress (Optional[str], optional): report upload progress on stderr as "bar" or "json". Defaults to None.
 
         Raises:
             FileNotFoundError: raises file not found if the given filepath is not accessable
@@ -109,6 +126,11 @@ class GeonodeDocumentsHandler(GeonodeResourceHandler):
             files=files,
             json=json,
             content_length=content_length,
+            progress=(
+                UploadProgress(name=document_path.name, format=progress)
+                if progress
+                else None
+            ),
         )
         if r is None:
             return None
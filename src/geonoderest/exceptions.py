@@ -5,3 +5,12 @@ class GeoNodeRestException(Exception):
     """
 
     pass
+
+
+class DatasetValidationError(GeoNodeRestException):
+    """
+    DatasetValidationError, raised if a dataset file is rejected before its upload
+
+    """
+
+    pass
@@ -1,10 +1,70 @@
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, List, Optional, Iterator, Set
+import datetime
+import itertools
 import logging
+import sys
+import time
 
 from geonoderest.geonodetypes import GeonodeCmdOutListKey, GeonodeCmdOutObjectKey
 from geonoderest.rest import GeonodeRest
 
-from geonoderest.cmdprint import print_list_on_cmd, print_json
+from geonoderest.cmdprint import print_json
+
+# states after which an execution request does not change anymore
+FINAL_STATUSES = ("finished", "failed")
+# consecutive complete listings an exec id may be missing from before it is reported as failed,
+# tolerates a listing sent right before the new execution request became visible
+MISSING_POLL_LIMIT: int = 2
+# max exec ids per filter{exec_id.in} listing request, keeps the url length reasonable
+EXEC_ID_FILTER_CHUNK_SIZE: int = 100
+# execution requests of a name checked by find_latest(match=...), newest first
+FIND_LATEST_PAGE_SIZE: int = 100
+
+# adaptive polling: start fast, back off exponentially up to a cap. The first interval grows
+# with the upload size, as the import time does.
+POLL_INITIAL_INTERVAL: float = 0.5
+POLL_MAX_INTERVAL: float = 30.0
+POLL_BACKOFF_FACTOR: float = 1.5
+POLL_SIZE_SCALE: int = 100 * 1024 * 1024
+
+
+def poll_intervals(
+    poll_interval: Optional[float] = None, size: int = 0
+) -> Iterator[float]:
+    """
+    Yields the delays between two status polls of an execution request.
+
+    Args:
+        poll_interval (float, optional): fixed delay. Defaults to None, which backs off
+                                         exponentially from POLL_INITIAL_INTERVAL up to POLL_MAX_INTERVAL.
+        size (int, optional): size in bytes of the upload, scales the first delay (1 + size / 100 MB).
+
+    Returns:
+        Iterator[float]: endless delays in seconds
+    """
+    if poll_interval is not None:
+        yield from itertools.repeat(poll_interval)
+        return
+    interval = min(
+        POLL_MAX_INTERVAL, POLL_INITIAL_INTERVAL * (1 + size / POLL_SIZE_SCALE)
+    )
+    while True:
+        yield interval
+        interval = min(POLL_MAX_INTERVAL, interval * POLL_BACKOFF_FACTOR)
+
+
+def notice_latency(er: Dict) -> Optional[float]:
+    """
+    Seconds between the server finishing an execution request and now, None if the finished
+    timestamp is missing. Includes the clock offset between client and server.
+    """
+    try:
+        finished = datetime.datetime.fromisoformat(er["finished"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if finished.tzinfo is None:
+        finished = finished.replace(tzinfo=datetime.timezone.utc)
+    return (datetime.datetime.now(datetime.timezone.utc) - finished).total_seconds()
 
 
 class GeonodeExecutionRequestHandler(GeonodeRest):
@@ -26,6 +86,46 @@ class GeonodeExecutionRequestHandler(GeonodeRest):
         obj = self.get(exec_id=exec_id, **kwargs)
         print_json(obj)
 
+    def cmd_watch(
+        self,
+        exec_ids: List[str],
+        poll_interval: Optional[float] = None,
+        timeout: Optional[float] = None,
+        **kwargs,
+    ):
+        """
+        wait for execution requests to finish and show each one as soon as it is done
+
+        Args:
+            exec_ids (List[str]): exec_ids to watch
+            poll_interval (float, optional): fixed seconds between two polls. Defaults to adaptive backoff.
+            timeout (float, optional): max seconds to wait. Defaults to no timeout.
+        """
+        watcher = GeonodeExecutionRequestWatcher(
+            handler=self,
+            exec_ids=exec_ids,
+            poll_interval=poll_interval,
+            timeout=timeout,
+        )
+        failed = 0
+        for er in watcher.watch():
+            if er["status"] == "failed":
+                failed += 1
+            if kwargs.get("json"):
+                print_json(er)
+            else:
+                print(f"{self.ENDPOINT_NAME}: {er['exec_id']} {er['status']} ...")
+        if watcher.pending:
+            logging.error(
+                f"{len(watcher.pending)} execution requests did not finish within {timeout}s ..."
+            )
+        if failed or watcher.pending:
+            if failed:
+                logging.error(
+                    f"{failed} of {len(exec_ids)} execution requests failed ..."
+                )
+            sys.exit(1)
+
     def get(self, exec_id: str, **kwargs) -> Dict:
         """
         get details for a given exec_id
@@ -39,16 +139,36 @@ class GeonodeExecutionRequestHandler(GeonodeRest):
         r = self.http_get(endpoint=f"{self.ENDPOINT_NAME}/{exec_id}")
         return r[self.SINGULAR_RESOURCE_NAME]
 
-    def cmd_list(self, **kwargs):
-        """show list of geonode obj on the cmdline"""
-        obj = self.list(**kwargs)
-        if obj is None:
-            logging.warning("getting list failed ...")
-            return None
-        if kwargs["json"]:
-            print_json(obj)
-        else:
-            print_list_on_cmd(obj, self.LIST_CMDOUT_HEADER)
+    def cmd_list(
+        self,
+        all_pages: bool = False,
+        include_fields: Optional[List[str]] = None,
+        output: Optional[str] = None,
+        **kwargs,
+    ):
+        """show list of geonode obj on the cmdline
+
+        Args:
+            all_pages (bool, optional): show the execution requests of all pages. Defaults to False.
+            include_fields (List[str], optional): only request (and show) these fields.
+            output (str, optional): stream the records as ndjson, csv or tsv instead of printing a table
+        """
+        cmdout_header = self.LIST_CMDOUT_HEADER
+        if include_fields:
+            cmdout_header = [GeonodeCmdOutListKey(key=f) for f in include_fields]
+
+        self.__cmd_list_output__(
+            cmdout_header,
+            list_page=lambda: self.list(include_fields=include_fields, **kwargs),
+            iter_all_pages=lambda: self.iter_all(
+                prefetch=kwargs.get("concurrency", 1),
+                include_fields=include_fields,
+                **kwargs,
+            ),
+            all_pages=all_pages,
+            output=output,
+            json=kwargs.get("json", False),
+        )
 
     def list(self, **kwargs) -> Optional[Dict]:
         """returns dict of execution requests from geonode
@@ -63,3 +183,180 @@ class GeonodeExecutionRequestHandler(GeonodeRest):
         if r is None:
             return None
         return r[self.JSON_OBJECT_NAME]
+
+    def list_by_exec_ids(self, exec_ids: List[str]) -> Optional[List[Dict]]:
+        """returns the execution requests of the given exec_ids, using one filter{exec_id.in}
+        listing request per EXEC_ID_FILTER_CHUNK_SIZE exec_ids
+
+        Args:
+            exec_ids (List[str]): exec_ids to fetch
+
+        Returns:
+            Optional[List[Dict]]: execution requests found, None if a request failed
+        """
+        endpoint = f"{self.ENDPOINT_NAME}/"
+        ers: List[Dict] = []
+        for i in range(0, len(exec_ids), EXEC_ID_FILTER_CHUNK_SIZE):
+            chunk = exec_ids[i : i + EXEC_ID_FILTER_CHUNK_SIZE]
+            r = self.http_get(
+                endpoint=endpoint,
+                params={"filter{exec_id.in}": chunk, "page_size": len(chunk)},
+            )
+            if r is None:
+                return None
+            ers.extend(r[self.JSON_OBJECT_NAME])
+        return ers
+
+    def find_latest(
+        self,
+        name: str,
+        created_since: str,
+        match: Optional[Callable[[Dict], bool]] = None,
+    ) -> Optional[Dict]:
+        """returns the latest execution request of the given name created since a point in time
+
+        Args:
+            name (str): name of the execution request, for uploads the uploaded file name
+            created_since (str): iso timestamp
+            match (Callable[[Dict], bool], optional): only execution requests it accepts are returned,
+                e.g. to skip requests of other users with the same name. Defaults to None.
+
+        Returns:
+            Optional[Dict]: execution request, None if there is none or the request failed
+        """
+        r = self.http_get(
+            endpoint=f"{self.ENDPOINT_NAME}/",
+            params={
+                "filter{name}": name,
+                "filter{created.gte}": created_since,
+                "sort[]": "-created",
+                "page_size": 1 if match is None else FIND_LATEST_PAGE_SIZE,
+            },
+        )
+        if r is None:
+            return None
+        return next(
+            (er for er in r[self.JSON_OBJECT_NAME] if match is None or match(er)),
+            None,
+        )
+
+    def iter_all(self, prefetch: int = 1, **kwargs) -> Iterator[Dict]:
+        """lazily yields the execution requests of all pages, starting at the given page
+
+        Args:
+            prefetch (int, optional): number of pages requested in parallel. Defaults to 1.
+
+        Returns:
+            Iterator[Dict]: generator of execution requests
+        """
+        endpoint = f"{self.ENDPOINT_NAME}/"
+
+        params = self.__handle_http_params__({}, kwargs)
+        return self.__iter_pages__(
+            endpoint=endpoint,
+            params=params,
+            json_object_name=self.JSON_OBJECT_NAME,
+            prefetch=prefetch,
+        )
+
+
+class GeonodeExecutionRequestWatcher:
+    """
+    Tracks a set of execution requests until they are finished or failed.
+
+    Every tick fetches the state of all pending exec_ids with a single batched listing request
+    (filter{exec_id.in}) instead of one GET per exec_id. Ticks start fast and back off
+    exponentially, see poll_intervals().
+    """
+
+    def __init__(
+        self,
+        handler: GeonodeExecutionRequestHandler,
+        exec_ids: Iterable[str] = (),
+        poll_interval: Optional[float] = None,
+        timeout: Optional[float] = None,
+        size: int = 0,
+    ):
+        """
+        Args:
+            handler (GeonodeExecutionRequestHandler): handler used for the listing requests
+            exec_ids (Iterable[str], optional): exec_ids to watch. More can be added with add().
+            poll_interval (float, optional): fixed seconds between two ticks. Defaults to adaptive backoff.
+            timeout (float, optional): max seconds watch() waits. Defaults to no timeout.
+            size (int, optional): size in bytes of the largest upload watched, scales the poll intervals.
+        """
+        self.handler = handler
+        self.intervals = poll_intervals(poll_interval=poll_interval, size=size)
+        self.timeout = timeout
+        self.pending: Set[str] = set(str(exec_id) for exec_id in exec_ids)
+        self.missing: Dict[str, int] = {}
+
+    def add(self, exec_id: str):
+        """start watching exec_id"""
+        self.pending.add(str(exec_id))
+
+    def poll(self) -> List[Dict]:
+        """
+        One tick: fetch the pending execution requests and stop watching the ones that are done.
+        Execution requests missing from MISSING_POLL_LIMIT listings in a row are reported as failed.
+
+        Returns:
+            List[Dict]: execution requests which reached a final status since the last tick
+        """
+        if not self.pending:
+            return []
+        ers = self.handler.list_by_exec_ids(sorted(self.pending))
+        if ers is None:
+            logging.warning("polling execution requests failed ...")
+            return []
+        done = []
+        listed = {str(er.get("exec_id")) for er in ers}
+        for exec_id in sorted(self.pending - listed):
+            self.missing[exec_id] = self.missing.get(exec_id, 0) + 1
+            if self.missing[exec_id] >= MISSING_POLL_LIMIT:
+                # deleted, mistyped or not visible to this user: it will never finish
+                logging.error(f"execution request {exec_id} not found ...")
+                self.pending.discard(exec_id)
+                done.append(
+                    {
+                        "exec_id": exec_id,
+                        "status": "failed",
+                        "log": "execution request not found",
+                    }
+                )
+        for er in ers:
+            exec_id = str(er.get("exec_id"))
+            self.missing.pop(exec_id, None)
+            if exec_id in self.pending and er.get("status") in FINAL_STATUSES:
+                self.pending.discard(exec_id)
+                latency = notice_latency(er)
+                if latency is not None:
+                    logging.info(
+                        f"{exec_id} {er['status']}, noticed {latency:.1f}s after the server ..."
+                    )
+                done.append(er)
+        return done
+
+    def watch(self) -> Iterator[Dict]:
+        """
+        Poll until all watched execution requests are done or the timeout is reached.
+        Execution requests still running at the timeout stay in pending.
+
+        Returns:
+            Iterator[Dict]: every execution request as soon as it is finished or failed
+        """
+        started = time.monotonic()
+        while True:
+            yield from self.poll()
+            if not self.pending:
+                return
+            elapsed = time.monotonic() - started
+            interval = next(self.intervals)
+            if self.timeout is not None:
+                if elapsed >= self.timeout:
+                    return
+                interval = min(interval, self.timeout - elapsed)
+            logging.info(
+                f"waiting for {len(self.pending)} execution request(s) to finish ({elapsed:.0f}s) ..."
+            )
+            time.sleep(interval)
@@ -4,12 +4,22 @@ import logging
 import os
 import sys
 import argparse
-from typing import Union
+from typing import Union, List
 from argparse import RawTextHelpFormatter
 from pathlib import Path
 
 from geonoderest.apiconf import GeonodeApiConf
+from geonoderest.session import (
+    DEFAULT_POOL_CONNECTIONS,
+    DEFAULT_POOL_MAXSIZE,
+    DEFAULT_RETRIES,
+    DEFAULT_RETRY_BACKOFF,
+    DEFAULT_RETRY_BACKOFF_MAX,
+)
+from geonoderest.ratelimit import parse_rate, parse_size
+from geonoderest.cache import DEFAULT_CACHE_PATH, DEFAULT_CACHE_MAX_SIZE
 from geonoderest.geonodeobject import GeonodeObjectHandler
+from geonoderest.cmdprint import STREAM_OUTPUT_FORMATS
 from geonoderest.datasets import GeonodeDatasetsHandler
 from geonoderest.resources import (
     GeonodeResourceHandler,
@@ -22,6 +32,8 @@ from geonoderest.users import GeonodeUsersHandler
 from geonoderest.groups import GeonodeGroupsHandler
 from geonoderest.geoapps import GeonodeGeoappsHandler
 from geonoderest.uploads import GeonodeUploadsHandler
+from geonoderest.progress import PROGRESS_FORMATS
+from geonoderest.ledger import DEFAULT_LEDGER_PATH
 from geonoderest.executionrequest import GeonodeExecutionRequestHandler
 from geonoderest.keywords import GeonodeKeywordsRequestHandler
 from geonoderest.tkeywords import GeonodeThesauriKeywordsRequestHandler
@@ -35,6 +47,7 @@ GEONODECTL_BASIC_ENV_VAR: str = "GEONODE_API_BASIC_AUTH"
 DEFAULT_CHARSET: str = "UTF-8"
 DEFAULT_CMD_PAGE_SIZE: int = 80
 DEFAULT_CMD_PAGE: int = 1
+DEFAULT_CMD_CONCURRENCY: int = 1
 
 
 class AliasedSubParsersAction(argparse._SubParsersAction):
@@ -86,6 +99,13 @@ class kwargs_append_action(argparse.Action):
         setattr(args, self.dest, d)
 
 
+def comma_separated_list(value: str) -> List[str]:
+    """
+    argparse type to split a comma separated argument into a list of str
+    """
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
 def geonodectl():
     parser = argparse.ArgumentParser(
         prog="geonodectl",
@@ -119,6 +139,13 @@ To use this tool you have to set the following environment variables before star
         action="store_true",
         help="return output as raw response json as it comes from the rest API",
     )
+    parser.add_argument(
+        "--output",
+        dest="output",
+        choices=STREAM_OUTPUT_FORMATS,
+        default=None,
+        help="stream list results as they arrive, one record per line, e.g. for piping into jq or awk",
+    )
     parser.add_argument(
         "--page-size",
         dest="page_size",
@@ -134,6 +161,158 @@ To use this tool you have to set the following environment variables before star
         help=" A page number within the paginated result set",
     )
 
+    parser.add_argument(
+        "--all",
+        dest="all_pages",
+        default=False,
+        action="store_true",
+        help="follow pagination and list the results of all pages, starting at --page. "
+        "With --concurrency N, N pages are fetched in parallel",
+    )
+    parser.add_argument(
+        "--fields",
+        dest="include_fields",
+        type=comma_separated_list,
+        help="comma separated list of fields to request on list and describe, e.g. --fields pk,title,abstract "
+        "(default for resource lists: the columns of the table output)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        dest="concurrency",
+        default=DEFAULT_CMD_CONCURRENCY,
+        type=int,
+        help="Number of parallel requests for commands on pk ranges or lists and for batch uploads (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--pool-connections",
+        dest="pool_connections",
+        default=DEFAULT_POOL_CONNECTIONS,
+        type=int,
+        help="Number of per-host connection pools to keep (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--pool-maxsize",
+        dest="pool_maxsize",
+        default=DEFAULT_POOL_MAXSIZE,
+        type=int,
+        help="Max number of connections kept alive per host (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--pool-block",
+        dest="pool_block",
+        default=False,
+        action="store_true",
+        help="never open more than --pool-maxsize connections per host, wait for a free one instead",
+    )
+    parser.add_argument(
+        "--no-keep-alive",
+        dest="keep_alive",
+        default=True,
+        action="store_false",
+        help="close connections after each request instead of reusing them",
+    )
+
+    parser.add_argument(
+        "--retries",
+        dest="retries",
+        default=DEFAULT_RETRIES,
+        type=int,
+        help="Max retries of a request on connection errors and HTTP 429/502/503/504, 0 disables retrying "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--retry-backoff",
+        dest="retry_backoff",
+        default=DEFAULT_RETRY_BACKOFF,
+        type=float,
+        help="Base delay in seconds of the exponential retry backoff (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--retry-backoff-max",
+        dest="retry_backoff_max",
+        default=DEFAULT_RETRY_BACKOFF_MAX,
+        type=float,
+        help="Max delay in seconds between two retries, Retry-After headers are always honored (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--retry-all-methods",
+        dest="retry_all_methods",
+        default=False,
+        action="store_true",
+        help="also retry non idempotent requests (POST, PATCH), by default only GET, HEAD, OPTIONS, PUT and DELETE",
+    )
+
+    parser.add_argument(
+        "--max-rps",
+        dest="max_rps",
+        default=0.0,
+        type=float,
+        help="Max number of requests per second sent to geonode, 0 means unlimited (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--no-adaptive-concurrency",
+        dest="adaptive_concurrency",
+        default=True,
+        action="store_false",
+        help="do not lower the number of parallel requests when geonode answers 429/503 or times out, "
+        "always use --concurrency",
+    )
+    parser.add_argument(
+        "--latency-tolerance",
+        dest="latency_tolerance",
+        default=0.0,
+        type=float,
+        help="also lower the number of parallel requests when the recent latency exceeds this factor "
+        "of the usual latency, e.g. 2.0. 0 disables latency based limiting (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--max-upload-rate",
+        dest="max_upload_rate",
+        default=0.0,
+        type=parse_rate,
+        help="Max upload bandwidth in bytes per second, with optional K, M or G suffix (e.g. 2M), "
+        "shared by all parallel uploads. 0 means unlimited (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--max-download-rate",
+        dest="max_download_rate",
+        default=0.0,
+        type=parse_rate,
+        help="Max download bandwidth in bytes per second, with optional K, M or G suffix (e.g. 512K), "
+        "0 means unlimited (default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--cache",
+        dest="cache",
+        default=False,
+        action="store_true",
+        help="keep GET responses in a persistent sqlite cache and revalidate them with "
+        "If-None-Match / If-Modified-Since. Execution requests and uploads are always requested",
+    )
+    parser.add_argument(
+        "--cache-path",
+        dest="cache_path",
+        type=Path,
+        help=f"sqlite file of the response cache, implies --cache (default: {DEFAULT_CACHE_PATH})",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        dest="cache_ttl",
+        default=0.0,
+        type=float,
+        help="seconds a cached response is used without asking the server, 0 revalidates every use "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--cache-max-size",
+        dest="cache_max_size",
+        default=DEFAULT_CACHE_MAX_SIZE,
+        type=parse_size,
+        help="max size of the response cache in bytes, with optional K, M or G suffix, least recently "
+        "used responses are evicted (default: %(default)s)",
+    )
+
     parser.add_argument(
         "-v",
         "--verbose",
@@ -187,10 +366,18 @@ To use this tool you have to set the following environment variables before star
         "metadata", help="download metadata for resource"
     )
     resource_metadata.add_argument(
-        type=int,
+        type=str,
         dest="pk",
         metavar="{pk}",
-        help="pk of resource to show metadata",
+        nargs="?",
+        help="pk of resource to show metadata, multiple pks (range '1-5', list '1,2,3') are exported "
+        "into the archive given by --out",
+    )
+    resource_metadata.add_argument(
+        "--pk",
+        type=str,
+        dest="pk_range",
+        help="same as {pk}, e.g. --pk 1-5000",
     )
     resource_metadata.add_argument(
         "--metadata-type",
@@ -200,6 +387,27 @@ To use this tool you have to set the following environment variables before star
         default=DEFAULT_METADATA_TYPE,
         help="pk of resource to show metadata",
     )
+    resource_metadata.add_argument(
+        "--types",
+        type=comma_separated_list,
+        dest="metadata_types",
+        help=f"comma separated metadata types to export, e.g. --types 'ISO,Dublin Core'. "
+        f"Choose from {', '.join(SUPPORTED_METADATA_TYPES)}",
+    )
+    resource_metadata.add_argument(
+        "--out",
+        type=Path,
+        dest="out_path",
+        help="write the metadata to this file instead of stdout. An archive suffix (.tar, .tar.gz, .tar.xz, "
+        ".tar.zst, ...) exports the metadata of all pks and types into a compressed tar archive, "
+        "downloaded on --concurrency parallel workers",
+    )
+    resource_metadata.add_argument(
+        "--resume",
+        action="store_true",
+        dest="resume",
+        help="continue an interrupted download of --out",
+    )
 
     ####################################
     # LINKED RESOURCE ARGUMENT PARSING #
@@ -349,7 +557,8 @@ To use this tool you have to set the following environment variables before star
         type=Path,
         dest="file_path",
         required=True,
-        help="file to upload",
+        help="file to upload. A directory or quoted glob (e.g. 'data/*.shp') uploads all datasets found, "
+        "--concurrency N of them in parallel, and prints a summary per file",
     )
     datasets_upload.add_argument(
         "--time",
@@ -390,6 +599,61 @@ To use this tool you have to set the following environment variables before star
         default=False,
         help="wait for upload to finish and show resulting dataset(s)",
     )
+    datasets_upload.add_argument(
+        "--timeout",
+        type=float,
+        dest="timeout",
+        help="with --wait: max seconds to wait for the import, exits with 1 if it is still running",
+    )
+    datasets_upload.add_argument(
+        "--skip-unchanged",
+        action="store_true",
+        dest="skip_unchanged",
+        help="skip the transfer of datasets whose content (sha256 of all files) was already uploaded "
+        "to this geonode, according to the local upload ledger",
+    )
+    datasets_upload.add_argument(
+        "--resume",
+        action="store_true",
+        dest="resume",
+        help="resume an interrupted upload (or batch): datasets already uploaded are not sent again and a "
+        "transfer that broke off before the server answered is re-attached to its execution request",
+    )
+    datasets_upload.add_argument(
+        "--ledger",
+        type=Path,
+        dest="ledger_path",
+        default=DEFAULT_LEDGER_PATH,
+        help="sqlite upload ledger and journal used by --skip-unchanged and --resume (default: %(default)s)",
+    )
+    datasets_upload.add_argument(
+        "--zip",
+        dest="zip_shapefile",
+        nargs="?",
+        const="deflated",
+        choices=["stored", "deflated"],
+        help="send a shapefile and its sidecars (incl. .cpg, .sld, .xml) as one zip archive. "
+        "The archive is generated while it is sent, no temporary file is written. --zip compresses "
+        "(deflated) and reads the files twice to learn the archive size upfront, --zip stored "
+        "reads them once",
+    )
+    datasets_upload.add_argument(
+        "--no-validate",
+        action="store_false",
+        dest="validate",
+        help="do not check the file headers (shapefile sidecars and record counts, zip directory, "
+        "GeoTIFF IFD) before the upload",
+    )
+    datasets_upload.add_argument(
+        "--progress",
+        dest="progress",
+        nargs="?",
+        const="bar",
+        choices=PROGRESS_FORMATS,
+        help="report upload progress (bytes sent, MB/s, ETA, server processing time) on stderr, "
+        "--progress json writes one json object per line for machine consumption "
+        "(always used for parallel uploads of a directory or glob)",
+    )
 
     # PATCH
     datasets_patch = datasets_subparsers.add_parser(
@@ -438,6 +702,26 @@ To use this tool you have to set the following environment variables before star
         help="pk of dataset(s) to delete (range '1-5',list '1,2,3,4,5', single '1') ...",
     )
 
+    # DOWNLOAD
+    datasets_download = datasets_subparsers.add_parser(
+        "download", help="download the dataset file (streamed, to stdout or --out)"
+    )
+    datasets_download.add_argument(
+        type=int, dest="pk", help="pk of dataset to download ..."
+    )
+    datasets_download.add_argument(
+        "--out",
+        type=Path,
+        dest="out_path",
+        help="write the dataset file to this path instead of stdout",
+    )
+    datasets_download.add_argument(
+        "--resume",
+        action="store_true",
+        dest="resume",
+        help="continue an interrupted download of --out with a HTTP Range request",
+    )
+
     #############################
     # DOCUMENT ARGUMENT PARSING #
     #############################
@@ -495,6 +779,15 @@ To use this tool you have to set the following environment variables before star
         help="if set no landing page for the document will be generated, \
           but file is downloadable through link",
     )
+    documents_upload.add_argument(
+        "--progress",
+        dest="progress",
+        nargs="?",
+        const="bar",
+        choices=PROGRESS_FORMATS,
+        help="report upload progress (bytes sent, MB/s, ETA, server processing time) on stderr, "
+        "--progress json writes one json object per line for machine consumption",
+    )
 
     # PATCH
     documents_patch = documents_subparsers.add_parser(
@@ -536,6 +829,26 @@ To use this tool you have to set the following environment variables before star
         help="pk of document(s) to delete (range '1-5',list '1,2,3,4,5', single '1')...",
     )
 
+    # DOWNLOAD
+    documents_download = documents_subparsers.add_parser(
+        "download", help="download the document file (streamed, to stdout or --out)"
+    )
+    documents_download.add_argument(
+        type=int, dest="pk", help="pk of document to download ..."
+    )
+    documents_download.add_argument(
+        "--out",
+        type=Path,
+        dest="out_path",
+        help="write the document file to this path instead of stdout",
+    )
+    documents_download.add_argument(
+        "--resume",
+        action="store_true",
+        dest="resume",
+        help="continue an interrupted download of --out with a HTTP Range request",
+    )
+
     ########################
     # MAP ARGUMENT PARSING #
     ########################
@@ -631,6 +944,21 @@ To use this tool you have to set the following environment variables before star
         type=int,
         help="space seperate list of integers of pks to add as maplayer to the map",
     )
+    maps_create_mutually_exclusive_group.add_argument(
+        "--from",
+        dest="manifest_path",
+        type=Path,
+        help="create one map per line of a jsonl manifest, e.g. "
+        '{"title": "soils", "maplayers": [3, 7], "abstract": "..."}. The datasets of all maps are '
+        "fetched once, the maps are created on --concurrency parallel workers. Not combinable with --maplayers",
+    )
+    maps_create.add_argument(
+        "--map-template",
+        dest="map_template",
+        type=Path,
+        help="local mapstore map config (like static/mapstore/configs/map.json of geonode) used as "
+        "base of the map, instead of downloading it from the geonode instance",
+    )
 
     ############################
     # GEOAPPS ARGUMENT PARSING #
@@ -1043,6 +1371,30 @@ To use this tool you have to set the following environment variables before star
         type=str, dest="exec_id", help="exec_id of executionrequest to describe ..."
     )
 
+    # WATCH
+    executionrequest_watch = executionrequest_subparsers.add_parser(
+        "watch",
+        help="wait for executionrequests to finish, showing each one as soon as it is done",
+    )
+    executionrequest_watch.add_argument(
+        type=str,
+        nargs="+",
+        dest="exec_ids",
+        help="exec_ids of executionrequests to watch ...",
+    )
+    executionrequest_watch.add_argument(
+        "--poll-interval",
+        type=float,
+        dest="poll_interval",
+        help="fixed seconds between two polls (default: start fast and back off exponentially)",
+    )
+    executionrequest_watch.add_argument(
+        "--timeout",
+        type=float,
+        dest="timeout",
+        help="max seconds to wait, exits with 1 if execution requests are still running",
+    )
+
     ############################
     # KEYWORD ARGUMENT PARSING #
     ############################
@@ -1203,7 +1555,33 @@ To use this tool you have to set the following environment variables before star
         raise NameError(
             f"provided geonode url: {url} not ends with 'api/v2/'. Please make sure to provide full rest v2api url ..."
         )
-    geonode_env = GeonodeApiConf(url=url, auth_basic=basic, verify=args.ssl_verify)
+    geonode_env = GeonodeApiConf(
+        url=url,
+        auth_basic=basic,
+        verify=args.ssl_verify,
+        pool_connections=args.pool_connections,
+        # every worker thread needs its own pooled connection
+        pool_maxsize=max(args.pool_maxsize, args.concurrency),
+        pool_block=args.pool_block,
+        keep_alive=args.keep_alive,
+        retries=args.retries,
+        retry_backoff=args.retry_backoff,
+        retry_backoff_max=args.retry_backoff_max,
+        retry_all_methods=args.retry_all_methods,
+        max_rps=args.max_rps,
+        # adaptive limit of parallel requests, shrinks on 429/503 and timeouts
+        max_in_flight=args.concurrency if args.adaptive_concurrency else 0,
+        latency_tolerance=args.latency_tolerance,
+        max_upload_rate=args.max_upload_rate,
+        max_download_rate=args.max_download_rate,
+        cache_path=(
+            args.cache_path
+            if args.cache_path is not None
+            else DEFAULT_CACHE_PATH if args.cache else None
+        ),
+        cache_ttl=args.cache_ttl,
+        cache_max_size=int(args.cache_max_size),
+    )
     g_obj: Union[GeonodeObjectHandler, GeonodeExecutionRequestHandler]
     match args.command:
         case "resources" | "resource":
@@ -1238,7 +1616,10 @@ To use this tool you have to set the following environment variables before star
         case _:
             raise NotImplemented
     g_obj_func = getattr(g_obj, "cmd_" + args.subcommand)
-    g_obj_func(**args.__dict__)
+    try:
+        g_obj_func(**args.__dict__)
+    finally:
+        g_obj.session.log_retry_stats()
 
 
 if __name__ == "__main__":
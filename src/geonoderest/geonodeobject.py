@@ -1,14 +1,14 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterator
 import json
 import logging
 
 from geonoderest.geonodetypes import GeonodeCmdOutObjectKey, GeonodeCmdOutListKey
 from geonoderest.rest import GeonodeRest
-from geonoderest.cmdprint import (
-    print_list_on_cmd,
-    print_json,
-    json_decode_error_handler,
-)
+from geonoderest.exceptions import GeoNodeRestException
+from geonoderest.cmdprint import print_json, json_decode_error_handler
+
+# max pks per filter{pk.in} listing request, keeps the url length reasonable
+PK_FILTER_CHUNK_SIZE: int = 100
 
 
 class GeonodeObjectHandler(GeonodeRest):
@@ -22,17 +22,51 @@ class GeonodeObjectHandler(GeonodeRest):
     JSON_OBJECT_NAME: str = ""
     ENDPOINT_NAME: str = ""
     SINGULAR_RESOURCE_NAME: str = ""
+    # request only the LIST_CMDOUT_HEADER fields for table output (dynamic-rest include[]/exclude[])
+    PROJECT_LIST_FIELDS: bool = False
 
-    def cmd_list(self, **kwargs):
-        """show list of geonode obj on the cmdline"""
-        obj = self.list(**kwargs)
-        if obj is None:
-            logging.warning("No results returned from GeoNode API.")
-            return
-        if kwargs["json"]:
-            print_json(obj)
-        else:
-            print_list_on_cmd(obj, self.LIST_CMDOUT_HEADER)
+    def cmd_list(
+        self,
+        all_pages: bool = False,
+        include_fields: Optional[List[str]] = None,
+        output: Optional[str] = None,
+        **kwargs,
+    ):
+        """show list of geonode obj on the cmdline
+
+        Args:
+            all_pages (bool, optional): show the objects of all pages instead of a single page. Defaults to False.
+            include_fields (List[str], optional): only request (and show) these fields. Defaults to the
+                                                  fields of LIST_CMDOUT_HEADER for table, csv and tsv output.
+            output (str, optional): stream the records as ndjson, csv or tsv instead of printing a table
+        """
+        cmdout_header = self.LIST_CMDOUT_HEADER
+        if include_fields:
+            cmdout_header = [GeonodeCmdOutListKey(key=f) for f in include_fields]
+        elif self.PROJECT_LIST_FIELDS and not kwargs.get("json") and output != "ndjson":
+            include_fields = self.__cmdout_fields__(self.LIST_CMDOUT_HEADER)
+
+        self.__cmd_list_output__(
+            cmdout_header,
+            list_page=lambda: self.list(include_fields=include_fields, **kwargs),
+            iter_all_pages=lambda: self.iter_all(
+                prefetch=kwargs.get("concurrency", 1),
+                include_fields=include_fields,
+                **kwargs,
+            ),
+            all_pages=all_pages,
+            output=output,
+            json=kwargs.get("json", False),
+        )
+
+    @staticmethod
+    def __cmdout_fields__(cmdout_header: List[GeonodeCmdOutObjectKey]) -> List[str]:
+        """returns the api fields required to print the given cmdout header
+
+        Returns:
+            List[str]: list of unique top level field names
+        """
+        return list(dict.fromkeys(key.get_field() for key in cmdout_header))
 
     def list(self, **kwargs) -> Optional[Dict]:
         """returns dict of datasets from geonode
@@ -48,6 +82,68 @@ class GeonodeObjectHandler(GeonodeRest):
             return None
         return r[self.JSON_OBJECT_NAME]
 
+    def iter_all(self, prefetch: int = 1, **kwargs) -> Iterator[Dict]:
+        """lazily yields the objects of all pages, starting at the given page
+
+        Args:
+            prefetch (int, optional): number of pages requested in parallel. Defaults to 1.
+
+        Returns:
+            Iterator[Dict]: generator of objects
+        """
+        endpoint = f"{self.ENDPOINT_NAME}/"
+
+        params = self.__handle_http_params__({}, kwargs)
+        return self.__iter_pages__(
+            endpoint=endpoint,
+            params=params,
+            json_object_name=self.JSON_OBJECT_NAME,
+            prefetch=prefetch,
+        )
+
+    def list_by_pks(
+        self,
+        pks: List[int],
+        include_fields: Optional[List[str]] = None,
+        concurrency: int = 1,
+    ) -> List[Dict]:
+        """returns the objects of the given pks, using one filter{pk.in} listing request per
+        PK_FILTER_CHUNK_SIZE pks instead of one GET per pk. pks without object are left out.
+
+        Args:
+            pks (List[int]): pks to fetch
+            include_fields (List[str], optional): only request these fields of the objects
+            concurrency (int, optional): number of listing requests sent in parallel. Defaults to 1.
+
+        Raises:
+            GeoNodeRestException: if a listing request failed
+
+        Returns:
+            List[Dict]: objects found, in order of the api response
+        """
+        endpoint = f"{self.ENDPOINT_NAME}/"
+
+        def fetch_chunk(chunk: List[int]) -> List[Dict]:
+            params = self.__handle_http_params__(
+                {"filter{pk.in}": chunk, "page_size": len(chunk)},
+                {"include_fields": include_fields},
+            )
+            r = self.http_get(endpoint=endpoint, params=params)
+            if r is None:
+                raise GeoNodeRestException(
+                    f"getting {self.ENDPOINT_NAME} {chunk[0]}..{chunk[-1]} failed ..."
+                )
+            return r[self.JSON_OBJECT_NAME]
+
+        chunks = [
+            pks[i : i + PK_FILTER_CHUNK_SIZE]
+            for i in range(0, len(pks), PK_FILTER_CHUNK_SIZE)
+        ]
+        objs: List[Dict] = []
+        for chunk_objs in self.__map_concurrent__(fetch_chunk, chunks, concurrency):
+            objs.extend(chunk_objs)
+        return objs
+
     def __parse_pk_string__(self, pk) -> List[int]:
         """
         differentiate between pk range, pk list or single pk
@@ -80,10 +176,19 @@ class GeonodeObjectHandler(GeonodeRest):
                 SystemExit(f"Invalid pk {pk}, is not an integer ...")
             return [int(pk)]
 
-    def cmd_delete(self, pk: str, **kwargs):
-        for _pk in self.__parse_pk_string__(pk):
+    def cmd_delete(self, pk: str, concurrency: int = 1, **kwargs):
+        """
+        delete one or multiple objects
 
-            obj = self.delete(pk=_pk, **kwargs)
+        Args:
+            pk (str): pk of the object, supports single pk, range (e.g. 5-10) or comma-separated list (e.g. 1,2,3)
+            concurrency (int, optional): number of parallel delete requests. Defaults to 1.
+        """
+        pks = self.__parse_pk_string__(pk)
+        objs = self.__map_concurrent__(
+            lambda _pk: self.delete(pk=_pk, **kwargs), pks, concurrency
+        )
+        for _pk, obj in zip(pks, objs):
             if obj is None:
                 logging.warning(f"deleting {_pk} failed ... ")
             else:
@@ -98,6 +203,7 @@ class GeonodeObjectHandler(GeonodeRest):
         pk: str,
         fields: Optional[str] = None,
         json_path: Optional[str] = None,
+        concurrency: int = 1,
         **kwargs,
     ):
         """
@@ -106,6 +212,7 @@ class GeonodeObjectHandler(GeonodeRest):
             pk (str): pk of the object, supports single pk, range (e.g. 5-10) or comma-separated list (e.g. 1,2,3)
             fields (str): string of potential json object
             json_path (str): path to a json file
+            concurrency (int, optional): number of parallel patch requests. Defaults to 1.
 
         Raises:
              ValueError: catches json.decoder.JSONDecodeError and raises ValueError as decoding is not working
@@ -128,8 +235,13 @@ class GeonodeObjectHandler(GeonodeRest):
                 "At least one of 'fields' or 'json_path' must be provided."
             )
 
-        for _pk in self.__parse_pk_string__(pk):
-            obj = self.patch(pk=_pk, json_content=json_content, **kwargs)
+        pks = self.__parse_pk_string__(pk)
+        objs = self.__map_concurrent__(
+            lambda _pk: self.patch(pk=_pk, json_content=json_content, **kwargs),
+            pks,
+            concurrency,
+        )
+        for _pk, obj in zip(pks, objs):
             if obj is None:
                 logging.warning(f"patching {_pk} failed ... ")
             else:
@@ -146,25 +258,50 @@ class GeonodeObjectHandler(GeonodeRest):
         )
         return obj
 
-    def cmd_describe(self, pk: str, **kwargs):
-        for _pk in self.__parse_pk_string__(pk):
-            obj = self.get(pk=_pk, **kwargs)
+    def cmd_describe(self, pk: str, concurrency: int = 1, **kwargs):
+        """
+        show details of one or multiple objects
+
+        Args:
+            pk (str): pk of the object, supports single pk, range (e.g. 5-10) or comma-separated list (e.g. 1,2,3)
+            concurrency (int, optional): number of parallel get requests. Defaults to 1.
+        """
+        pks = self.__parse_pk_string__(pk)
+        objs = self.__map_concurrent__(
+            lambda _pk: self.get(pk=_pk, **kwargs), pks, concurrency
+        )
+        for _pk, obj in zip(pks, objs):
             if obj is None:
                 logging.warning(f"describing {_pk} failed ... ")
             else:
                 print_json(obj)
 
     def get(self, pk: int, **kwargs) -> Optional[Dict]:
-        """get details for a given pk
+        """get details for a given pk. Objects are memoized per session: repeated and concurrent
+        gets of the same pk send one request, writes on the pk drop the memoized object.
 
         Args:
             pk (int): pk of the object
+            include_fields (List[str], optional): only request these fields of the object
 
         Returns:
             Dict: obj details
         """
+        include_fields = kwargs.get("include_fields")
         endpoint = f"{self.ENDPOINT_NAME}/{pk}"
-        r = self.http_get(endpoint=endpoint)
-        if r is None:
-            return None
-        return r[self.SINGULAR_RESOURCE_NAME]
+
+        def fetch() -> Optional[Dict]:
+            if include_fields:
+                params = self.__handle_http_params__(
+                    {}, {"include_fields": include_fields}
+                )
+                r = self.http_get(endpoint=endpoint, params=params)
+            else:
+                r = self.http_get(endpoint=endpoint)
+            if r is None:
+                return None
+            return r[self.SINGULAR_RESOURCE_NAME]
+
+        return self.session.get_memo.get(
+            (self.ENDPOINT_NAME, int(pk), tuple(include_fields or ())), fetch
+        )
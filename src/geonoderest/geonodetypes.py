@@ -22,6 +22,19 @@ class GeonodeCmdOutObjectKey:
         """
         raise NotImplementedError
 
+    @abstractmethod
+    def get_field(self) -> str:
+        """
+        Get the top level field of the api object this key reads from.
+
+        Raises:
+            NotImplementedError: This method is meant to be overridden by subclasses.
+
+        Returns:
+            str: name of the field
+        """
+        raise NotImplementedError
+
 
 @dataclass
 class GeonodeCmdOutListKey(GeonodeCmdOutObjectKey):
@@ -50,6 +63,15 @@ class GeonodeCmdOutListKey(GeonodeCmdOutObjectKey):
             ret = ""
         return ret
 
+    def get_field(self) -> str:
+        """
+        Get the top level field of the api object this key reads from.
+
+        Returns:
+            str: the key itself
+        """
+        return self.key
+
 
 GeonodeCmdOutputKeys: TypeAlias = List[GeonodeCmdOutObjectKey]
 
@@ -82,7 +104,17 @@ class GeonodeCmdOutDictKey(GeonodeCmdOutObjectKey):
             ds = ds[k]
         return ds
 
+    def get_field(self) -> str:
+        """
+        Get the top level field of the api object this key reads from.
+
+        Returns:
+            str: the first key of the nested key list
+        """
+        return self.key[0]
+
 
+GeonodeHTTPFileObj: TypeAlias = Union[io.BufferedReader, io.BytesIO, io.RawIOBase]
 GeonodeHTTPFile: TypeAlias = Tuple[
-    str, Union[Tuple[str, io.BufferedReader], Tuple[str, io.BufferedReader, str]]
+    str, Union[Tuple[str, GeonodeHTTPFileObj], Tuple[str, GeonodeHTTPFileObj, str]]
 ]
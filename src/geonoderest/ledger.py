@@ -0,0 +1,227 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import uuid
+
+DEFAULT_LEDGER_PATH: Path = (
+    Path(os.getenv("XDG_STATE_HOME", Path.home() / ".local" / "state"))
+    / "geonodectl"
+    / "ledger.sqlite"
+)
+HASH_CHUNK_SIZE: int = 1024 * 1024
+DEFAULT_HASH_CONCURRENCY: int = 4
+
+
+class UploadLedger:
+    """
+    Local SQLite ledger of uploaded datasets.
+
+    Maps the content hash of an uploaded file set to the execution request and the resulting
+    dataset pks per GeoNode instance, so unchanged datasets are not transferred again.
+    A journal keeps the transfers which were started but did not return an execution request,
+    so an interrupted upload can be re-attached to the execution request the server created.
+    File digests are cached by path, size and mtime, unchanged files are not read twice.
+    """
+
+    def __init__(self, path: Path = DEFAULT_LEDGER_PATH):
+        """
+        Args:
+            path (Path, optional): sqlite file, created if missing. Defaults to DEFAULT_LEDGER_PATH.
+        """
+        # server urls, file paths and exec ids of this user: owner access only
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        os.close(os.open(path, os.O_RDWR | os.O_CREAT, 0o600))
+        os.chmod(path, 0o600)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS uploads ("
+                "url TEXT NOT NULL, content_hash TEXT NOT NULL, file TEXT NOT NULL, "
+                "exec_id TEXT NOT NULL, pks TEXT, uploaded TEXT NOT NULL, "
+                "PRIMARY KEY (url, content_hash))"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS transfers ("
+                "url TEXT NOT NULL, content_hash TEXT NOT NULL, file TEXT NOT NULL, "
+                "name TEXT NOT NULL, transfer_id TEXT NOT NULL, started TEXT NOT NULL, "
+                "PRIMARY KEY (url, content_hash))"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS file_hashes ("
+                "path TEXT PRIMARY KEY, size INTEGER NOT NULL, "
+                "mtime_ns INTEGER NOT NULL, sha256 TEXT NOT NULL)"
+            )
+
+    def __enter__(self) -> "UploadLedger":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._db.close()
+
+    def hash_file(self, path: Path) -> str:
+        """
+        sha256 of a file, read in chunks. Cached as long as size and mtime do not change.
+        """
+        stat = path.stat()
+        key = str(path.resolve())
+        with self._lock:
+            row = self._db.execute(
+                "SELECT sha256 FROM file_hashes WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (key, stat.st_size, stat.st_mtime_ns),
+            ).fetchone()
+        if row is not None:
+            return row[0]
+
+        digest = hashlib.sha256()
+        with path.open("rb") as f:
+            while chunk := f.read(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+        sha256 = digest.hexdigest()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?)",
+                (key, stat.st_size, stat.st_mtime_ns, sha256),
+            )
+        return sha256
+
+    def hash_file_set(
+        self, paths: List[Path], concurrency: int = DEFAULT_HASH_CONCURRENCY
+    ) -> str:
+        """
+        Content hash of a set of files (e.g. a shapefile and its sidecars), independent of
+        their directory. The files are hashed in parallel, hashlib releases the GIL while hashing.
+
+        Args:
+            paths (List[Path]): files of the dataset
+            concurrency (int, optional): number of files hashed in parallel. Defaults to DEFAULT_HASH_CONCURRENCY.
+
+        Returns:
+            str: sha256 over the names and sha256 digests of the files
+        """
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            digests = list(executor.map(self.hash_file, paths))
+        digest = hashlib.sha256()
+        for name, sha256 in sorted(zip((p.name for p in paths), digests)):
+            digest.update(f"{name}\0{sha256}\n".encode("utf-8"))
+        return digest.hexdigest()
+
+    def lookup(self, url: str, content_hash: str) -> Optional[Dict]:
+        """
+        Returns the ledger entry (file, exec_id, pks, uploaded) of a file set uploaded to url, None if unknown
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT file, exec_id, pks, uploaded FROM uploads WHERE url = ? AND content_hash = ?",
+                (url, content_hash),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "file": row[0],
+            "exec_id": row[1],
+            "pks": json.loads(row[2]) if row[2] is not None else None,
+            "uploaded": row[3],
+        }
+
+    def record(
+        self,
+        url: str,
+        content_hash: str,
+        file: str,
+        exec_id: str,
+        pks: Optional[List[int]] = None,
+    ):
+        """
+        Stores the execution request (and, if known, the resulting pks) of an uploaded file set
+        """
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO uploads VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    content_hash,
+                    file,
+                    exec_id,
+                    json.dumps(pks) if pks is not None else None,
+                    datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                ),
+            )
+
+    def set_pks(self, url: str, content_hash: str, pks: List[int]):
+        """
+        Stores the resulting pks of an entry once its execution request finished
+        """
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE uploads SET pks = ? WHERE url = ? AND content_hash = ?",
+                (json.dumps(pks), url, content_hash),
+            )
+
+    def forget(self, url: str, content_hash: str):
+        """
+        Removes an entry, e.g. when its upload failed on the server
+        """
+        with self._lock, self._db:
+            self._db.execute(
+                "DELETE FROM uploads WHERE url = ? AND content_hash = ?",
+                (url, content_hash),
+            )
+
+    def begin_transfer(self, url: str, content_hash: str, file: str, name: str) -> str:
+        """
+        Journals the start of a transfer, name is the file name the server sees. The returned
+        transfer id is journaled before the request is sent and is sent along with it, so the
+        execution request of this very transfer can be told apart from other uploads of the name.
+
+        Returns:
+            str: unique id of the transfer
+        """
+        transfer_id = uuid.uuid4().hex
+        started = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO transfers VALUES (?, ?, ?, ?, ?, ?)",
+                (url, content_hash, file, name, transfer_id, started),
+            )
+        return transfer_id
+
+    def pending_transfer(self, url: str, content_hash: str) -> Optional[Dict]:
+        """
+        Returns the journaled transfer (file, name, transfer_id, started) of a file set which did not end, None if
+        there is none
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT file, name, transfer_id, started FROM transfers WHERE url = ? AND content_hash = ?",
+                (url, content_hash),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "file": row[0],
+            "name": row[1],
+            "transfer_id": row[2],
+            "started": row[3],
+        }
+
+    def end_transfer(self, url: str, content_hash: str):
+        """
+        Removes a transfer from the journal once its execution request is known or the server
+        answered without one
+        """
+        with self._lock, self._db:
+            self._db.execute(
+                "DELETE FROM transfers WHERE url = ? AND content_hash = ?",
+                (url, content_hash),
+            )
@@ -24,8 +24,6 @@ class GeonodeLinkedResourcesHandler(GeonodeRest):
             print_json(obj)
 
     def add(self, pk: int, linked_to: List[int] = [], **kwargs):
-        linked_resource_obj: Dict = self.get(pk=pk)
-        # target: list = linked_resource_obj["linked_to"] + linked_to
         json_content = {
             "target": list(linked_to),
         }
@@ -1,13 +1,18 @@
 from pathlib import Path
+import copy
 import json
 import logging
+import sys
+import threading
 import uuid
 
 from typing import List, Dict, Optional
 
-from geonoderest.cmdprint import print_json, json_decode_error_handler
+from geonoderest.cmdprint import print_json, show_list, json_decode_error_handler
 from geonoderest.datasets import GeonodeDatasetsHandler
 from geonoderest.resources import GeonodeResourceHandler
+from geonoderest.exceptions import GeoNodeRestException
+from geonoderest.cache import ResponseCache
 from geonoderest.geonodetypes import (
     GeonodeCmdOutListKey,
     GeonodeCmdOutDictKey,
@@ -15,6 +20,11 @@ from geonoderest.geonodetypes import (
 
 OGC_WFS_LINK_TYPE = "OGC:WFS"
 OGC_WCS_LINK_TYPE = "OGC:WCS"
+MAPSTORE_TEMPLATE_PATH = "static/mapstore/configs/map.json"
+
+# mapstore base map configs by url or local path, downloaded once per process
+_map_templates: Dict[str, Dict] = {}
+_map_templates_lock = threading.Lock()
 
 
 class GeonodeMapsHandler(GeonodeResourceHandler):
@@ -31,10 +41,11 @@ class GeonodeMapsHandler(GeonodeResourceHandler):
 
     def cmd_create(
         self,
-        title: Path,
+        title: str,
         fields: Optional[str] = None,
         json_path: Optional[str] = None,
         maplayers: Optional[List[int]] = [],
+        manifest_path: Optional[Path] = None,
         **kwargs,
     ):
         """
@@ -45,10 +56,19 @@ class GeonodeMapsHandler(GeonodeResourceHandler):
             fields (str): string of potential json object
             json_path (str): path to a json file
             maplayers (List[int], optional): list of maplayer pks. Defaults to [].
+            manifest_path (Path, optional): jsonl manifest, creates one map per line instead
 
         Raises:
             Json.decoder.JSONDecodeError: when decoding is not working
         """
+        if manifest_path is not None:
+            if maplayers:
+                raise SystemExit(
+                    "--maplayers cannot be combined with --from, list the maplayers of each map in the manifest ..."
+                )
+            self.__cmd_create_from_manifest__(manifest_path, **kwargs)
+            return
+
         json_content = None
         if json_path:
             with open(json_path, "r") as file:
@@ -67,14 +87,91 @@ class GeonodeMapsHandler(GeonodeResourceHandler):
         )
         print_json(obj)
 
-    def __build_blob_data__(self):
+    def __cmd_create_from_manifest__(
+        self,
+        manifest_path: Path,
+        map_template: Optional[Path] = None,
+        concurrency: int = 1,
+        **kwargs,
+    ):
+        """create the maps of a manifest and show a summary per map
 
-        # download map template from mapstore config statics of remote geonode instance
-        geonode_base_url = self.gn_credentials.get_geonode_base_url()
-        blob = self.http_get_download(
-            f"{geonode_base_url}/static/mapstore/configs/map.json"
+        Args:
+            manifest_path (Path): jsonl manifest, see __read_manifest__
+            map_template (Path, optional): local mapstore map config used as base of the blobs
+            concurrency (int, optional): number of parallel requests. Defaults to 1.
+        """
+        results = self.create_from_manifest(
+            manifest_path, map_template=map_template, concurrency=concurrency
         )
-        blob = blob.json()
+        if kwargs.get("json"):
+            print_json(results)
+        else:
+            show_list(
+                values=[[r["line"], r["title"], r["pk"], r["status"]] for r in results],
+                headers=["line", "title", "pk", "status"],
+            )
+        failed = sum(1 for r in results if r["status"] == "failed")
+        if failed:
+            logging.error(f"{failed} of {len(results)} maps failed ...")
+            sys.exit(1)
+
+    def __map_template__(self, map_template: Optional[Path] = None) -> Dict:
+        """
+        Internal method returning a copy of the mapstore base map config.
+
+        The config is downloaded from the mapstore statics of the geonode instance once per
+        process and kept in memory. On disk it is kept in the response cache of the session, or
+        in the default response cache if none is configured, and revalidated by ETag / Last-Modified.
+
+        Args:
+            map_template (Path, optional): local map config to use instead, no request is sent
+
+        Raises:
+            GeoNodeRestException: if the download of the map config failed
+
+        Returns:
+            Dict: map config
+        """
+        if map_template is not None:
+            key = str(map_template.resolve())
+        else:
+            geonode_base_url = self.gn_credentials.get_geonode_base_url()
+            key = f"{geonode_base_url}/{MAPSTORE_TEMPLATE_PATH}"
+
+        with _map_templates_lock:
+            cached = _map_templates.get(key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        template: Dict = {}
+        if map_template is not None:
+            with map_template.open("r") as file:
+                try:
+                    template = json.load(file)
+                except json.decoder.JSONDecodeError as E:
+                    json_decode_error_handler(str(map_template), E)
+        else:
+            cache = self.session.response_cache
+            template_cache = cache if cache is not None else ResponseCache()
+            try:
+                r = self.http_get_download(key, cache=template_cache)
+            finally:
+                if cache is None:
+                    template_cache.close()
+            if r is None:
+                raise GeoNodeRestException(
+                    f"downloading the map template {key} failed ..."
+                )
+            template = r.json()
+        with _map_templates_lock:
+            _map_templates[key] = template
+        return copy.deepcopy(template)
+
+    def __build_blob_data__(self, map_template: Optional[Path] = None):
+
+        # map template from mapstore config statics of remote geonode instance
+        blob = self.__map_template__(map_template)
 
         mapnik_layer = {
             "id": "mapnik__0",
@@ -223,11 +320,47 @@ class GeonodeMapsHandler(GeonodeResourceHandler):
         }
         return blob_layer
 
+    @staticmethod
+    def __fetch_maplayer_datasets__(
+        datasets_handler: GeonodeDatasetsHandler,
+        maplayers: List[int],
+        concurrency: int = 1,
+    ) -> Dict[int, Dict]:
+        """
+        Internal method fetching the datasets of maplayers with filter{pk.in} listing requests
+        (chunked, see GeonodeObjectHandler.list_by_pks) instead of one GET per maplayer.
+
+        Args:
+            datasets_handler (GeonodeDatasetsHandler): handler used for the listing requests
+            maplayers (List[int]): dataset pks, may contain duplicates
+            concurrency (int, optional): number of listing requests sent in parallel. Defaults to 1.
+
+        Raises:
+            GeoNodeRestException: if datasets of maplayers do not exist
+
+        Returns:
+            Dict[int, Dict]: datasets by pk
+        """
+        pks = list(dict.fromkeys(int(pk) for pk in maplayers))
+        if not pks:
+            return {}
+        datasets = {
+            int(ds["pk"]): ds
+            for ds in datasets_handler.list_by_pks(pks, concurrency=concurrency)
+        }
+        missing = [pk for pk in pks if pk not in datasets]
+        if missing:
+            raise GeoNodeRestException(
+                f"maplayers not found, no datasets with pk {', '.join(str(pk) for pk in missing)} ..."
+            )
+        return datasets
+
     def create(
         self,
-        title: Path,
+        title: str,
         json_content: Optional[Dict] = None,
         maplayers: Optional[List[int]] = [],
+        map_template: Optional[Path] = None,
         **kwargs,
     ) -> Optional[Dict]:
         """
@@ -237,15 +370,54 @@ class GeonodeMapsHandler(GeonodeResourceHandler):
             title (str): title of the new object
             json_content (dict) dict object with addition metadata / fields
             maplayers (List[int], optional): list of maplayer pks. Defaults to [].
+            map_template (Path, optional): local mapstore map config used as base of the blob.
+                                           Defaults to the config of the geonode instance.
 
         Raises:
             Json.decoder.JSONDecodeError: when decoding is not working
         """
         # initialize Dataset Handler, required for map.blob.layer and api.map.maplayer building
-        gnDatasetsHandler = GeonodeDatasetsHandler(self.gn_credentials)
+        gnDatasetsHandler = GeonodeDatasetsHandler(
+            self.gn_credentials, session=self.session
+        )
+
+        # get the datasets of all maplayers with batched listing requests
+        datasets = self.__fetch_maplayer_datasets__(
+            gnDatasetsHandler, maplayers or [], kwargs.get("concurrency", 1)
+        )
+
+        json_content = self.__build_map_json__(
+            title=title,
+            json_content=json_content,
+            maplayers=maplayers,
+            datasets=datasets,
+            map_template=map_template,
+        )
+        return self.__post_map__(json_content)
 
+    def __build_map_json__(
+        self,
+        title: str,
+        json_content: Optional[Dict],
+        maplayers: Optional[List[int]],
+        datasets: Dict[int, Dict],
+        map_template: Optional[Path] = None,
+    ) -> Dict:
+        """
+        Internal method building the json of a new map: blob with one layer per maplayer and the api maplayers.
+
+        Args:
+            title (str): title of the new map
+            json_content (Dict, optional): additional metadata / fields, override the built ones
+            maplayers (List[int], optional): maplayer pks, in layer order
+            datasets (Dict[int, Dict]): datasets by pk, must contain all maplayers
+            map_template (Path, optional): local mapstore map config used as base of the blob
+
+        Returns:
+            Dict: json to post to the maps endpoint
+        """
         # init map blob
-        blob = self.__build_blob_data__()
+        blob = self.__build_blob_data__(map_template=map_template)
 
         # init maplayer list
         maplayers_list = []
@@ -254,8 +426,8 @@ class GeonodeMapsHandler(GeonodeResourceHandler):
         if maplayers is not None:
             for maplayer_pk in maplayers:
 
-                # get dataset of maplayer pk
-                dataset = gnDatasetsHandler.get(pk=maplayer_pk)
+                # dataset of maplayer pk
+                dataset = datasets[int(maplayer_pk)]
 
                 # uuid to connect blob layer with api.maplayer
                 maplayer_uuid = str(uuid.uuid4())
@@ -299,10 +471,14 @@ class GeonodeMapsHandler(GeonodeResourceHandler):
             "maplayers": maplayers_list,
         }
 
-        json_content = (
+        return (
             {**base_json_content, **json_content} if json_content else base_json_content
         )
 
+    def __post_map__(self, json_content: Dict) -> Optional[Dict]:
+        """
+        Internal method posting a map built by __build_map_json__, returns the created map
+        """
         r = self.http_post(
             endpoint=self.ENDPOINT_NAME,
             json=json_content,
@@ -310,3 +486,102 @@ class GeonodeMapsHandler(GeonodeResourceHandler):
         if r is None:
             return None
         return r[self.SINGULAR_RESOURCE_NAME]
+
+    @staticmethod
+    def __read_manifest__(manifest_path: Path) -> List[Dict]:
+        """
+        Internal method reading a map manifest: one json object per line with title, optional
+        maplayers (list of dataset pks) and any further map fields. Empty lines are skipped.
+
+        Raises:
+            SystemExit: if a line is no json object with a title
+
+        Returns:
+            List[Dict]: entries with title, maplayers, json_content (further fields) and line number
+        """
+        entries: List[Dict] = []
+        with manifest_path.open("r") as file:
+            for line_number, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    obj = json.loads(line)
+                except json.decoder.JSONDecodeError as E:
+                    json_decode_error_handler(f"{manifest_path}:{line_number}", E)
+                if not isinstance(obj, dict) or "title" not in obj:
+                    raise SystemExit(
+                        f"{manifest_path}:{line_number}: map without title ..."
+                    )
+                fields = {
+                    k: v for k, v in obj.items() if k not in ("title", "maplayers")
+                }
+                entries.append(
+                    {
+                        "line": line_number,
+                        "title": obj["title"],
+                        "maplayers": [int(pk) for pk in obj.get("maplayers") or []],
+                        "json_content": fields or None,
+                    }
+                )
+        return entries
+
+    def create_from_manifest(
+        self,
+        manifest_path: Path,
+        map_template: Optional[Path] = None,
+        concurrency: int = 1,
+    ) -> List[Dict]:
+        """
+        creates one map per line of a manifest (see __read_manifest__)
+
+        The union of the maplayers of all maps is fetched once with batched listing requests,
+        the map template once per process. The maps are posted on concurrency parallel workers.
+
+        Args:
+            manifest_path (Path): jsonl manifest
+            map_template (Path, optional): local mapstore map config used as base of the blobs
+            concurrency (int, optional): number of parallel requests. Defaults to 1.
+
+        Raises:
+            GeoNodeRestException: if the map template cannot be downloaded or datasets of maplayers do
+                                  not exist, before any map is created
+
+        Returns:
+            List[Dict]: per manifest line: line, title, pk of the created map (None if it failed) and status
+        """
+        entries = self.__read_manifest__(manifest_path)
+        # resolve the template before the workers start: one download, and a broken template
+        # fails the whole manifest instead of every map on its own
+        self.__map_template__(map_template)
+        datasets = self.__fetch_maplayer_datasets__(
+            GeonodeDatasetsHandler(self.gn_credentials, session=self.session),
+            [pk for entry in entries for pk in entry["maplayers"]],
+            concurrency,
+        )
+
+        def _create(entry: Dict) -> Dict:
+            result: Dict = {
+                "line": entry["line"],
+                "title": entry["title"],
+                "pk": None,
+                "status": "failed",
+            }
+            try:
+                obj = self.__post_map__(
+                    self.__build_map_json__(
+                        title=entry["title"],
+                        json_content=entry["json_content"],
+                        maplayers=entry["maplayers"],
+                        datasets=datasets,
+                        map_template=map_template,
+                    )
+                )
+            except GeoNodeRestException as err:
+                logging.error(f"creating map {entry['title']} failed: {err} ...")
+                return result
+            if obj is not None:
+                result["pk"] = obj.get("pk")
+                result["status"] = "created"
+            return result
+
+        return list(self.__map_concurrent__(_create, entries, concurrency))
@@ -0,0 +1,69 @@
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional, Tuple
+import copy
+import threading
+
+# memo key: (endpoint name, pk, requested fields)
+MemoKey = Tuple[str, int, Tuple[str, ...]]
+
+
+class GetMemo:
+    """
+    In-process memo of object GETs, shared by all handlers of a session.
+
+    The first get of a key fetches the object, concurrent gets of the same key wait for that
+    request instead of sending their own. Failed fetches are not memoized. Writes on a pk drop
+    its entries, see invalidate(). Callers receive copies, so they may modify the objects.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[MemoKey, Future] = {}
+
+    def get(self, key: MemoKey, fetch: Callable[[], Optional[Dict]]) -> Optional[Dict]:
+        """
+        Returns the memoized object of key, calling fetch once if it is unknown.
+
+        Args:
+            key (MemoKey): (endpoint name, pk, requested fields)
+            fetch (Callable[[], Optional[Dict]]): requests the object, returns None on failure
+
+        Returns:
+            Optional[Dict]: copy of the object, None if fetch failed
+        """
+        with self._lock:
+            future = self._entries.get(key)
+            owner = future is None
+            if future is None:
+                future = Future()
+                self._entries[key] = future
+
+        if owner:
+            try:
+                obj = fetch()
+            except BaseException as err:
+                self.__discard__(key, future)
+                future.set_exception(err)
+                raise
+            if obj is None:
+                self.__discard__(key, future)
+            future.set_result(obj)
+        else:
+            obj = future.result()
+        return copy.deepcopy(obj)
+
+    def __discard__(self, key: MemoKey, future: Future):
+        """
+        Internal method removing the entry of key, unless it was replaced meanwhile.
+        """
+        with self._lock:
+            if self._entries.get(key) is future:
+                del self._entries[key]
+
+    def invalidate(self, pk: int):
+        """
+        Drops the entries of pk under all endpoint names (resources/5 and datasets/5 are the same object).
+        """
+        with self._lock:
+            for key in [k for k in self._entries if k[1] == pk]:
+                del self._entries[key]
@@ -0,0 +1,349 @@
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    Generator,
+    List,
+    Optional,
+    Union,
+)
+import io
+import mimetypes
+import mmap
+import os
+import uuid
+import zipfile
+
+from geonoderest.geonodetypes import GeonodeHTTPFile
+
+DEFAULT_CHUNK_SIZE: int = 1024 * 1024
+# deflate level of zip archives, fixed so the size pass and the sent archive match
+ZIP_DEFLATE_LEVEL: int = 6
+
+
+def __quote_header_param__(value: str) -> str:
+    """quote a multipart header parameter value the way browsers (HTML5) do"""
+    return value.replace('"', "%22").replace("\r", "%0D").replace("\n", "%0A")
+
+
+class _FileSource:
+    """
+    Reads an open file in chunks from its current position.
+
+    Regular files are memory mapped, so only the pages currently on the wire are held in
+    memory. Other file like objects (pipes, BytesIO, ...) are read with read(size).
+    """
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self._mmap: Optional[mmap.mmap] = None
+        self._pos = 0
+        try:
+            fileno = fileobj.fileno()
+            start = fileobj.tell()
+            size = os.fstat(fileno).st_size - start
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            start = fileobj.tell()
+            size = fileobj.seek(0, os.SEEK_END) - start
+            fileobj.seek(start)
+        else:
+            if size > 0:
+                self._mmap = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+                self._pos = start
+        self.size = size
+        self._end = self._pos + size
+
+    def read(self, size: int) -> bytes:
+        if self._mmap is None:
+            return self.fileobj.read(size)
+        chunk = self._mmap[self._pos : min(self._pos + size, self._end)]
+        self._pos += len(chunk)
+        return chunk
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+        self.fileobj.close()
+
+
+class _WriteBuffer(io.RawIOBase):
+    """unseekable sink collecting the bytes written by zipfile until they are drained"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ZipArchive:
+    """
+    Description of a zip archive of files: the files, their compression and the exact archive size.
+
+    The archive itself is only generated while it is read, see open(). Every ZipStream opened on
+    the same ZipArchive yields the same bytes, so one description can back several upload fields.
+    """
+
+    def __init__(self, paths: List[Path], compression: int = zipfile.ZIP_STORED):
+        """
+        Args:
+            paths (List[Path]): files to add to the archive, stored by their name
+            compression (int, optional): zipfile.ZIP_STORED or zipfile.ZIP_DEFLATED. Defaults to ZIP_STORED.
+        """
+        self.paths = paths
+        self.compression = compression
+        self._size: Optional[int] = None
+
+    @property
+    def size(self) -> int:
+        """
+        Exact size of the archive. Stored archives are computed from the file sizes, deflated ones
+        with a dry pass which compresses the files and only counts the bytes. Computed once.
+        """
+        if self._size is None:
+            if self.compression == zipfile.ZIP_STORED:
+                self._size = self.__stored_size__(self.paths)
+            else:
+                self._size = sum(len(chunk) for chunk in self.__generate__())
+        return self._size
+
+    def open(self) -> "ZipStream":
+        """returns a new stream generating the archive"""
+        return ZipStream(self)
+
+    @staticmethod
+    def __stored_size__(paths: List[Path]) -> int:
+        """
+        Internal method computing the exact size of the stored (uncompressed) archive zipfile writes
+        to an unseekable stream: local headers with data descriptors, central directory and end
+        records, with the zip64 extensions zipfile adds for large files and offsets.
+        """
+        offset = 0
+        central_directory = 0
+        for path in paths:
+            try:
+                name_length = len(path.name.encode("ascii"))
+            except UnicodeEncodeError:
+                name_length = len(path.name.encode("utf-8"))
+            file_size = path.stat().st_size
+            zip64 = file_size * 1.05 > zipfile.ZIP64_LIMIT
+            header_offset = offset
+            # local header (+ zip64 extra), data, data descriptor
+            offset += 30 + name_length + (20 if zip64 else 0)
+            offset += file_size + (24 if zip64 else 16)
+            zip64_fields = (2 if file_size > zipfile.ZIP64_LIMIT else 0) + (
+                1 if header_offset > zipfile.ZIP64_LIMIT else 0
+            )
+            central_directory += 46 + name_length
+            if zip64_fields:
+                central_directory += 4 + 8 * zip64_fields
+        end_records = 22
+        if (
+            len(paths) > zipfile.ZIP_FILECOUNT_LIMIT
+            or offset > zipfile.ZIP64_LIMIT
+            or central_directory > zipfile.ZIP64_LIMIT
+        ):
+            # zip64 end of central directory record and locator
+            end_records += 56 + 20
+        return offset + central_directory + end_records
+
+    def __generate__(self) -> Generator[bytes, None, None]:
+        """
+        Internal method yielding the archive in chunks. The fixed compression level makes every
+        pass over unchanged files yield the same bytes.
+        """
+        sink = _WriteBuffer()
+        with zipfile.ZipFile(
+            sink,
+            "w",
+            compression=self.compression,
+            compresslevel=ZIP_DEFLATE_LEVEL,
+        ) as archive:
+            for path in self.paths:
+                info = zipfile.ZipInfo.from_file(path, path.name)
+                info.compress_type = self.compression
+                with path.open("rb") as src, archive.open(info, "w") as dst:
+                    while chunk := src.read(DEFAULT_CHUNK_SIZE):
+                        dst.write(chunk)
+                        yield sink.drain()
+                yield sink.drain()
+        yield sink.drain()
+
+
+class ZipStream(io.RawIOBase):
+    """
+    Zip archive of files, generated while it is read.
+
+    Neither a temporary file nor the whole archive is created: read(size) compresses (or stores)
+    the next chunks of the source files.
+    """
+
+    def __init__(self, archive: ZipArchive):
+        """
+        Args:
+            archive (ZipArchive): files and compression of the archive
+        """
+        super().__init__()
+        self.archive = archive
+        self._chunks = archive.__generate__()
+        self._pending = b""
+        self._produced = 0
+
+    @property
+    def size(self) -> int:
+        return self.archive.size
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        if size is None or size < 0:
+            size = DEFAULT_CHUNK_SIZE
+        while len(self._pending) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._pending += chunk
+        chunk, self._pending = self._pending[:size], self._pending[size:]
+        self._produced += len(chunk)
+        if not chunk and self._produced != self.size:
+            # the body was announced with this size, the files changed while they were sent
+            raise IOError(
+                f"zip archive has {self._produced} bytes instead of {self.size}, "
+                "the files changed while they were sent ..."
+            )
+        return chunk
+
+    def close(self):
+        self._chunks.close()
+        super().close()
+
+
+class MultipartEncoder:
+    """
+    Streaming multipart/form-data request body.
+
+    Unlike requests' files=..., which builds the complete body in memory, the body is
+    generated while it is sent: read(size) returns the next bytes of the body and file
+    contents are read chunk by chunk. The exact body length is known upfront, so the
+    request is sent with a correct Content-Length header, ZipStream parts included.
+    """
+
+    def __init__(
+        self,
+        fields: Optional[Dict] = None,
+        files: Optional[List[GeonodeHTTPFile]] = None,
+        boundary: Optional[str] = None,
+        callback: Optional[Callable[[int], None]] = None,
+    ):
+        """
+        Args:
+            fields (Dict, optional): form fields, values are sent as str like requests does
+            files (List[GeonodeHTTPFile], optional): file parts (field name, (filename, fileobj[, content type]))
+            boundary (str, optional): multipart boundary. Defaults to a random uuid.
+            callback (Callable[[int], None], optional): called with the number of bytes returned by
+                                                        every read, 0 once the body is exhausted.
+        """
+        self.boundary = boundary or uuid.uuid4().hex
+        self.callback = callback
+        self._parts: List[Union[bytes, _FileSource, ZipStream]] = []
+
+        for name, value in (fields or {}).items():
+            values = value if isinstance(value, (list, tuple)) else [value]
+            for v in values:
+                if not isinstance(v, bytes):
+                    v = str(v).encode("utf-8")
+                self._parts.append(
+                    self.__part_header__(name) + v + b"\r\n",
+                )
+
+        for name, file_tuple in files or []:
+            filename, fileobj = file_tuple[0], file_tuple[1]
+            content_type = (
+                file_tuple[2]  # type: ignore[misc]
+                if len(file_tuple) > 2
+                else mimetypes.guess_type(filename)[0] or "application/octet-stream"
+            )
+            source: Union[_FileSource, ZipStream] = (
+                fileobj if isinstance(fileobj, ZipStream) else _FileSource(fileobj)
+            )
+            self._parts.append(self.__part_header__(name, filename, content_type))
+            self._parts.append(source)
+            self._parts.append(b"\r\n")
+        self._parts.append(f"--{self.boundary}--\r\n".encode("utf-8"))
+
+        self._index = 0
+        self._buffer = b""
+
+    def __part_header__(
+        self,
+        name: str,
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None,
+    ) -> bytes:
+        disposition = f'form-data; name="{__quote_header_param__(name)}"'
+        if filename is not None:
+            disposition += f'; filename="{__quote_header_param__(filename)}"'
+        header = f"--{self.boundary}\r\nContent-Disposition: {disposition}\r\n"
+        if content_type is not None:
+            header += f"Content-Type: {content_type}\r\n"
+        return (header + "\r\n").encode("utf-8")
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    @property
+    def length(self) -> int:
+        """exact length of the body"""
+        return sum(
+            len(part) if isinstance(part, bytes) else part.size for part in self._parts
+        )
+
+    def __len__(self) -> int:
+        return self.length
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Returns the next (at most size) bytes of the body, b"" when the body is exhausted.
+        A negative size returns the next DEFAULT_CHUNK_SIZE bytes, never the whole body.
+        """
+        if size is None or size < 0:
+            size = DEFAULT_CHUNK_SIZE
+        chunks = []
+        remaining = size
+        while remaining > 0 and self._index < len(self._parts):
+            part = self._parts[self._index]
+            if isinstance(part, bytes):
+                if not self._buffer:
+                    self._buffer = part
+                chunk, self._buffer = self._buffer[:remaining], self._buffer[remaining:]
+                if not self._buffer:
+                    self._index += 1
+            else:
+                chunk = part.read(remaining)
+                if not chunk:
+                    self._index += 1
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        body = b"".join(chunks)
+        if self.callback is not None:
+            self.callback(len(body))
+        return body
+
+    def close(self):
+        """
+        Closes the memory maps, file objects and zip streams of all file parts.
+        """
+        for part in self._parts:
+            if not isinstance(part, bytes):
+                part.close()
@@ -0,0 +1,145 @@
+from typing import Optional, TextIO
+import json
+import sys
+import threading
+import time
+
+PROGRESS_FORMATS = ["bar", "json"]
+MB: int = 1024 * 1024
+
+
+def __format_duration__(seconds: float) -> str:
+    """format seconds as h:mm:ss"""
+    seconds = int(round(seconds))
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+class UploadProgress:
+    """
+    Reports the progress of an upload stream: bytes sent, throughput and ETA while sending,
+    transfer and server processing time (last byte sent until response) at the end.
+
+    Reports are written to stderr, either as a single updating status line (format "bar")
+    or as one json object per line (format "json") for machine consumption.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        format: str = "bar",
+        interval: float = 0.5,
+        stream: Optional[TextIO] = None,
+    ):
+        """
+        Args:
+            name (str): name of the uploaded file, shown in every report
+            format (str, optional): one of PROGRESS_FORMATS. Defaults to "bar".
+            interval (float, optional): min seconds between two progress reports. Defaults to 0.5.
+            stream (TextIO, optional): where to write the reports. Defaults to sys.stderr.
+        """
+        if format not in PROGRESS_FORMATS:
+            raise ValueError(f"unsupported progress format: {format} ...")
+        self.name = name
+        self.format = format
+        self.interval = interval
+        self.stream = stream if stream is not None else sys.stderr
+        self.total = 0
+        self.bytes_sent = 0
+        self.started: Optional[float] = None
+        self.transfer_finished: Optional[float] = None
+        self._last_report = 0.0
+        self._lock = threading.Lock()
+
+    def start(self, total: int):
+        """
+        Start measuring a transfer of total bytes, 0 if the size is unknown.
+        """
+        self.total = total
+        self.bytes_sent = 0
+        self.started = time.monotonic()
+        self.transfer_finished = None
+        self.__report__("start")
+
+    def update(self, n_bytes: int):
+        """
+        Account n_bytes handed to the connection. Used as read callback of the upload stream.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.started is None:
+                self.started = now
+            self.bytes_sent += n_bytes
+            if self.transfer_finished is not None:
+                return
+            if n_bytes == 0 or self.bytes_sent >= self.total > 0:
+                self.transfer_finished = now
+                self.__report__("sent")
+            elif now - self._last_report >= self.interval:
+                self.__report__("progress")
+
+    def finish(self, success: bool = True):
+        """
+        Report the end of the request, after the server response arrived.
+
+        Args:
+            success (bool, optional): if the server accepted the upload. Defaults to True.
+        """
+        with self._lock:
+            if self.transfer_finished is None:
+                self.transfer_finished = time.monotonic()
+            self.__report__("done" if success else "failed")
+
+    def __stats__(self) -> dict:
+        now = time.monotonic()
+        started = self.started if self.started is not None else now
+        transfer_end = (
+            self.transfer_finished if self.transfer_finished is not None else now
+        )
+        elapsed = max(transfer_end - started, 1e-9)
+        rate = self.bytes_sent / elapsed
+        eta = (self.total - self.bytes_sent) / rate if rate > 0 and self.total else None
+        return {
+            "file": self.name,
+            "bytes_sent": self.bytes_sent,
+            "total_bytes": self.total,
+            "elapsed_s": round(elapsed, 3),
+            "rate_bps": round(rate, 1),
+            "eta_s": round(eta, 1) if eta is not None else None,
+            "server_processing_s": (
+                round(now - self.transfer_finished, 3)
+                if self.transfer_finished is not None
+                else None
+            ),
+        }
+
+    def __report__(self, event: str):
+        self._last_report = time.monotonic()
+        stats = self.__stats__()
+        if self.format == "json":
+            self.stream.write(json.dumps({"event": event, **stats}) + "\n")
+            self.stream.flush()
+            return
+
+        if event in ("done", "failed"):
+            self.stream.write(
+                f"\r{self.name}: {'uploaded' if event == 'done' else 'upload failed after'} "
+                f"{stats['bytes_sent'] / MB:.1f} MB in {__format_duration__(stats['elapsed_s'])} "
+                f"({stats['rate_bps'] / MB:.2f} MB/s), "
+                f"server processing {stats['server_processing_s']:.1f}s\n"
+            )
+        else:
+            eta = (
+                __format_duration__(stats["eta_s"])
+                if stats["eta_s"] is not None
+                else "-:--:--"
+            )
+            sent = (
+                f"{self.bytes_sent / MB:.1f}/{self.total / MB:.1f} MB "
+                f"({100 * self.bytes_sent / self.total:.0f}%)"
+                if self.total
+                else f"{self.bytes_sent / MB:.1f} MB"
+            )
+            self.stream.write(
+                f"\r{self.name}: {sent} {stats['rate_bps'] / MB:.2f} MB/s ETA {eta}"
+            )
+        self.stream.flush()
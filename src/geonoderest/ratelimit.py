@@ -0,0 +1,191 @@
+from typing import Optional
+import threading
+import time
+
+# responses that signal an overloaded server
+OVERLOAD_STATUS_CODES: frozenset = frozenset({429, 503})
+# weights of a new latency in the recent and the (slowly moving) baseline latency average
+RECENT_LATENCY_WEIGHT: float = 0.3
+BASELINE_LATENCY_WEIGHT: float = 0.02
+# binary unit suffixes of bandwidth limits, e.g. 512K or 2M bytes per second
+BYTE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+
+
+def __parse_bytes__(value: str, what: str) -> float:
+    """
+    Internal function parsing a non negative number of bytes with an optional K, M or G suffix.
+
+    Raises:
+        ValueError: if value is not a non negative number with a known unit, what names the value
+    """
+    value = value.strip().upper()
+    if value.endswith("B"):
+        value = value[:-1]
+    unit = value[-1:] if value[-1:] in BYTE_UNITS else ""
+    amount = float(value[: len(value) - len(unit)]) * BYTE_UNITS[unit]
+    if amount < 0:
+        raise ValueError(f"{what} must be >= 0, got {value} ...")
+    return amount
+
+
+def parse_rate(value: str) -> float:
+    """
+    Parses a bandwidth limit in bytes per second with an optional K, M or G suffix (binary units).
+
+    Args:
+        value (str): e.g. "500000", "512K", "2M", "1.5G"
+
+    Raises:
+        ValueError: if value is not a non negative number with a known unit
+
+    Returns:
+        float: bytes per second
+    """
+    return __parse_bytes__(value, "bandwidth limit")
+
+
+def parse_size(value: str) -> int:
+    """
+    Parses a size in bytes with an optional K, M or G suffix (binary units).
+
+    Args:
+        value (str): e.g. "500000", "512K", "64M", "1.5G"
+
+    Raises:
+        ValueError: if value is not a non negative number with a known unit
+
+    Returns:
+        int: bytes, fractions of a byte are dropped
+    """
+    return int(__parse_bytes__(value, "size"))
+
+
+class TokenBucket:
+    """
+    Thread safe token bucket pacer.
+
+    Tokens are refilled at a constant rate up to capacity. Callers reserve tokens and sleep
+    until their reservation is covered, so concurrent callers are paced in order and a request
+    for more tokens than the capacity is still served at the configured rate.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate (float): tokens refilled per second, must be > 0
+            capacity (float, optional): max tokens to accumulate (burst). Defaults to rate, at least 1.
+        """
+        if rate <= 0:
+            raise ValueError(f"token bucket rate must be > 0, got {rate} ...")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        """
+        Take tokens from the bucket, blocking until they are available.
+
+        Args:
+            tokens (float, optional): number of tokens to take. Defaults to 1.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._last) * self.rate
+            )
+            self._last = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD limit of requests in flight.
+
+    The limit grows additively (+1 per limit successful requests) up to max_limit and shrinks
+    multiplicatively on overload: 429/503 responses and timeouts. Optionally the limit also
+    shrinks when the recent latency (a fast moving average) rises above latency_tolerance times
+    the baseline latency (a slow moving average, so it follows lasting changes of the server).
+    Single slow requests do not count as congestion.
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        min_limit: int = 1,
+        backoff_ratio: float = 0.5,
+        latency_tolerance: float = 0.0,
+    ):
+        """
+        Args:
+            max_limit (int): upper bound of requests in flight
+            min_limit (int, optional): lower bound of requests in flight. Defaults to 1.
+            backoff_ratio (float, optional): factor applied to the limit on overload. Defaults to 0.5.
+            latency_tolerance (float, optional): increase of the recent latency relative to the baseline
+                                                 which is treated as congestion, e.g. 2.0. Defaults to 0,
+                                                 only 429/503 and timeouts shrink the limit.
+        """
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.limit: float = float(self.max_limit)
+        self.in_flight = 0
+        self.recent_latency: Optional[float] = None
+        self.baseline_latency: Optional[float] = None
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """
+        Wait for a free slot and occupy it.
+        """
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def __is_congested__(self, latency: float) -> bool:
+        """
+        Internal method updating the latency averages, True if the recent latency exceeds
+        latency_tolerance times the baseline. Must be called with the lock held.
+        """
+        if self.recent_latency is None or self.baseline_latency is None:
+            self.recent_latency = self.baseline_latency = latency
+            return False
+        self.recent_latency += RECENT_LATENCY_WEIGHT * (latency - self.recent_latency)
+        self.baseline_latency += BASELINE_LATENCY_WEIGHT * (
+            latency - self.baseline_latency
+        )
+        return (
+            self.latency_tolerance > 0
+            and self.recent_latency > self.latency_tolerance * self.baseline_latency
+        )
+
+    def release(
+        self,
+        latency: Optional[float] = None,
+        status_code: Optional[int] = None,
+        timed_out: bool = False,
+    ):
+        """
+        Free a slot and adapt the limit to the outcome of the request.
+
+        Args:
+            latency (float, optional): seconds the request took, None if it failed without response
+            status_code (int, optional): http status of the response
+            timed_out (bool, optional): the request failed with a timeout. Defaults to False.
+        """
+        with self._cond:
+            self.in_flight -= 1
+            if timed_out or status_code in OVERLOAD_STATUS_CODES:
+                self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+            elif latency is not None:
+                if self.__is_congested__(latency):
+                    self.limit = max(self.min_limit, self.limit * 0.9)
+                else:
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._cond.notify_all()
@@ -1,10 +1,18 @@
-from typing import List
+from pathlib import Path
+from typing import List, Optional, Tuple
 import requests
 import logging
+import sys
 
 from geonoderest.geonodeobject import GeonodeObjectHandler
 from geonoderest.geonodetypes import GeonodeCmdOutListKey, GeonodeCmdOutDictKey
 from geonoderest.exceptions import GeoNodeRestException
+from geonoderest.archive import (
+    ARCHIVE_COMPRESSIONS,
+    archive_compression,
+    open_archive,
+    add_bytes,
+)
 
 SUPPORTED_METADATA_TYPES: List[str] = [
     "Atom",
@@ -19,6 +27,7 @@ DEFAULT_METADATA_TYPE: str = "ISO"
 class GeonodeResourceHandler(GeonodeObjectHandler):
     ENDPOINT_NAME = JSON_OBJECT_NAME = "resources"
     SINGULAR_RESOURCE_NAME = "resource"
+    PROJECT_LIST_FIELDS = True
 
     LIST_CMDOUT_HEADER = [
         GeonodeCmdOutListKey(key="pk"),
@@ -33,19 +42,141 @@ class GeonodeResourceHandler(GeonodeObjectHandler):
         return self.http_delete(endpoint=f"resources/{pk}/delete")
 
     def cmd_metadata(
-        self, pk: int, metadata_type: str = DEFAULT_METADATA_TYPE, **kwargs
+        self,
+        pk: Optional[str] = None,
+        metadata_type: str = DEFAULT_METADATA_TYPE,
+        out_path: Optional[Path] = None,
+        resume: bool = False,
+        pk_range: Optional[str] = None,
+        metadata_types: Optional[List[str]] = None,
+        concurrency: int = 1,
+        **kwargs,
     ):
-        """show metadata on cmdline
+        """stream metadata to the cmdline or into a file. Metadata of multiple resources or
+        types is exported into a (compressed) tar archive, see export_metadata()
 
         Args:
-            pk (int): pk id of the resource to get the metadata from
+            pk (str, optional): pk of the resource, or pks as range '1-5' or list '1,2,3'
             metadata_type (str, optional): metadatatype to get metadata in. Must be in SUPPORTED_METADATA_TYPES
+            out_path (Path, optional): file to write the metadata to. Defaults to stdout.
+            resume (bool, optional): continue an interrupted download of out_path
+            pk_range (str, optional): same as pk, for --pk
+            metadata_types (List[str], optional): metadatatypes to export, overrides metadata_type
+            concurrency (int, optional): number of parallel requests of an export. Defaults to 1.
         """
-        r = self.metadata(pk=pk, metadata_type=metadata_type, **kwargs)
-        if r is None:
+        pk = pk_range if pk_range is not None else pk
+        if pk is None:
+            raise SystemExit("no pk given, use {pk} or --pk ...")
+        pks = self.__parse_pk_string__(pk)
+        types = metadata_types or [metadata_type]
+        unsupported = [t for t in types if t not in SUPPORTED_METADATA_TYPES]
+        if unsupported:
+            raise SystemExit(
+                f"unsupported metadata types {', '.join(unsupported)}, choose from {', '.join(SUPPORTED_METADATA_TYPES)} ..."
+            )
+
+        if out_path is not None and archive_compression(out_path) is not None:
+            exported, failed = self.export_metadata(
+                pks=pks,
+                metadata_types=types,
+                out_path=out_path,
+                concurrency=concurrency,
+            )
+            logging.info(
+                f"exported {exported} metadata documents to {out_path}, {failed} failed ..."
+            )
+            if failed:
+                sys.exit(1)
+            return
+        if len(pks) > 1 or len(types) > 1:
+            raise SystemExit(
+                "metadata of multiple resources or types is exported into an archive, "
+                f"use --out with one of {', '.join(ARCHIVE_COMPRESSIONS)} ..."
+            )
+
+        link = self.metadata_url(pk=pks[0], metadata_type=types[0])
+        if self.http_download(link, out=out_path, resume=resume) is None:
             logging.warning("metadata download failed ... ")
-            return None
-        print(r.text)
+
+    def export_metadata(
+        self,
+        pks: List[int],
+        metadata_types: List[str],
+        out_path: Path,
+        concurrency: int = 1,
+    ) -> Tuple[int, int]:
+        """export the metadata of many resources into a (compressed) tar archive
+
+        The metadata links of all resources are resolved by batched filter{pk.in} listing
+        requests, the documents are downloaded on concurrency parallel workers and streamed
+        into the archive in pk order as {pk}/{metadata type}.xml.
+
+        Args:
+            pks (List[int]): pks of the resources, pks without resource are skipped
+            metadata_types (List[str]): metadatatypes to export, each must be in SUPPORTED_METADATA_TYPES
+            out_path (Path): archive to write, compression by suffix (.tar, .tar.gz, .tar.xz, .tar.zst, ...)
+            concurrency (int, optional): number of parallel requests. Defaults to 1.
+
+        Returns:
+            Tuple[int, int]: number of exported and of failed metadata documents
+        """
+        resources = self.list_by_pks(
+            pks, include_fields=["pk", "links"], concurrency=concurrency
+        )
+        missing = len(set(pks) - {int(r["pk"]) for r in resources})
+        if missing:
+            logging.info(f"{missing} of {len(pks)} pks have no resource, skipped ...")
+
+        jobs: List[Tuple[int, str, str]] = []
+        for resource in sorted(resources, key=lambda r: int(r["pk"])):
+            links = {link["name"]: link["url"] for link in resource.get("links") or []}
+            for metadata_type in metadata_types:
+                if metadata_type not in links:
+                    logging.warning(
+                        f"resource {resource['pk']} has no {metadata_type} metadata link ..."
+                    )
+                    continue
+                jobs.append((int(resource["pk"]), metadata_type, links[metadata_type]))
+
+        def fetch(job: Tuple[int, str, str]) -> Optional[bytes]:
+            pk, metadata_type, url = job
+            try:
+                r = self.http_get_download(url)
+            except GeoNodeRestException as err:
+                logging.error(f"{metadata_type} metadata of {pk}: {err}")
+                return None
+            return r.content if r is not None else None
+
+        exported = failed = 0
+        with open_archive(out_path) as tar:
+            for (pk, metadata_type, _), data in zip(
+                jobs, self.__map_concurrent__(fetch, jobs, concurrency)
+            ):
+                if data is None:
+                    failed += 1
+                    continue
+                add_bytes(tar, f"{pk}/{metadata_type.replace(' ', '_')}.xml", data)
+                exported += 1
+        return exported, failed
+
+    def metadata_url(self, pk: int, metadata_type: str = DEFAULT_METADATA_TYPE) -> str:
+        """url of the metadata of a resource in a specified format
+
+        Args:
+            pk (int): pk id of the resource to get the metadata from
+            metadata_type (str, optional): metadatatype to get metadata in. Must be in SUPPORTED_METADATA_TYPES
+        Raises:
+            GeoNodeRestException: if the resource has no metadata link of metadata_type
+        Returns:
+            str: metadata url
+        """
+        r = self.http_get(endpoint=f"resources/{pk}")["resource"]
+        links = [m["url"] for m in r["links"] if m["name"] == metadata_type]
+        if not links:
+            raise GeoNodeRestException(
+                f"resource {pk} has no {metadata_type} metadata link ..."
+            )
+        return links[0]
 
     def metadata(
         self, pk: int, metadata_type: str = DEFAULT_METADATA_TYPE, **kwargs
@@ -56,12 +187,54 @@ class GeonodeResourceHandler(GeonodeObjectHandler):
             pk (int): pk id of the resource to get the metadata from
             metadata_type (str, optional): metadatatype to get metadata in. Must be in SUPPORTED_METADATA_TYPES
         Raises:
-            KeyError: if metadata_type is not in SUPPORTED_METADATA_TYPES
+            GeoNodeRestException: if the resource has no metadata link of metadata_type
         Returns:
             response (object): requests response obj of metadata
         """
-        r = self.http_get(endpoint=f"resources/{pk}")["resource"]
+        return self.http_get_download(self.metadata_url(pk, metadata_type))
+
+    def cmd_download(
+        self,
+        pk: int,
+        out_path: Optional[Path] = None,
+        resume: bool = False,
+        **kwargs,
+    ):
+        """stream the file of a resource to the cmdline or into a file
 
-        link: str
-        link = [m for m in r["links"] if m["name"] == metadata_type][0]["url"]
-        return self.http_get_download(link)
+        Args:
+            pk (int): pk of the resource
+            out_path (Path, optional): file to write to. Defaults to stdout.
+            resume (bool, optional): continue an interrupted download of out_path
+        """
+        url = self.download_url(pk)
+        if url is None:
+            raise SystemExit(
+                f"{self.SINGULAR_RESOURCE_NAME} {pk} has no download url ..."
+            )
+        size = self.http_download(url, out=out_path, resume=resume)
+        if size is None:
+            logging.warning("download failed ... ")
+            sys.exit(1)
+        if out_path is not None and str(out_path) != "-":
+            logging.info(f"downloaded {size} bytes to {out_path} ...")
+
+    def download_url(self, pk: int) -> Optional[str]:
+        """url of the file of a resource, the default entry of its download_urls
+
+        Args:
+            pk (int): pk of the resource
+
+        Returns:
+            Optional[str]: download url, None if the resource has none
+        """
+        obj = self.get(pk=pk)
+        if obj is None:
+            return None
+        urls = obj.get("download_urls") or []
+        default = [u["url"] for u in urls if u.get("default")]
+        if default:
+            return default[0]
+        if urls:
+            return urls[0]["url"]
+        return obj.get("download_url")
@@ -1,15 +1,40 @@
-from typing import List, Dict, Optional, TypeAlias, Callable, Any
+from typing import (
+    List,
+    Dict,
+    Optional,
+    Tuple,
+    TypeAlias,
+    Callable,
+    Any,
+    Iterable,
+    Iterator,
+)
+from concurrent.futures import ThreadPoolExecutor, Future
+from collections import deque
+from pathlib import Path
+import os
+import re
+import sys
 
 import urllib3
 import requests
 import logging
 
 from geonoderest.exceptions import GeoNodeRestException
-from geonoderest.geonodetypes import GeonodeHTTPFile
+from geonoderest.geonodetypes import GeonodeHTTPFile, GeonodeCmdOutObjectKey
+from geonoderest.cmdprint import print_list_on_cmd, print_json, print_stream
 from geonoderest.apiconf import GeonodeApiConf
+from geonoderest.session import GeonodeSession, DOWNLOAD_CHUNK_SIZE
+from geonoderest.cache import CachedResponse, ResponseCache, WRITTEN_PK_PATTERN
+from geonoderest.multipart import MultipartEncoder
+from geonoderest.progress import UploadProgress
 
 urllib3.disable_warnings()
 
+# suffix of partially downloaded files, kept to resume the download with a Range request
+PARTIAL_DOWNLOAD_SUFFIX: str = ".part"
+CONTENT_RANGE_PATTERN = re.compile(r"bytes (?:(\d+)-\d+|\*)/(\d+|\*)")
+
 NetworkExceptionHandlingTypes: TypeAlias = (
     Callable[
         [
@@ -26,18 +51,28 @@ NetworkExceptionHandlingTypes: TypeAlias = (
         ["GeonodeRest", str, Dict], Optional[Dict] | Optional[requests.Response]
     ]  # http_get_download, http_get
     | Callable[["GeonodeRest", str, Dict, Dict], Optional[Dict]]
+    | Callable[
+        ["GeonodeRest", str, Optional[Path], Dict, bool, int], Optional[int]
+    ]  # http_download
 )
 
 
 class GeonodeRest(object):
     DEFAULTS = {"page_size": 100, "page": 1}
 
-    def __init__(self, env: GeonodeApiConf):
+    def __init__(self, env: GeonodeApiConf, session: Optional[GeonodeSession] = None):
+        """
+        Args:
+            env (GeonodeApiConf): connection settings of the geonode instance
+            session (GeonodeSession, optional): pooled session to share with other handlers.
+                                                A new one is created from env if not given.
+        """
         self.gn_credentials = env
+        self.session = session if session is not None else GeonodeSession.from_conf(env)
 
     def __handle_http_params__(self, params: Dict, kwargs: Dict) -> Dict:
         """
-        Internal method to handle pagination parameters.
+        Internal method to handle pagination, filter, ordering and field projection parameters.
 
         Parameters
         ----------
@@ -67,8 +102,151 @@ class GeonodeRest(object):
         if "ordering" in kwargs and kwargs["ordering"] is not None:
             params["sort_by"] = kwargs["ordering"]
 
+        # dynamic-rest field projection: only serialize the requested fields
+        if "include_fields" in kwargs and kwargs["include_fields"]:
+            params["exclude[]"] = "*"
+            params["include[]"] = list(kwargs["include_fields"])
+
         return params
 
+    def __has_next_page__(self, r: Dict, page: int) -> bool:
+        """
+        Internal method to decide if a paginated api response is followed by another page.
+
+        Parameters
+        ----------
+        r : Dict
+            The json response of the current page.
+        page : int
+            The number of the current page.
+
+        Returns
+        -------
+        bool
+            True if there are more pages to fetch.
+        """
+        links = r.get("links") or {}
+        if "next" in links:
+            return links["next"] is not None
+        if "total" in r and "page_size" in r:
+            return page * int(r["page_size"]) < int(r["total"])
+        return False
+
+    def __iter_pages__(
+        self, endpoint: str, params: Dict, json_object_name: str, prefetch: int = 1
+    ) -> Iterator[Dict]:
+        """
+        Lazily yields all records of a paginated endpoint.
+
+        As soon as the first page tells the total number of records, the remaining pages are
+        requested on up to prefetch parallel workers. Records are still yielded in page order.
+
+        Args:
+            endpoint (str): api endpoint to list
+            params (Dict): query parameters, "page" is used as first page to fetch
+            json_object_name (str): key of the record list in the json response
+            prefetch (int, optional): number of pages requested in parallel. Defaults to 1.
+
+        Raises:
+            GeoNodeRestException: if a page could not be fetched
+
+        Returns:
+            Iterator[Dict]: records of all pages
+        """
+
+        def fetch_page(page: int) -> Dict:
+            r = self.http_get(endpoint=endpoint, params={**params, "page": page})
+            if r is None:
+                raise GeoNodeRestException(
+                    f"getting page {page} of {endpoint} failed ..."
+                )
+            return r
+
+        page = int(params.get("page", 1))
+        r = fetch_page(page)
+        yield from r[json_object_name]
+
+        if prefetch > 1 and "total" in r and "page_size" in r:
+            page_size = int(r["page_size"])
+            last_page = -(-int(r["total"]) // page_size) if page_size > 0 else page
+            pages = range(page + 1, last_page + 1)
+            for r in self.__map_concurrent__(fetch_page, pages, prefetch):
+                yield from r[json_object_name]
+            return
+
+        while r[json_object_name] and self.__has_next_page__(r, page):
+            page += 1
+            r = fetch_page(page)
+            yield from r[json_object_name]
+
+    def __cmd_list_output__(
+        self,
+        cmdout_header: List[GeonodeCmdOutObjectKey],
+        list_page: Callable[[], Any],
+        iter_all_pages: Callable[[], Iterator[Dict]],
+        all_pages: bool = False,
+        output: Optional[str] = None,
+        json: bool = False,
+    ):
+        """
+        Internal method printing a listing on the cmdline, shared by the cmd_list of all handlers.
+
+        Args:
+            cmdout_header (List[GeonodeCmdOutObjectKey]): columns of table, csv and tsv output
+            list_page (Callable): returns the objects of a single page, None on failure
+            iter_all_pages (Callable): lazily yields the objects of all pages
+            all_pages (bool, optional): show the objects of all pages. Defaults to False.
+            output (str, optional): stream the records as ndjson, csv or tsv instead of printing a table
+            json (bool, optional): print the objects as json. Defaults to False.
+        """
+        if output is not None:
+            objs = iter_all_pages() if all_pages else list_page()
+            if objs is None:
+                logging.warning("No results returned from GeoNode API.")
+                return
+            print_stream(objs, cmdout_header, output)
+            return
+
+        obj = list(iter_all_pages()) if all_pages else list_page()
+        if obj is None:
+            logging.warning("No results returned from GeoNode API.")
+            return
+        if json:
+            print_json(obj)
+        else:
+            print_list_on_cmd(obj, cmdout_header)
+
+    def __map_concurrent__(
+        self, func: Callable[[Any], Any], items: Iterable, concurrency: int = 1
+    ) -> Iterator:
+        """
+        Apply func to every item on a bounded pool of worker threads.
+
+        Results are yielded in the order of items, no matter in which order the workers finish.
+        At most 2 * concurrency calls are in flight (or buffered) at the same time.
+
+        Args:
+            func (Callable): function to call with each item
+            items (Iterable): items to process
+            concurrency (int, optional): number of worker threads. 1 runs sequentially. Defaults to 1.
+
+        Returns:
+            Iterator: results of func in order of items
+        """
+        if concurrency <= 1:
+            for item in items:
+                yield func(item)
+            return
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            pending: deque[Future] = deque()
+            for item in items:
+                pending.append(executor.submit(func, item))
+                if len(pending) >= 2 * concurrency:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
     @staticmethod
     def network_exception_handling(func: NetworkExceptionHandlingTypes):
         """
@@ -83,6 +261,7 @@ class GeonodeRest(object):
         - ConnectionRefusedError
 
         The error message will give a hint about the cause of the exception and the potential solution.
+        Transient errors are retried by the GeonodeSession before they reach this decorator.
         """
 
         def inner(*args, **kwargs):
@@ -136,6 +315,24 @@ class GeonodeRest(object):
     def verify(self):
         return self.gn_credentials.verify
 
+    def __upload_callback__(
+        self, progress: Optional[UploadProgress] = None
+    ) -> Optional[Callable[[int], None]]:
+        """
+        Internal method returning the read callback of an upload body: paces the reads with the
+        upload limiter of the session and reports them to progress.
+        """
+        limiter = self.session.upload_limiter
+        if limiter is None:
+            return progress.update if progress is not None else None
+
+        def callback(n_bytes: int):
+            limiter.acquire(n_bytes)
+            if progress is not None:
+                progress.update(n_bytes)
+
+        return callback
+
     @network_exception_handling
     def http_post(
         self,
@@ -145,6 +342,7 @@ class GeonodeRest(object):
         data: Dict = {},
         files: Optional[List[GeonodeHTTPFile]] = None,
         content_length: Optional[int] = None,
+        progress: Optional[UploadProgress] = None,
     ) -> Optional[Dict]:
         """
         Execute http post on endpoint with params
@@ -154,7 +352,11 @@ class GeonodeRest(object):
             files (List[GeonodeHTTPFile], optional): list of files to post.
             json (Dict, optional): json data to post
             params (Dict, optional): params dict provided with the post
-            content_length (Optional[int], optional): content-length header for upload
+            data (Dict, optional): form fields to post
+            content_length (Optional[int], optional): size of the uploaded files. The content-length header
+                                                      is set to the exact size of the multipart body, which
+                                                      also covers the part headers.
+            progress (Optional[UploadProgress], optional): reporter for the upload of files. Defaults to None.
 
         Raises:
             SystemExit: if bad http resonse raise SystemExit with logging
@@ -162,38 +364,64 @@ class GeonodeRest(object):
         Returns:
             Dict: returns response json
         """
-        if content_length:
-            self.header["content-length"] = content_length
         url = self.url + endpoint
+        headers = dict(self.header)
+        body: Any = data
+        encoder: Optional[MultipartEncoder] = None
+        if files:
+            # stream the multipart body from the files instead of building it in memory,
+            # like requests' files=... json is not sent along with files (same as requests)
+            encoder = MultipartEncoder(
+                fields=data,
+                files=files,
+                callback=self.__upload_callback__(progress),
+            )
+            headers["Content-Type"] = encoder.content_type
+            # django reads the body by CONTENT_LENGTH, never send it chunked
+            headers["Content-Length"] = str(encoder.length)
+            body = encoder
+            logging.debug(
+                f"POST multipart body: {encoder.length} bytes, file payload: {content_length} bytes"
+            )
+            if progress is not None:
+                progress.start(total=encoder.length)
+        success = False
         try:
             logging.debug(
-                f"POST URL: {url}, headers: {self.header}, params: {params}, json: {json}, data: {data}"
+                f"POST URL: {url}, headers: {headers}, params: {params}, json: {json}, data: {data}"
             )
-            r = requests.post(
+            r = self.session.post(
                 url,
-                headers=self.header,
-                files=files,
+                headers=headers,
                 json=json,
-                data=data,
+                data=body,
                 params=params,
                 verify=self.verify,
             )
+            self.__invalidate_cache__(endpoint)
             r.raise_for_status()
+            success = True
         except requests.exceptions.HTTPError as err:
             if r is not None:
                 logging.error(f"POST error response: {r.text}")
             logging.error(err)
             return None
+        finally:
+            if encoder is not None:
+                encoder.close()
+                if progress is not None:
+                    progress.finish(success=success)
         return r.json()
 
     @network_exception_handling
     def http_get_download(
-        self, url: str, params: Dict = {}
+        self, url: str, params: Dict = {}, cache: Optional[ResponseCache] = None
     ) -> Optional[requests.Response]:
         """raw get url
 
         Args:
             url (str): url to download
+            cache (ResponseCache, optional): response cache to use instead of the one of the session
 
         Raises:
             SystemExit: if response code is bad exit
@@ -203,9 +431,7 @@ class GeonodeRest(object):
         """
         try:
             logging.debug(f"GET URL: {url}, headers: {self.header}, params: {params}")
-            r = requests.get(
-                url, headers=self.header, params=params, verify=self.verify
-            )
+            r = self.__get__(url, params=params, cache=cache)
             r.raise_for_status()
         except requests.exceptions.HTTPError as err:
             if r is not None:
@@ -214,6 +440,232 @@ class GeonodeRest(object):
             return None
         return r
 
+    def __get__(
+        self, url: str, params: Dict = {}, cache: Optional[ResponseCache] = None
+    ) -> requests.Response:
+        """
+        Internal method sending a GET through the response cache (cache, defaults to the one of the
+        session) and the download limiter of the session.
+
+        Fresh cache entries are returned without request, stale ones are revalidated with a
+        conditional request and returned if the server answers 304 Not Modified. Polled endpoints
+        (VOLATILE_ENDPOINTS, e.g. execution requests) bypass the session cache.
+        """
+        if cache is None and not ResponseCache.is_volatile(self.url, url):
+            cache = self.session.response_cache
+        headers = dict(self.header)
+        key: Optional[str] = None
+        entry: Optional[CachedResponse] = None
+        if cache is not None:
+            key = cache.key(url, params, headers["Authorization"])
+            entry = cache.lookup(key)
+            if entry is not None:
+                if cache.is_fresh(entry):
+                    logging.debug(f"GET URL: {url} served from cache ...")
+                    return entry.to_response(url)
+                headers.update(entry.conditional_headers())
+
+        throttled = self.session.download_limiter is not None
+        r = self.session.get(
+            url, headers=headers, params=params, verify=self.verify, stream=throttled
+        )
+        if cache is not None and key is not None and entry is not None:
+            if r.status_code == 304:
+                r.close()
+                logging.debug(f"GET URL: {url} not modified, served from cache ...")
+                cache.touch(key)
+                return entry.to_response(url)
+        if throttled:
+            # read the body at the download rate, r.content / r.text / r.json() keep working
+            r._content = b"".join(self.session.iter_content(r))
+        if cache is not None and key is not None and r.status_code == 200:
+            cache.store(key, url, r)
+        return r
+
+    def __invalidate_cache__(self, endpoint: str):
+        """
+        Internal method dropping the cached responses and memoized objects a write on endpoint made stale.
+        """
+        match = WRITTEN_PK_PATTERN.match(endpoint)
+        if match is not None:
+            self.session.get_memo.invalidate(int(match.group(1)))
+        if self.session.response_cache is not None:
+            self.session.response_cache.invalidate(self.url, endpoint)
+
+    @staticmethod
+    def __content_range__(r: requests.Response) -> Tuple[Optional[int], Optional[int]]:
+        """
+        Internal method returning (first byte, total length) of the Content-Range header of a response
+        """
+        match = CONTENT_RANGE_PATTERN.fullmatch(r.headers.get("Content-Range", ""))
+        if match is None:
+            return None, None
+        first, total = match.groups()
+        return (
+            int(first) if first is not None else None,
+            int(total) if total != "*" else None,
+        )
+
+    @network_exception_handling
+    def http_download(
+        self,
+        url: str,
+        out: Optional[Path] = None,
+        params: Dict = {},
+        resume: bool = False,
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+    ) -> Optional[int]:
+        """
+        Stream the body of url to a file or stdout in chunks of chunk_size, never holding it in memory.
+
+        Files are written to out + PARTIAL_DOWNLOAD_SUFFIX and renamed to out once the length
+        announced by the server is verified. With resume, the download continues at the end
+        of an existing partial file (HTTP Range request); servers which ignore the range
+        send the whole body, which then replaces the partial file.
+
+        Args:
+            url (str): url to download
+            out (Path, optional): target file, None or "-" writes to stdout. Defaults to None.
+            params (Dict, optional): query parameters
+            resume (bool, optional): continue an interrupted download of out. Defaults to False.
+            chunk_size (int, optional): bytes read and written at once. Defaults to DOWNLOAD_CHUNK_SIZE.
+
+        Raises:
+            GeoNodeRestException: if the body is shorter or longer than announced
+
+        Returns:
+            Optional[int]: size of the downloaded file (bytes written to stdout), None on a bad http response
+        """
+        part = (
+            None
+            if out is None or str(out) == "-"
+            else out.with_name(out.name + PARTIAL_DOWNLOAD_SUFFIX)
+        )
+        # no transparent compression: the bytes on disk are the bytes announced by the server
+        headers = {**self.header, "Accept-Encoding": "identity"}
+        offset = part.stat().st_size if resume and part and part.exists() else 0
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+
+        try:
+            logging.debug(f"GET URL: {url}, headers: {headers}, params: {params}")
+            r = self.session.get(
+                url, headers=headers, params=params, verify=self.verify, stream=True
+            )
+            if r.status_code == 416 and offset:
+                assert out is not None and part is not None
+                return self.__resolve_unsatisfiable_range__(r, url, out, part, offset)
+            r.raise_for_status()
+        except requests.exceptions.HTTPError as err:
+            if r is not None:
+                logging.error(f"GET error response: {r.text}")
+            logging.error(err)
+            return None
+
+        with r:
+            offset, expected = self.__download_range__(r, url, out, offset)
+            written = self.__write_download__(r, url, part, offset, chunk_size)
+
+        if expected is not None and written != expected:
+            raise GeoNodeRestException(
+                f"download of {url} incomplete: got {written} of {expected} bytes"
+                + (", resume with --resume ..." if part is not None else " ...")
+            )
+        if part is not None:
+            assert out is not None
+            os.replace(part, out)
+        return written
+
+    def __resolve_unsatisfiable_range__(
+        self, r: requests.Response, url: str, out: Path, part: Path, offset: int
+    ) -> int:
+        """
+        Internal method handling a 416 answer to a resumed download: the partial file may already
+        be complete, then it is renamed to out.
+
+        Raises:
+            GeoNodeRestException: if the partial file does not match the size on the server
+
+        Returns:
+            int: size of the completed file
+        """
+        _, total = self.__content_range__(r)
+        r.close()
+        if total != offset:
+            raise GeoNodeRestException(
+                f"cannot resume download of {url}: {part} has {offset} bytes, server has {total} ..."
+            )
+        os.replace(part, out)
+        logging.info(f"download of {out} was already complete ...")
+        return offset
+
+    def __download_range__(
+        self, r: requests.Response, url: str, out: Optional[Path], offset: int
+    ) -> Tuple[int, Optional[int]]:
+        """
+        Internal method checking which part of the body the server sends: the requested range
+        (206) or, if it ignores ranges, the whole body.
+
+        Raises:
+            GeoNodeRestException: if the server sent another range than requested
+
+        Returns:
+            Tuple[int, Optional[int]]: offset to write the body at, expected total length (None if unknown)
+        """
+        if r.status_code == 206:
+            first, expected = self.__content_range__(r)
+            if first != offset:
+                raise GeoNodeRestException(
+                    f"cannot resume download of {url}: server sent range {r.headers.get('Content-Range')} ..."
+                )
+            logging.info(f"resuming download of {out} at byte {offset} ...")
+            return offset, expected
+
+        if offset:
+            logging.info(
+                f"server does not support ranges, restarting download of {out} ..."
+            )
+        if "Content-Length" in r.headers:
+            return 0, int(r.headers["Content-Length"])
+        return 0, None
+
+    def __write_download__(
+        self,
+        r: requests.Response,
+        url: str,
+        part: Optional[Path],
+        offset: int,
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+    ) -> int:
+        """
+        Internal method writing the body of r to part at offset (stdout if part is None).
+
+        Raises:
+            GeoNodeRestException: if the connection broke off
+
+        Returns:
+            int: size of the partial file (bytes written to stdout) after the download
+        """
+        written = offset
+        f = sys.stdout.buffer if part is None else part.open("ab" if offset else "wb")
+        try:
+            for chunk in self.session.iter_content(r, chunk_size=chunk_size):
+                f.write(chunk)
+                written += len(chunk)
+            f.flush()
+        except (
+            requests.exceptions.ChunkedEncodingError,
+            requests.exceptions.ConnectionError,
+        ):
+            raise GeoNodeRestException(
+                f"download of {url} interrupted after {written} bytes"
+                + (", resume with --resume ..." if part is not None else " ...")
+            )
+        finally:
+            if part is not None:
+                f.close()
+        return written
+
     @network_exception_handling
     def http_get(self, endpoint: str, params: Dict = {}) -> Optional[Dict]:
         """
@@ -233,9 +685,7 @@ class GeonodeRest(object):
         url = self.url + endpoint
         try:
             logging.debug(f"GET URL: {url}, headers: {self.header}, params: {params}")
-            r = requests.get(
-                url, headers=self.header, params=params, verify=self.verify
-            )
+            r = self.__get__(url, params=params)
             r.raise_for_status()
         except requests.exceptions.HTTPError as err:
             if r is not None:
@@ -267,13 +717,14 @@ class GeonodeRest(object):
             logging.debug(
                 f"PATCH URL: {url}, headers: {self.header}, params: {params}, json: {json_content}"
             )
-            r = requests.patch(
+            r = self.session.patch(
                 url,
                 headers=self.header,
                 json=json_content,
                 params=params,
                 verify=self.verify,
             )
+            self.__invalidate_cache__(endpoint)
             r.raise_for_status()
         except requests.exceptions.HTTPError as err:
             if r is not None:
@@ -306,9 +757,10 @@ class GeonodeRest(object):
             logging.debug(
                 f"DELETE URL: {url}, headers: {self.header}, params: {params}, json: {json}"
             )
-            r = requests.delete(
+            r = self.session.delete(
                 url, headers=self.header, params=params, json=json, verify=self.verify
             )
+            self.__invalidate_cache__(endpoint)
             r.raise_for_status()
             if r.status_code in [204]:
                 return {}
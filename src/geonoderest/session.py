@@ -0,0 +1,306 @@
+from collections import Counter
+from email.utils import parsedate_to_datetime
+from typing import Iterator, Optional
+import datetime
+import logging
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from geonoderest.ratelimit import TokenBucket, AdaptiveConcurrencyLimiter
+from geonoderest.cache import ResponseCache, DEFAULT_CACHE_MAX_SIZE
+from geonoderest.memo import GetMemo
+
+DEFAULT_POOL_CONNECTIONS: int = 10
+DEFAULT_POOL_MAXSIZE: int = 10
+
+DEFAULT_RETRIES: int = 3
+DEFAULT_RETRY_BACKOFF: float = 0.5
+DEFAULT_RETRY_BACKOFF_MAX: float = 30.0
+RETRY_STATUS_CODES: frozenset = frozenset({429, 502, 503, 504})
+IDEMPOTENT_METHODS: frozenset = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+# burst of the bandwidth limiters in bytes: small, so a transfer is paced from its first chunk
+BANDWIDTH_BURST: int = 64 * 1024
+DOWNLOAD_CHUNK_SIZE: int = 64 * 1024
+
+
+def __is_stream__(data) -> bool:
+    """file like or iterator request bodies, which are consumed when sent"""
+    return hasattr(data, "read") or hasattr(data, "__next__")
+
+
+class GeonodeSession(requests.Session):
+    """
+    requests session with a persistent connection pool.
+
+    One GeonodeSession is shared by all handlers of a geonodectl run, so TCP and TLS
+    connections to the GeoNode instance are kept alive and reused between calls.
+    Transient failures (connection errors and 429/502/503/504 responses) are retried
+    with exponential backoff and jitter, honoring the Retry-After header.
+    All requests of all handlers pass an optional requests-per-second token bucket and an
+    adaptive (AIMD) limit of requests in flight. Upload and download bodies are paced by
+    bytes-per-second token buckets, shared by all transfers of the session. GET responses
+    can be kept in a persistent ResponseCache, objects fetched by pk are memoized per session.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        pool_block: bool = False,
+        keep_alive: bool = True,
+        retries: int = DEFAULT_RETRIES,
+        retry_backoff: float = DEFAULT_RETRY_BACKOFF,
+        retry_backoff_max: float = DEFAULT_RETRY_BACKOFF_MAX,
+        retry_all_methods: bool = False,
+        max_rps: float = 0.0,
+        max_in_flight: int = 0,
+        latency_tolerance: float = 0.0,
+        max_upload_rate: float = 0.0,
+        max_download_rate: float = 0.0,
+        response_cache: Optional[ResponseCache] = None,
+    ):
+        """
+        Args:
+            pool_connections (int, optional): number of per-host connection pools to cache.
+            pool_maxsize (int, optional): max number of connections kept alive per host.
+            pool_block (bool, optional): block when no free connection is available instead of
+                                         opening additional (not pooled) connections.
+            keep_alive (bool, optional): reuse connections between requests. Defaults to True.
+            retries (int, optional): max number of retries per request. 0 disables retrying.
+            retry_backoff (float, optional): base delay in seconds, doubled on every retry.
+            retry_backoff_max (float, optional): upper bound in seconds of the backoff delay.
+            retry_all_methods (bool, optional): also retry non idempotent methods (POST, PATCH).
+            max_rps (float, optional): max requests per second, 0 means unlimited.
+            max_in_flight (int, optional): upper bound of the adaptive limit of parallel requests,
+                                           0 disables the limiter.
+            latency_tolerance (float, optional): also shrink the limit when the recent latency exceeds
+                                                 this factor of the baseline latency, 0 only shrinks it
+                                                 on 429/503 and timeouts.
+            max_upload_rate (float, optional): max bytes per second of all upload bodies, 0 means unlimited.
+            max_download_rate (float, optional): max bytes per second of all download bodies, 0 means unlimited.
+            response_cache (ResponseCache, optional): cache of GET responses. Defaults to None, no caching.
+        """
+        super().__init__()
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+        if not keep_alive:
+            self.headers["Connection"] = "close"
+
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_max = retry_backoff_max
+        self.retry_all_methods = retry_all_methods
+        self.retry_stats: Counter = Counter()
+        self._stats_lock = threading.Lock()
+
+        self.rate_limiter: Optional[TokenBucket] = (
+            TokenBucket(rate=max_rps) if max_rps > 0 else None
+        )
+        self.concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = (
+            AdaptiveConcurrencyLimiter(
+                max_limit=max_in_flight, latency_tolerance=latency_tolerance
+            )
+            if max_in_flight > 0
+            else None
+        )
+        self.upload_limiter: Optional[TokenBucket] = (
+            TokenBucket(rate=max_upload_rate, capacity=BANDWIDTH_BURST)
+            if max_upload_rate > 0
+            else None
+        )
+        self.download_limiter: Optional[TokenBucket] = (
+            TokenBucket(rate=max_download_rate, capacity=BANDWIDTH_BURST)
+            if max_download_rate > 0
+            else None
+        )
+        self.response_cache = response_cache
+        self.get_memo = GetMemo()
+
+    @staticmethod
+    def from_conf(conf) -> "GeonodeSession":
+        """
+        Creates a new GeonodeSession from the pool, retry, rate limit and cache settings of a GeonodeApiConf
+        """
+        cache_path = getattr(conf, "cache_path", None)
+        return GeonodeSession(
+            pool_connections=getattr(
+                conf, "pool_connections", DEFAULT_POOL_CONNECTIONS
+            ),
+            pool_maxsize=getattr(conf, "pool_maxsize", DEFAULT_POOL_MAXSIZE),
+            pool_block=getattr(conf, "pool_block", False),
+            keep_alive=getattr(conf, "keep_alive", True),
+            retries=getattr(conf, "retries", DEFAULT_RETRIES),
+            retry_backoff=getattr(conf, "retry_backoff", DEFAULT_RETRY_BACKOFF),
+            retry_backoff_max=getattr(
+                conf, "retry_backoff_max", DEFAULT_RETRY_BACKOFF_MAX
+            ),
+            retry_all_methods=getattr(conf, "retry_all_methods", False),
+            max_rps=getattr(conf, "max_rps", 0.0),
+            max_in_flight=getattr(conf, "max_in_flight", 0),
+            latency_tolerance=getattr(conf, "latency_tolerance", 0.0),
+            max_upload_rate=getattr(conf, "max_upload_rate", 0.0),
+            max_download_rate=getattr(conf, "max_download_rate", 0.0),
+            response_cache=(
+                ResponseCache(
+                    path=cache_path,
+                    ttl=getattr(conf, "cache_ttl", 0.0),
+                    max_size=getattr(conf, "cache_max_size", DEFAULT_CACHE_MAX_SIZE),
+                )
+                if cache_path is not None
+                else None
+            ),
+        )
+
+    def __may_retry__(self, method: str, attempt: int, data) -> bool:
+        """
+        Internal method to decide if a failed request is sent again.
+
+        Streamed request bodies (file like data or iterators) are never retried, as they are consumed.
+        """
+        if attempt >= self.retries:
+            return False
+        if __is_stream__(data):
+            return False
+        return self.retry_all_methods or method.upper() in IDEMPOTENT_METHODS
+
+    def __backoff__(self, attempt: int) -> float:
+        """
+        Internal method returning the delay before the next retry: exponential backoff
+        capped at retry_backoff_max with full jitter.
+        """
+        return random.uniform(
+            0, min(self.retry_backoff_max, self.retry_backoff * 2**attempt)
+        )
+
+    @staticmethod
+    def __retry_after__(r: requests.Response) -> Optional[float]:
+        """
+        Internal method to parse the Retry-After header (seconds or http date) of a response.
+        """
+        value = r.headers.get("Retry-After")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=datetime.timezone.utc)
+        now = datetime.datetime.now(datetime.timezone.utc)
+        return max(0.0, (retry_at - now).total_seconds())
+
+    def __count__(self, key: str):
+        with self._stats_lock:
+            self.retry_stats[key] += 1
+
+    def __limited_request__(self, method, url, *args, **kwargs) -> requests.Response:
+        """
+        Internal method to send a single request through the rate and concurrency limiters.
+        """
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        if self.concurrency_limiter is None:
+            return super().request(method, url, *args, **kwargs)
+
+        self.concurrency_limiter.acquire()
+        latency: Optional[float] = None
+        status_code: Optional[int] = None
+        timed_out = False
+        start = time.monotonic()
+        try:
+            r = super().request(method, url, *args, **kwargs)
+            # the duration of streamed uploads depends on the file size, not on server load
+            if not __is_stream__(kwargs.get("data")):
+                latency = time.monotonic() - start
+            status_code = r.status_code
+            return r
+        except requests.exceptions.Timeout:
+            timed_out = True
+            raise
+        finally:
+            self.concurrency_limiter.release(
+                latency=latency, status_code=status_code, timed_out=timed_out
+            )
+
+    def request(self, method, url, *args, **kwargs):  # type: ignore[override]
+        """
+        Send a request, retrying transient failures. See requests.Session.request.
+        """
+        attempt = 0
+        while True:
+            try:
+                r = self.__limited_request__(method, url, *args, **kwargs)
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+            ) as err:
+                if not self.__may_retry__(method, attempt, kwargs.get("data")):
+                    if attempt > 0:
+                        self.__count__("gave up")
+                    raise
+                reason = type(err).__name__
+                delay = self.__backoff__(attempt)
+            else:
+                if r.status_code not in RETRY_STATUS_CODES:
+                    return r
+                if not self.__may_retry__(method, attempt, kwargs.get("data")):
+                    if attempt > 0:
+                        self.__count__("gave up")
+                    return r
+                reason = f"HTTP {r.status_code}"
+                retry_after = self.__retry_after__(r)
+                delay = (
+                    retry_after
+                    if retry_after is not None
+                    else self.__backoff__(attempt)
+                )
+                r.close()
+
+            attempt += 1
+            self.__count__("retries")
+            self.__count__(reason)
+            logging.debug(
+                f"{method} {url} failed with {reason}, retry {attempt}/{self.retries} in {delay:.2f}s ..."
+            )
+            time.sleep(delay)
+
+    def iter_content(
+        self, r: requests.Response, chunk_size: int = DOWNLOAD_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """
+        Yields the body of a streamed response (stream=True) in chunks, paced by the download limiter.
+        """
+        for chunk in r.iter_content(chunk_size=chunk_size):
+            if self.download_limiter is not None:
+                self.download_limiter.acquire(len(chunk))
+            yield chunk
+
+    def log_retry_stats(self):
+        """
+        Logs the retry counters of this session, if any request had to be retried.
+        """
+        if not self.retry_stats["retries"]:
+            return
+        reasons = ", ".join(
+            f"{reason}: {count}"
+            for reason, count in sorted(self.retry_stats.items())
+            if reason not in ("retries", "gave up")
+        )
+        logging.info(
+            f"retried {self.retry_stats['retries']} request(s) ({reasons}), "
+            f"gave up on {self.retry_stats['gave up']} ..."
+        )
@@ -0,0 +1,179 @@
+from pathlib import Path
+from typing import List
+import struct
+import zipfile
+
+from geonoderest.exceptions import DatasetValidationError
+
+SHAPEFILE_REQUIRED_SIDECARS: List[str] = [".dbf", ".shx", ".prj"]
+SHAPEFILE_FILE_CODE: int = 9994
+SHAPEFILE_VERSION: int = 1000
+SHAPEFILE_HEADER_SIZE: int = 100
+SHX_RECORD_SIZE: int = 8
+
+TIFF_IMAGE_WIDTH_TAG: int = 256
+TIFF_IMAGE_LENGTH_TAG: int = 257
+
+
+def validate_dataset(path: Path):
+    """
+    Checks a dataset file before its upload. Only the headers of the files are read, so the
+    check takes milliseconds also for large files. File types without a validator pass.
+
+    Args:
+        path (Path): dataset file (.shp with sidecars, .zip, .tif/.tiff, ...)
+
+    Raises:
+        DatasetValidationError: if the dataset is broken
+    """
+    if not path.is_file():
+        raise DatasetValidationError(f"{path}: file not found")
+    suffix = path.suffix.lower()
+    if suffix == ".shp":
+        validate_shapefile(path)
+    elif suffix == ".zip":
+        validate_zip(path)
+    elif suffix in (".tif", ".tiff"):
+        validate_geotiff(path)
+
+
+def __read_header__(path: Path, size: int) -> bytes:
+    with path.open("rb") as f:
+        header = f.read(size)
+    if len(header) < size:
+        raise DatasetValidationError(f"{path.name}: truncated header")
+    return header
+
+
+def __shape_header_length__(path: Path) -> int:
+    """checks the main file header of a .shp or .shx file and returns the file length it declares"""
+    header = __read_header__(path, SHAPEFILE_HEADER_SIZE)
+    file_code, file_length = struct.unpack(">i20xi", header[:28])
+    version = struct.unpack("<i", header[28:32])[0]
+    if file_code != SHAPEFILE_FILE_CODE or version != SHAPEFILE_VERSION:
+        raise DatasetValidationError(f"{path.name}: not a shapefile")
+    # the header stores the length in 16 bit words
+    file_length *= 2
+    actual_length = path.stat().st_size
+    if file_length != actual_length:
+        raise DatasetValidationError(
+            f"{path.name}: header declares {file_length} bytes, file has {actual_length} bytes"
+        )
+    return file_length
+
+
+def validate_shapefile(shp_path: Path):
+    """
+    Checks a shapefile: required sidecars (.dbf, .shx, .prj) exist, .shp and .shx headers are
+    valid and match their file size, and .shx and .dbf have the same number of records.
+
+    Raises:
+        DatasetValidationError: if the shapefile is broken
+    """
+    missing = [
+        shp_path.with_suffix(suffix).name
+        for suffix in SHAPEFILE_REQUIRED_SIDECARS
+        if not shp_path.with_suffix(suffix).is_file()
+    ]
+    if missing:
+        raise DatasetValidationError(
+            f"{shp_path.name}: missing sidecar files {', '.join(missing)}"
+        )
+    if shp_path.with_suffix(".prj").stat().st_size == 0:
+        raise DatasetValidationError(f"{shp_path.name}: empty .prj file")
+
+    __shape_header_length__(shp_path)
+    shx_length = __shape_header_length__(shp_path.with_suffix(".shx"))
+    shx_records, remainder = divmod(shx_length - SHAPEFILE_HEADER_SIZE, SHX_RECORD_SIZE)
+    if remainder:
+        raise DatasetValidationError(
+            f"{shp_path.with_suffix('.shx').name}: size is not a multiple of the index record size"
+        )
+
+    dbf_path = shp_path.with_suffix(".dbf")
+    dbf_records, header_length, record_length = struct.unpack(
+        "<4xIHH", __read_header__(dbf_path, 12)
+    )
+    if dbf_path.stat().st_size < header_length + dbf_records * record_length:
+        raise DatasetValidationError(
+            f"{dbf_path.name}: truncated, header declares {dbf_records} records"
+        )
+    if dbf_records != shx_records:
+        raise DatasetValidationError(
+            f"{shp_path.name}: {shx_records} shapes but {dbf_records} attribute records"
+        )
+
+
+def validate_zip(path: Path):
+    """
+    Checks a zip archive by reading its central directory. Shapefiles inside the archive must
+    come with their required sidecars.
+
+    Raises:
+        DatasetValidationError: if the archive is broken
+    """
+    try:
+        with zipfile.ZipFile(path) as archive:
+            names = [
+                name.lower() for name in archive.namelist() if not name.endswith("/")
+            ]
+    except (zipfile.BadZipFile, OSError) as err:
+        raise DatasetValidationError(f"{path.name}: {err}")
+    if not names:
+        raise DatasetValidationError(f"{path.name}: empty archive")
+    for name in names:
+        if not name.endswith(".shp"):
+            continue
+        missing = [
+            name[:-4] + suffix
+            for suffix in SHAPEFILE_REQUIRED_SIDECARS
+            if name[:-4] + suffix not in names
+        ]
+        if missing:
+            raise DatasetValidationError(
+                f"{path.name}: {name} is missing {', '.join(missing)}"
+            )
+
+
+def validate_geotiff(path: Path):
+    """
+    Checks the TIFF (or BigTIFF) header and the first image file directory (IFD), which must
+    lie within the file and declare the image size.
+
+    Raises:
+        DatasetValidationError: if the file is not a readable TIFF
+    """
+    header = __read_header__(path, 16)
+    if header[:2] == b"II":
+        order = "<"
+    elif header[:2] == b"MM":
+        order = ">"
+    else:
+        raise DatasetValidationError(f"{path.name}: not a TIFF file")
+
+    magic = struct.unpack(order + "H", header[2:4])[0]
+    if magic == 42:
+        ifd_offset = struct.unpack(order + "I", header[4:8])[0]
+        count_format, entry_size, entry_tag_format = "H", 12, "H10x"
+    elif magic == 43:
+        ifd_offset = struct.unpack(order + "Q", header[8:16])[0]
+        count_format, entry_size, entry_tag_format = "Q", 20, "H18x"
+    else:
+        raise DatasetValidationError(f"{path.name}: not a TIFF file")
+
+    size = path.stat().st_size
+    count_size = struct.calcsize(count_format)
+    if ifd_offset < 8 or ifd_offset + count_size > size:
+        raise DatasetValidationError(f"{path.name}: first IFD outside of file")
+    with path.open("rb") as f:
+        f.seek(ifd_offset)
+        entries = struct.unpack(order + count_format, f.read(count_size))[0]
+        if entries == 0 or ifd_offset + count_size + entries * entry_size > size:
+            raise DatasetValidationError(f"{path.name}: truncated IFD")
+        ifd = f.read(entries * entry_size)
+    tags = {
+        struct.unpack_from(order + entry_tag_format, ifd, i * entry_size)[0]
+        for i in range(entries)
+    }
+    if not {TIFF_IMAGE_WIDTH_TAG, TIFF_IMAGE_LENGTH_TAG} <= tags:
+        raise DatasetValidationError(f"{path.name}: IFD without image size")
@@ -0,0 +1,127 @@
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import requests
+
+from geonoderest.apiconf import GeonodeApiConf
+from geonoderest.cache import ResponseCache
+from geonoderest.datasets import GeonodeDatasetsHandler
+from geonoderest.executionrequest import GeonodeExecutionRequestHandler
+from geonoderest.session import GeonodeSession
+
+
+def _response(body, status_code=200, headers=None):
+    r = requests.Response()
+    r.status_code = status_code
+    r._content = json.dumps(body).encode("utf-8") if body is not None else b""
+    r.raw = io.BytesIO(b"")
+    r.headers.update(headers or {})
+    return r
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "responses.sqlite"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def handler(self, auth_basic="YWRtaW46YWRtaW4=", **kwargs):
+        conf = GeonodeApiConf(
+            url="https://geonode.example.com/api/v2/",
+            auth_basic=auth_basic,
+            verify=True,
+            cache_path=self.path,
+            **kwargs,
+        )
+        return GeonodeDatasetsHandler(env=conf)
+
+    @patch.object(GeonodeSession, "get")
+    def test_fresh_entry_is_served_without_request(self, mock_get):
+        mock_get.return_value = _response({"dataset": {"pk": 5}})
+        self.handler(cache_ttl=60).get(5)
+        self.assertEqual(self.handler(cache_ttl=60).get(5), {"pk": 5})
+        mock_get.assert_called_once()
+
+    @patch.object(GeonodeSession, "get")
+    def test_stale_entry_is_revalidated(self, mock_get):
+        mock_get.side_effect = [
+            _response({"dataset": {"pk": 5}}, headers={"ETag": '"v1"'}),
+            _response(None, status_code=304),
+        ]
+        self.handler().get(5)
+        self.assertEqual(self.handler().get(5), {"pk": 5})
+        headers = mock_get.call_args.kwargs["headers"]
+        self.assertEqual(headers["If-None-Match"], '"v1"')
+
+    @patch.object(GeonodeSession, "get")
+    def test_entries_are_not_shared_between_users(self, mock_get):
+        mock_get.side_effect = [
+            _response({"dataset": {"pk": 5, "user": "a"}}),
+            _response({"dataset": {"pk": 5, "user": "b"}}),
+        ]
+        self.handler(auth_basic="YTph", cache_ttl=60).get(5)
+        self.assertEqual(
+            self.handler(auth_basic="Yjpi", cache_ttl=60).get(5)["user"], "b"
+        )
+
+    @patch.object(GeonodeSession, "patch")
+    @patch.object(GeonodeSession, "get")
+    def test_patch_invalidates_the_object(self, mock_get, mock_patch):
+        mock_get.side_effect = [
+            _response({"dataset": {"pk": 5, "title": "old"}}),
+            _response({"dataset": {"pk": 5, "title": "new"}}),
+        ]
+        mock_patch.return_value = _response({"dataset": {"pk": 5}})
+        handler = self.handler(cache_ttl=60)
+        handler.get(5)
+        handler.patch(5, json_content={"title": "new"})
+        self.assertEqual(handler.get(5)["title"], "new")
+
+    @patch.object(GeonodeSession, "get")
+    def test_execution_requests_are_polled_past_the_cache(self, mock_get):
+        mock_get.side_effect = [
+            _response({"request": {"exec_id": "e", "status": "running"}}),
+            _response({"request": {"exec_id": "e", "status": "finished"}}),
+        ]
+        conf = GeonodeApiConf(
+            url="https://geonode.example.com/api/v2/",
+            auth_basic="YWRtaW46YWRtaW4=",
+            verify=True,
+            cache_path=self.path,
+            cache_ttl=300,
+        )
+        handler = GeonodeExecutionRequestHandler(env=conf)
+        self.assertEqual(handler.get("e")["status"], "running")
+        self.assertEqual(handler.get("e")["status"], "finished")
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertNotIn("If-None-Match", mock_get.call_args.kwargs["headers"])
+
+    def test_cache_is_private(self):
+        path = Path(self.tmp.name) / "geonodectl" / "responses.sqlite"
+        ResponseCache(path).close()
+        self.assertEqual(path.parent.stat().st_mode & 0o777, 0o700)
+        self.assertEqual(path.stat().st_mode & 0o777, 0o600)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = ResponseCache(self.path, ttl=60, max_size=250)
+        for i in range(3):
+            r = requests.Response()
+            r.status_code = 200
+            r._content = b"x" * 100
+            cache.store(str(i), f"https://x/{i}", r)
+            if i == 1:
+                cache.lookup("0")
+        self.assertIsNotNone(cache.lookup("0"))
+        self.assertIsNone(cache.lookup("1"))
+        self.assertIsNotNone(cache.lookup("2"))
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,6 @@
+import tempfile
 import unittest
+from pathlib import Path
 
 from unittest.mock import patch, call, MagicMock
 from geonoderest.datasets import GeonodeDatasetsHandler
@@ -42,6 +44,120 @@ class TestGeonodeDatasetsHandler(unittest.TestCase):
         )
 
 
+class TestBatchUpload(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmpdir.name)
+        for name in [
+            "roads.shp",
+            "roads.dbf",
+            "roads.shx",
+            "roads.prj",
+            "roads.shp.xml",
+            "dem.tif",
+            "notes.txt",
+        ]:
+            (self.dir / name).write_bytes(b"x")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_collect_groups_shapefile_sidecars(self):
+        with self.assertLogs(level="WARNING") as logs:
+            files = GeonodeDatasetsHandler.__collect_upload_files__(self.dir)
+        self.assertEqual([f.name for f in files], ["dem.tif", "roads.shp"])
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("notes.txt", logs.output[0])
+
+    def test_collect_glob(self):
+        files = GeonodeDatasetsHandler.__collect_upload_files__(self.dir / "*.shp")
+        self.assertEqual([f.name for f in files], ["roads.shp"])
+
+    @patch("geonoderest.executionrequest.time.sleep")
+    @patch("geonoderest.datasets.print_json")
+    @patch.object(GeonodeExecutionRequestHandler, "http_get")
+    @patch.object(GeonodeDatasetsHandler, "upload")
+    def test_cmd_upload_directory_prints_summary(
+        self, mock_upload, mock_er_http_get, mock_print_json, mock_sleep
+    ):
+        mock_upload.side_effect = lambda file_path, **kw: {
+            "execution_id": f"exec-{file_path.stem}"
+        }
+        mock_er_http_get.side_effect = [
+            {
+                "requests": [
+                    {"exec_id": "exec-dem", "status": "running"},
+                    {
+                        "exec_id": "exec-roads",
+                        "status": "finished",
+                        "output_params": {"resources": [{"id": 2}]},
+                    },
+                ]
+            },
+            {
+                "requests": [
+                    {
+                        "exec_id": "exec-dem",
+                        "status": "finished",
+                        "output_params": {"resources": [{"id": 1}]},
+                    }
+                ]
+            },
+        ]
+        handler = GeonodeDatasetsHandler(env={})
+        handler.cmd_upload(file_path=self.dir, wait=True, concurrency=2, json=True)
+        self.assertEqual(mock_upload.call_count, 2)
+        self.assertEqual(mock_er_http_get.call_count, 2)
+        self.assertEqual(
+            mock_er_http_get.call_args_list[0].kwargs["params"]["filter{exec_id.in}"],
+            ["exec-dem", "exec-roads"],
+        )
+        self.assertEqual(
+            mock_print_json.call_args.args[0],
+            [
+                {
+                    "file": str(self.dir / "dem.tif"),
+                    "exec_id": "exec-dem",
+                    "status": "finished",
+                    "skipped": False,
+                    "pks": [1],
+                },
+                {
+                    "file": str(self.dir / "roads.shp"),
+                    "exec_id": "exec-roads",
+                    "status": "finished",
+                    "skipped": False,
+                    "pks": [2],
+                },
+            ],
+        )
+
+    @patch("geonoderest.datasets.print_json")
+    @patch.object(GeonodeDatasetsHandler, "upload")
+    def test_cmd_upload_directory_exits_on_failed_upload(
+        self, mock_upload, mock_print_json
+    ):
+        mock_upload.side_effect = [{"execution_id": "exec-1"}, None]
+        handler = GeonodeDatasetsHandler(env={})
+        with self.assertRaises(SystemExit), self.assertLogs(level="ERROR"):
+            handler.cmd_upload(file_path=self.dir, json=True)
+        statuses = [r["status"] for r in mock_print_json.call_args.args[0]]
+        self.assertEqual(statuses, ["started", "failed"])
+
+    @patch("geonoderest.datasets.print_json")
+    @patch.object(GeonodeDatasetsHandler, "upload")
+    def test_parallel_uploads_report_json_progress(self, mock_upload, _):
+        mock_upload.return_value = {"execution_id": "exec-1"}
+        handler = GeonodeDatasetsHandler(env={})
+        with self.assertLogs(level="WARNING"):
+            handler.cmd_upload(
+                file_path=self.dir, concurrency=2, progress="bar", json=True
+            )
+        self.assertEqual(
+            {c.kwargs["progress"] for c in mock_upload.call_args_list}, {"json"}
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -120,6 +236,100 @@ if __name__ == "__main__":
     unittest.main()
 
 
+class TestFieldProjection(unittest.TestCase):
+    """Tests for dynamic-rest include[]/exclude[] field projection on list and describe."""
+
+    @patch.object(GeonodeDatasetsHandler, "http_get")
+    def test_cmd_list_table_requests_only_header_fields(self, mock_http_get):
+        mock_http_get.return_value = {"datasets": []}
+        handler = GeonodeDatasetsHandler(env={})
+        handler.cmd_list(json=False)
+        params = mock_http_get.call_args.kwargs["params"]
+        self.assertEqual(params["exclude[]"], "*")
+        self.assertEqual(
+            params["include[]"],
+            [
+                "pk",
+                "title",
+                "owner",
+                "date",
+                "is_approved",
+                "is_published",
+                "state",
+                "detail_url",
+            ],
+        )
+
+    @patch.object(GeonodeDatasetsHandler, "http_get")
+    def test_cmd_list_json_requests_full_objects(self, mock_http_get):
+        mock_http_get.return_value = {"datasets": []}
+        handler = GeonodeDatasetsHandler(env={})
+        handler.cmd_list(json=True)
+        self.assertNotIn("include[]", mock_http_get.call_args.kwargs["params"])
+
+    @patch.object(GeonodeDatasetsHandler, "http_get")
+    def test_cmd_list_custom_fields(self, mock_http_get):
+        mock_http_get.return_value = {"datasets": [{"pk": 1, "abstract": "a"}]}
+        handler = GeonodeDatasetsHandler(env={})
+        handler.cmd_list(json=False, include_fields=["pk", "abstract"])
+        params = mock_http_get.call_args.kwargs["params"]
+        self.assertEqual(params["include[]"], ["pk", "abstract"])
+
+    @patch.object(GeonodeDatasetsHandler, "http_get")
+    def test_get_with_fields(self, mock_http_get):
+        mock_http_get.return_value = {"dataset": {"pk": 1}}
+        handler = GeonodeDatasetsHandler(env={})
+        handler.get(pk=1, include_fields=["pk"])
+        mock_http_get.assert_called_once_with(
+            endpoint="datasets/1", params={"exclude[]": "*", "include[]": ["pk"]}
+        )
+
+
+class TestStreamOutput(unittest.TestCase):
+    """Tests for --output ndjson|csv|tsv streaming list output."""
+
+    _records = [
+        {"pk": 1, "title": "a", "owner": {"username": "admin"}},
+        {"pk": 2, "title": "b", "owner": {"username": "bob"}},
+    ]
+
+    def _cmd_list(self, output):
+        import io
+        from contextlib import redirect_stdout
+
+        handler = GeonodeDatasetsHandler(env={})
+        buf = io.StringIO()
+        with (
+            patch.object(
+                GeonodeDatasetsHandler, "iter_all", return_value=iter(self._records)
+            ) as mock_iter_all,
+            redirect_stdout(buf),
+        ):
+            handler.cmd_list(json=False, all_pages=True, output=output)
+        return buf.getvalue(), mock_iter_all
+
+    def test_ndjson_writes_one_full_record_per_line(self):
+        out, mock_iter_all = self._cmd_list("ndjson")
+        import json
+
+        self.assertEqual([json.loads(line) for line in out.splitlines()], self._records)
+        self.assertIsNone(mock_iter_all.call_args.kwargs["include_fields"])
+
+    def test_csv_writes_header_columns(self):
+        out, mock_iter_all = self._cmd_list("csv")
+        lines = out.splitlines()
+        self.assertEqual(
+            lines[0],
+            "pk,title,owner.username,date,is_approved,is_published,state,detail_url",
+        )
+        self.assertEqual(lines[2], "2,b,bob,,,,,")
+        self.assertIn("owner", mock_iter_all.call_args.kwargs["include_fields"])
+
+    def test_tsv_uses_tabs(self):
+        out, _ = self._cmd_list("tsv")
+        self.assertEqual(out.splitlines()[1].split("\t")[:3], ["1", "a", "admin"])
+
+
 class TestPkRangeParsing(unittest.TestCase):
     """Tests for __parse_pk_string__ range/list/single pk parsing.
     Regression/feature test for: https://github.com/GeoNodeUserGroup-DE/geonodectl/issues/122
@@ -223,6 +433,39 @@ class TestCmdDescribeRange(unittest.TestCase):
         self.assertEqual(endpoints, ["datasets/10", "datasets/20", "datasets/30"])
 
 
+class TestConcurrentPkCommands(unittest.TestCase):
+    """Tests for --concurrency on cmd_delete, cmd_patch and cmd_describe."""
+
+    @patch("builtins.print")
+    @patch.object(GeonodeDatasetsHandler, "http_delete")
+    def test_cmd_delete_concurrent_keeps_pk_order(self, mock_http_delete, mock_print):
+        """output of concurrent deletes follows the pk order, not the completion order."""
+        import time as _time
+
+        def _delete(endpoint):
+            pk = int(endpoint.split("/")[1])
+            _time.sleep(0.01 * (5 - pk))
+            return {}
+
+        mock_http_delete.side_effect = _delete
+        handler = GeonodeDatasetsHandler(env={})
+        handler.cmd_delete(pk="1-5", concurrency=4)
+        printed = [c.args[0] for c in mock_print.call_args_list]
+        self.assertEqual(printed, [f"datasets: {pk} deleted ..." for pk in range(1, 6)])
+
+    @patch.object(GeonodeDatasetsHandler, "http_get")
+    def test_cmd_describe_concurrent_reports_failures(self, mock_http_get):
+        """failing pks are reported like in sequential mode."""
+        mock_http_get.side_effect = lambda endpoint: (
+            None if endpoint.endswith("/2") else {"dataset": {"pk": 1}}
+        )
+        handler = GeonodeDatasetsHandler(env={})
+        with self.assertLogs(level="WARNING") as logs:
+            handler.cmd_describe(pk="1,2,3", concurrency=3)
+        self.assertEqual(logs.output, ["WARNING:root:describing 2 failed ... "])
+        self.assertEqual(mock_http_get.call_count, 3)
+
+
 class TestWaitForUpload(unittest.TestCase):
     """Tests for __wait_for_upload__ and cmd_upload --wait.
     Feature test for: https://github.com/GeoNodeUserGroup-DE/geonodectl/issues/80
@@ -261,6 +504,22 @@ class TestWaitForUpload(unittest.TestCase):
         with self.assertRaises(SystemExit):
             handler.__wait_for_upload__(exec_id="abc-123", poll_interval=0)
 
+    @patch("geonoderest.datasets.time.sleep")
+    @patch("geonoderest.datasets.time.monotonic")
+    @patch.object(GeonodeExecutionRequestHandler, "get")
+    def test_wait_for_upload_backs_off_and_honors_timeout(
+        self, mock_get, mock_monotonic, mock_sleep
+    ):
+        """__wait_for_upload__ polls with growing intervals and exits at the timeout."""
+        mock_get.return_value = self._make_er("running")
+        mock_monotonic.side_effect = [0, 0, 0.5, 1.5, 2]
+        handler = GeonodeDatasetsHandler(env={})
+        with self.assertRaises(SystemExit), self.assertLogs(level="ERROR"):
+            handler.__wait_for_upload__(exec_id="abc-123", timeout=2)
+        self.assertEqual(
+            [c.args[0] for c in mock_sleep.call_args_list], [0.5, 0.75, 0.5]
+        )
+
     @patch.object(GeonodeDatasetsHandler, "__wait_for_upload__")
     @patch.object(GeonodeDatasetsHandler, "get")
     @patch.object(GeonodeDatasetsHandler, "upload")
@@ -288,7 +547,7 @@ class TestWaitForUpload(unittest.TestCase):
             wait=True,
             json=True,
         )
-        mock_wait.assert_called_once_with(exec_id="exec-001")
+        mock_wait.assert_called_once_with(exec_id="exec-001", timeout=None, size=0)
         self.assertEqual(mock_ds_get.call_count, 2)
 
     @patch.object(GeonodeDatasetsHandler, "upload")
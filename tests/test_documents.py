@@ -1,4 +1,5 @@
 import unittest
+from pathlib import Path
 from unittest.mock import patch
 from geonoderest.documents import GeonodeDocumentsHandler
 import unittest
@@ -31,6 +32,19 @@ class TestGeonodeDocumentsHandler(unittest.TestCase):
         handler.delete(pk=7)
         mock_http_delete.assert_called_once_with(endpoint="resources/7/delete")
 
+    @patch.object(GeonodeDocumentsHandler, "http_download")
+    @patch.object(GeonodeDocumentsHandler, "http_get")
+    def test_download_streams_document_href(self, mock_http_get, mock_download):
+        mock_http_get.return_value = {
+            "document": {"pk": 7, "href": "https://x/documents/7/download"}
+        }
+        mock_download.return_value = 42
+        handler = GeonodeDocumentsHandler(env={})
+        handler.cmd_download(pk=7, out_path=Path("report.pdf"))
+        mock_download.assert_called_once_with(
+            "https://x/documents/7/download", out=Path("report.pdf"), resume=False
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,142 @@
+import datetime
+import io
+import itertools
+import json
+import unittest
+from unittest.mock import patch
+
+from geonoderest.executionrequest import (
+    GeonodeExecutionRequestHandler,
+    GeonodeExecutionRequestWatcher,
+    notice_latency,
+    poll_intervals,
+)
+
+
+class TestPollIntervals(unittest.TestCase):
+    def test_backs_off_exponentially_up_to_cap(self):
+        intervals = list(itertools.islice(poll_intervals(), 12))
+        self.assertEqual(intervals[:3], [0.5, 0.75, 1.125])
+        self.assertEqual(intervals[-1], 30.0)
+        self.assertEqual(intervals, sorted(intervals))
+
+    def test_first_interval_scales_with_size(self):
+        self.assertEqual(next(poll_intervals(size=1024 * 1024 * 1024)), 5.62)
+        self.assertEqual(next(poll_intervals(size=100 * 1024 * 1024 * 1024)), 30.0)
+
+    def test_fixed_interval(self):
+        self.assertEqual(list(itertools.islice(poll_intervals(2), 3)), [2, 2, 2])
+
+    def test_notice_latency(self):
+        finished = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(
+            seconds=4
+        )
+        latency = notice_latency({"finished": finished.isoformat()})
+        self.assertAlmostEqual(latency, 4, delta=1)
+        self.assertIsNone(notice_latency({"finished": None}))
+
+
+class TestGeonodeExecutionRequestWatcher(unittest.TestCase):
+    @patch("geonoderest.executionrequest.time.sleep")
+    @patch.object(GeonodeExecutionRequestHandler, "http_get")
+    def test_watch_polls_all_exec_ids_with_one_request(self, mock_http_get, mock_sleep):
+        mock_http_get.side_effect = [
+            {
+                "requests": [
+                    {"exec_id": "a", "status": "failed"},
+                    {"exec_id": "b", "status": "running"},
+                    {"exec_id": "c", "status": "running"},
+                ]
+            },
+            None,
+            {
+                "requests": [
+                    {"exec_id": "b", "status": "finished"},
+                    {"exec_id": "c", "status": "running"},
+                ]
+            },
+            {"requests": [{"exec_id": "c", "status": "finished"}]},
+        ]
+        handler = GeonodeExecutionRequestHandler(env={})
+        watcher = GeonodeExecutionRequestWatcher(
+            handler=handler, exec_ids=["a", "b", "c"], poll_interval=3
+        )
+        with self.assertLogs(level="WARNING"):
+            done = [er["exec_id"] for er in watcher.watch()]
+        self.assertEqual(done, ["a", "b", "c"])
+        self.assertEqual(mock_http_get.call_count, 4)
+        self.assertEqual(
+            [
+                c.kwargs["params"]["filter{exec_id.in}"]
+                for c in mock_http_get.call_args_list
+            ],
+            [["a", "b", "c"], ["b", "c"], ["b", "c"], ["c"]],
+        )
+        self.assertEqual(mock_sleep.call_count, 3)
+        mock_sleep.assert_called_with(3)
+
+    @patch("geonoderest.executionrequest.time.sleep")
+    @patch("geonoderest.executionrequest.time.monotonic")
+    @patch.object(GeonodeExecutionRequestHandler, "http_get")
+    def test_watch_stops_at_timeout(self, mock_http_get, mock_monotonic, mock_sleep):
+        mock_http_get.return_value = {
+            "requests": [{"exec_id": "a", "status": "running"}]
+        }
+        mock_monotonic.side_effect = [0, 0, 7, 10]
+        handler = GeonodeExecutionRequestHandler(env={})
+        watcher = GeonodeExecutionRequestWatcher(
+            handler=handler, exec_ids=["a"], poll_interval=7, timeout=10
+        )
+        self.assertEqual(list(watcher.watch()), [])
+        self.assertEqual(watcher.pending, {"a"})
+        self.assertEqual([c.args[0] for c in mock_sleep.call_args_list], [7, 3])
+
+    @patch("geonoderest.executionrequest.time.sleep")
+    @patch.object(GeonodeExecutionRequestHandler, "http_get")
+    def test_unknown_exec_id_is_reported_failed(self, mock_http_get, mock_sleep):
+        mock_http_get.return_value = {
+            "requests": [{"exec_id": "a", "status": "running"}]
+        }
+        handler = GeonodeExecutionRequestHandler(env={})
+        watcher = GeonodeExecutionRequestWatcher(
+            handler=handler, exec_ids=["a", "typo"], poll_interval=1
+        )
+        with self.assertLogs(level="ERROR"):
+            er = next(watcher.watch())
+        self.assertEqual((er["exec_id"], er["status"]), ("typo", "failed"))
+        self.assertEqual(watcher.pending, {"a"})
+        self.assertEqual(mock_http_get.call_count, 2)
+
+    @patch.object(GeonodeExecutionRequestHandler, "http_get")
+    def test_list_by_exec_ids_chunks_large_sets(self, mock_http_get):
+        mock_http_get.return_value = {"requests": []}
+        handler = GeonodeExecutionRequestHandler(env={})
+        handler.list_by_exec_ids([str(i) for i in range(250)])
+        self.assertEqual(
+            [c.kwargs["params"]["page_size"] for c in mock_http_get.call_args_list],
+            [100, 100, 50],
+        )
+
+
+class TestGeonodeExecutionRequestList(unittest.TestCase):
+    @patch.object(GeonodeExecutionRequestHandler, "http_get")
+    def test_cmd_list_streams_ndjson(self, mock_http_get):
+        mock_http_get.return_value = {
+            "requests": [{"exec_id": "a", "status": "running"}]
+        }
+        handler = GeonodeExecutionRequestHandler(env={})
+        with patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            handler.cmd_list(output="ndjson", json=False)
+        self.assertEqual(
+            json.loads(stdout.getvalue()), {"exec_id": "a", "status": "running"}
+        )
+
+    @patch.object(GeonodeExecutionRequestHandler, "http_get", return_value=None)
+    def test_cmd_list_warns_on_failed_listing(self, _):
+        handler = GeonodeExecutionRequestHandler(env={})
+        with self.assertLogs(level="WARNING"):
+            handler.cmd_list(json=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,257 @@
+import base64
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from geonoderest.apiconf import GeonodeApiConf
+from geonoderest.datasets import GeonodeDatasetsHandler, TRANSFER_ID_FIELD
+from geonoderest.executionrequest import GeonodeExecutionRequestHandler
+from geonoderest.ledger import UploadLedger
+from geonoderest.exceptions import GeoNodeRestException
+
+
+class TestUploadLedger(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmpdir.name)
+        self.ledger = UploadLedger(self.dir / "state" / "ledger.sqlite")
+
+    def tearDown(self):
+        self.ledger.close()
+        self.tmpdir.cleanup()
+
+    def _write(self, name, content):
+        path = self.dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        return path
+
+    def test_ledger_is_private(self):
+        self.assertEqual(self.ledger.path.parent.stat().st_mode & 0o777, 0o700)
+        self.assertEqual(self.ledger.path.stat().st_mode & 0o777, 0o600)
+
+    def test_hash_file_set_depends_on_names_and_content_only(self):
+        a = [self._write("a/x.shp", b"1"), self._write("a/x.dbf", b"2")]
+        b = [self._write("b/x.dbf", b"2"), self._write("b/x.shp", b"1")]
+        self.assertEqual(self.ledger.hash_file_set(a), self.ledger.hash_file_set(b))
+        self._write("b/x.dbf", b"3")
+        self.assertNotEqual(self.ledger.hash_file_set(a), self.ledger.hash_file_set(b))
+
+    def test_unchanged_files_are_not_read_again(self):
+        path = self._write("x.tif", b"raster")
+        first = self.ledger.hash_file(path)
+        with patch.object(Path, "open", side_effect=AssertionError("read")):
+            self.assertEqual(self.ledger.hash_file(path), first)
+
+    def test_record_lookup_forget(self):
+        self.assertIsNone(self.ledger.lookup("https://a/", "h"))
+        self.ledger.record(url="https://a/", content_hash="h", file="x", exec_id="e")
+        self.assertIsNone(self.ledger.lookup("https://b/", "h"))
+        self.ledger.set_pks("https://a/", "h", [5])
+        entry = self.ledger.lookup("https://a/", "h")
+        self.assertEqual((entry["exec_id"], entry["pks"]), ("e", [5]))
+        self.ledger.forget("https://a/", "h")
+        self.assertIsNone(self.ledger.lookup("https://a/", "h"))
+
+
+class TestSkipUnchanged(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmpdir.name)
+        self.path = self.dir / "dem.gpkg"
+        self.path.write_bytes(b"raster")
+        self.ledger_path = self.dir / "ledger.sqlite"
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    @patch.object(GeonodeDatasetsHandler, "list_by_pks", return_value=[{"pk": 9}])
+    @patch.object(GeonodeExecutionRequestHandler, "list_by_exec_ids")
+    @patch.object(GeonodeDatasetsHandler, "http_post")
+    @patch.object(GeonodeDatasetsHandler, "url", "https://x/api/v2/")
+    def test_second_upload_of_same_content_is_skipped(self, mock_post, mock_list, _):
+        mock_post.return_value = {"execution_id": "exec-1"}
+        mock_list.return_value = [
+            {
+                "exec_id": "exec-1",
+                "status": "finished",
+                "output_params": {"resources": [{"id": 9}]},
+            }
+        ]
+        handler = GeonodeDatasetsHandler(env={})
+        kwargs = dict(skip_unchanged=True, ledger_path=self.ledger_path)
+
+        self.assertEqual(
+            handler.upload(file_path=self.path, **kwargs)["execution_id"], "exec-1"
+        )
+        with self.assertLogs(level="INFO"):
+            r = handler.upload(file_path=self.path, **kwargs)
+        self.assertEqual(
+            r, {"execution_id": "exec-1", "status": "finished", "skipped": True}
+        )
+        self.assertEqual(mock_post.call_count, 1)
+        with UploadLedger(self.ledger_path) as ledger:
+            content_hash = ledger.hash_file_set([self.path])
+            self.assertEqual(
+                ledger.lookup("https://x/api/v2/", content_hash)["pks"], [9]
+            )
+
+        # a failed import on the server is uploaded again
+        mock_list.return_value = [{"exec_id": "exec-1", "status": "failed"}]
+        mock_post.return_value = {"execution_id": "exec-2"}
+        self.assertEqual(
+            handler.upload(file_path=self.path, **kwargs)["execution_id"], "exec-2"
+        )
+        self.assertEqual(mock_post.call_count, 2)
+
+    @patch.object(GeonodeDatasetsHandler, "list_by_pks")
+    @patch.object(GeonodeExecutionRequestHandler, "list_by_exec_ids")
+    @patch.object(GeonodeDatasetsHandler, "http_post")
+    @patch.object(GeonodeDatasetsHandler, "url", "https://x/api/v2/")
+    def test_deleted_dataset_is_uploaded_again(
+        self, mock_post, mock_list, mock_list_by_pks
+    ):
+        mock_post.side_effect = [{"execution_id": "exec-1"}, {"execution_id": "exec-2"}]
+        mock_list.return_value = [
+            {
+                "exec_id": "exec-1",
+                "status": "finished",
+                "output_params": {"resources": [{"id": 9}]},
+            }
+        ]
+        mock_list_by_pks.return_value = []
+        handler = GeonodeDatasetsHandler(env={})
+        kwargs = dict(skip_unchanged=True, ledger_path=self.ledger_path)
+
+        handler.upload(file_path=self.path, **kwargs)
+        with self.assertLogs(level="INFO"):
+            r = handler.upload(file_path=self.path, **kwargs)
+        self.assertEqual(r["execution_id"], "exec-2")
+        mock_list_by_pks.assert_called_once_with([9], include_fields=["pk"])
+        self.assertEqual(mock_post.call_count, 2)
+
+
+class TestResume(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmpdir.name)
+        self.path = self.dir / "dem.gpkg"
+        self.path.write_bytes(b"vector")
+        self.kwargs = dict(resume=True, ledger_path=self.dir / "ledger.sqlite")
+        self.env = GeonodeApiConf(
+            url="https://x/api/v2/",
+            auth_basic=base64.b64encode(b"alice:secret").decode(),
+            verify=True,
+        )
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _find_latest(self, candidates):
+        def _find(name, created_since, match):
+            return next((er for er in candidates if match(er)), None)
+
+        return _find
+
+    @patch.object(GeonodeDatasetsHandler, "list_by_pks")
+    @patch.object(GeonodeExecutionRequestHandler, "find_latest")
+    @patch.object(GeonodeExecutionRequestHandler, "list_by_exec_ids")
+    @patch.object(GeonodeDatasetsHandler, "http_post")
+    @patch.object(GeonodeDatasetsHandler, "url", "https://x/api/v2/")
+    def test_interrupted_transfer_is_reattached(
+        self, mock_post, mock_list, mock_find, mock_list_by_pks
+    ):
+        mock_post.side_effect = GeoNodeRestException("connection reset")
+        handler = GeonodeDatasetsHandler(env=self.env)
+        with self.assertRaises(GeoNodeRestException):
+            handler.upload(file_path=self.path, **self.kwargs)
+        transfer_id = mock_post.call_args.kwargs["data"][TRANSFER_ID_FIELD]
+
+        # uploads of the same name by other users or other transfers are not re-attached
+        mock_find.side_effect = self._find_latest(
+            [
+                {
+                    "exec_id": "exec-0",
+                    "user": "bob",
+                    "input_params": {TRANSFER_ID_FIELD: transfer_id},
+                },
+                {
+                    "exec_id": "exec-9",
+                    "user": "alice",
+                    "input_params": {TRANSFER_ID_FIELD: "other"},
+                },
+                {
+                    "exec_id": "exec-1",
+                    "user": "alice",
+                    "status": "running",
+                    "input_params": {TRANSFER_ID_FIELD: transfer_id},
+                },
+            ]
+        )
+        with self.assertLogs(level="INFO"):
+            r = handler.upload(file_path=self.path, **self.kwargs)
+        self.assertEqual(r["execution_id"], "exec-1")
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertEqual(mock_find.call_args.kwargs["name"], "dem.gpkg")
+
+        # once the import is known to be finished, the file is skipped without asking the server
+        mock_list.return_value = [
+            {
+                "exec_id": "exec-1",
+                "status": "finished",
+                "output_params": {"resources": [{"id": 3}]},
+            }
+        ]
+        mock_list_by_pks.return_value = [{"pk": 3}]
+        handler.upload(file_path=self.path, **self.kwargs)
+        mock_list.reset_mock()
+        with self.assertLogs(level="INFO"):
+            r = handler.upload(file_path=self.path, **self.kwargs)
+        self.assertEqual(r["status"], "finished")
+        mock_list.assert_not_called()
+        self.assertEqual(mock_post.call_count, 1)
+
+        # a dataset deleted on the server is uploaded again, even with resume
+        mock_list_by_pks.return_value = []
+        mock_post.side_effect = None
+        mock_post.return_value = {"execution_id": "exec-2"}
+        with self.assertLogs(level="INFO"):
+            r = handler.upload(file_path=self.path, **self.kwargs)
+        self.assertEqual(r["execution_id"], "exec-2")
+        self.assertEqual(mock_post.call_count, 2)
+
+    @patch.object(GeonodeExecutionRequestHandler, "find_latest")
+    @patch.object(GeonodeDatasetsHandler, "http_post")
+    @patch.object(GeonodeDatasetsHandler, "url", "https://x/api/v2/")
+    def test_foreign_upload_is_not_reattached(self, mock_post, mock_find):
+        mock_post.side_effect = GeoNodeRestException("connection reset")
+        handler = GeonodeDatasetsHandler(env=self.env)
+        with self.assertRaises(GeoNodeRestException):
+            handler.upload(file_path=self.path, **self.kwargs)
+
+        # the server does not keep the transfer id: the file is sent again
+        mock_find.side_effect = self._find_latest(
+            [{"exec_id": "exec-0", "user": "alice", "status": "running"}]
+        )
+        mock_post.side_effect = None
+        mock_post.return_value = {"execution_id": "exec-2"}
+        r = handler.upload(file_path=self.path, **self.kwargs)
+        self.assertEqual(r["execution_id"], "exec-2")
+        self.assertEqual(mock_post.call_count, 2)
+
+    @patch.object(GeonodeDatasetsHandler, "http_post")
+    @patch.object(GeonodeDatasetsHandler, "url", "https://x/api/v2/")
+    def test_answer_without_execution_request_ends_transfer(self, mock_post):
+        mock_post.return_value = None
+        handler = GeonodeDatasetsHandler(env=self.env)
+        self.assertIsNone(handler.upload(file_path=self.path, **self.kwargs))
+        with UploadLedger(self.kwargs["ledger_path"]) as ledger:
+            content_hash = ledger.hash_file_set([self.path])
+            self.assertIsNone(
+                ledger.pending_transfer("https://x/api/v2/", content_hash)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,25 @@
+import json
+import tempfile
 import unittest
-from unittest.mock import patch
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+from geonoderest import maps
+from geonoderest.apiconf import GeonodeApiConf
 from geonoderest.maps import GeonodeMapsHandler
+from geonoderest.datasets import GeonodeDatasetsHandler
+from geonoderest.exceptions import GeoNodeRestException
+
+
+def _dataset(pk):
+    return {
+        "pk": pk,
+        "title": f"ds {pk}",
+        "alternate": f"geonode:ds_{pk}",
+        "subtype": "vector",
+        "ptype": "gxp_wmscsource",
+        "links": [{"link_type": "OGC:WFS", "url": "https://x/wfs"}],
+        "extent": {"srid": "EPSG:4326", "coords": [0, 0, 1, 1]},
+    }
 
 
 class TestGeonodeMapsHandler(unittest.TestCase):
@@ -27,5 +46,139 @@ class TestGeonodeMapsHandler(unittest.TestCase):
         mock_http_delete.assert_called_once_with(endpoint="resources/5/delete")
 
 
+@patch.object(
+    GeonodeMapsHandler,
+    "__build_blob_data__",
+    side_effect=lambda **kwargs: {"map": {"layers": []}},
+)
+class TestMapCreate(unittest.TestCase):
+    @patch.object(GeonodeMapsHandler, "http_post", return_value={"map": {"pk": 9}})
+    @patch.object(GeonodeDatasetsHandler, "http_get")
+    def test_maplayers_are_fetched_in_one_listing(self, mock_http_get, mock_post, _):
+        mock_http_get.return_value = {"datasets": [_dataset(1), _dataset(3)]}
+        handler = GeonodeMapsHandler(env={})
+        self.assertEqual(handler.create(title="t", maplayers=[3, 1, 3]), {"pk": 9})
+
+        mock_http_get.assert_called_once()
+        params = mock_http_get.call_args.kwargs["params"]
+        self.assertEqual(params["filter{pk.in}"], [3, 1])
+        json_content = mock_post.call_args.kwargs["json"]
+        self.assertEqual(
+            [layer["name"] for layer in json_content["blob"]["map"]["layers"]],
+            ["geonode:ds_3", "geonode:ds_1", "geonode:ds_3"],
+        )
+        self.assertEqual([m["order"] for m in json_content["maplayers"]], [0, 1, 2])
+
+    @patch.object(GeonodeMapsHandler, "http_post")
+    @patch.object(GeonodeDatasetsHandler, "http_get")
+    def test_missing_maplayers_are_listed(self, mock_http_get, mock_post, _):
+        mock_http_get.return_value = {"datasets": [_dataset(1)]}
+        handler = GeonodeMapsHandler(env={})
+        with self.assertRaises(GeoNodeRestException) as ctx:
+            handler.create(title="t", maplayers=[1, 7, 8])
+        self.assertIn("7, 8", str(ctx.exception))
+        mock_post.assert_not_called()
+
+    @patch.object(GeonodeMapsHandler, "__map_template__", return_value={})
+    @patch.object(GeonodeMapsHandler, "http_post")
+    @patch.object(GeonodeDatasetsHandler, "http_get")
+    def test_manifest_fetches_datasets_once(
+        self, mock_http_get, mock_post, mock_template, _
+    ):
+        mock_http_get.return_value = {"datasets": [_dataset(1), _dataset(3)]}
+        mock_post.side_effect = [{"map": {"pk": 10}}, None]
+        with tempfile.TemporaryDirectory() as tmp:
+            manifest = Path(tmp) / "maps.jsonl"
+            manifest.write_text(
+                '{"title": "a", "maplayers": [1, 3], "abstract": "x"}\n'
+                "\n"
+                '{"title": "b", "maplayers": [3]}\n'
+            )
+            results = GeonodeMapsHandler(env={}).create_from_manifest(manifest)
+
+        mock_http_get.assert_called_once()
+        mock_template.assert_called_once_with(None)
+        self.assertEqual(
+            mock_http_get.call_args.kwargs["params"]["filter{pk.in}"], [1, 3]
+        )
+        self.assertEqual(mock_post.call_args_list[0].kwargs["json"]["abstract"], "x")
+        self.assertEqual(
+            [(r["line"], r["pk"], r["status"]) for r in results],
+            [(1, 10, "created"), (3, None, "failed")],
+        )
+
+    @patch.object(GeonodeMapsHandler, "http_post")
+    @patch.object(GeonodeMapsHandler, "http_get_download", return_value=None)
+    def test_manifest_fails_fast_without_template(self, mock_download, mock_post, _):
+        maps._map_templates.clear()
+        with tempfile.TemporaryDirectory() as tmp:
+            manifest = Path(tmp) / "maps.jsonl"
+            manifest.write_text('{"title": "a"}\n{"title": "b"}\n')
+            conf = GeonodeApiConf(
+                url="https://geonode.example.com/api/v2/",
+                auth_basic="YWRtaW46YWRtaW4=",
+                verify=True,
+                cache_path=Path(tmp) / "responses.sqlite",
+            )
+            with self.assertRaises(GeoNodeRestException):
+                GeonodeMapsHandler(env=conf).create_from_manifest(
+                    manifest, concurrency=4
+                )
+        mock_download.assert_called_once()
+        mock_post.assert_not_called()
+
+    def test_manifest_rejects_maplayers(self, _):
+        with self.assertRaises(SystemExit):
+            GeonodeMapsHandler(env={}).cmd_create(
+                title=None, maplayers=[1], manifest_path=Path("maps.jsonl")
+            )
+
+    def test_manifest_line_without_title(self, _):
+        with tempfile.TemporaryDirectory() as tmp:
+            manifest = Path(tmp) / "maps.jsonl"
+            manifest.write_text('{"maplayers": [1]}\n')
+            with self.assertRaises(SystemExit) as ctx:
+                GeonodeMapsHandler(env={}).create_from_manifest(manifest)
+        self.assertIn("maps.jsonl:1", str(ctx.exception))
+
+
+class TestMapTemplate(unittest.TestCase):
+    def setUp(self):
+        maps._map_templates.clear()
+        self.conf = GeonodeApiConf(
+            url="https://geonode.example.com/api/v2/",
+            auth_basic="YWRtaW46YWRtaW4=",
+            verify=True,
+        )
+
+    @patch("geonoderest.maps.ResponseCache")
+    @patch.object(GeonodeMapsHandler, "http_get_download")
+    def test_template_is_downloaded_once(self, mock_download, mock_cache):
+        r = MagicMock()
+        r.json.return_value = {"map": {"layers": []}}
+        mock_download.return_value = r
+        first = GeonodeMapsHandler(env=self.conf).__build_blob_data__()
+        second = GeonodeMapsHandler(env=self.conf).__build_blob_data__()
+
+        mock_download.assert_called_once()
+        self.assertEqual(
+            mock_download.call_args.args[0],
+            "https://geonode.example.com/static/mapstore/configs/map.json",
+        )
+        self.assertEqual(len(first["map"]["layers"]), 4)
+        self.assertEqual(second, first)
+
+    @patch.object(GeonodeMapsHandler, "http_get_download")
+    def test_local_template_needs_no_request(self, mock_download):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "map.json"
+            path.write_text(json.dumps({"version": 2, "map": {"layers": []}}))
+            blob = GeonodeMapsHandler(env=self.conf).__build_blob_data__(
+                map_template=path
+            )
+        mock_download.assert_not_called()
+        self.assertEqual(blob["version"], 2)
+
+
 if __name__ == "__main__":
     unittest.main()
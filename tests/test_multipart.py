@@ -0,0 +1,256 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from email.parser import BytesParser
+from email.policy import HTTP
+from unittest.mock import patch
+
+from geonoderest.datasets import GeonodeDatasetsHandler
+from geonoderest.multipart import MultipartEncoder, ZipArchive
+from geonoderest.progress import UploadProgress
+
+
+def _parse(encoder: MultipartEncoder, chunk_size: int = 7):
+    body = b""
+    while True:
+        chunk = encoder.read(chunk_size)
+        if not chunk:
+            break
+        assert len(chunk) <= chunk_size
+        body += chunk
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {encoder.content_type}\r\n\r\n".encode() + body
+    )
+    return body, list(message.iter_parts())
+
+
+class TestMultipartEncoder(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".shp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(os.urandom(100_000))
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_body_matches_fields_and_files(self):
+        with open(self.path, "rb") as f:
+            content = f.read()
+        encoder = MultipartEncoder(
+            fields={"charset": "UTF-8", "time": False},
+            files=[
+                (
+                    "base_file",
+                    ("test.shp", open(self.path, "rb"), "application/octet-stream"),
+                ),
+                ("prj_file", ("test.prj", io.BytesIO(b"GEOGCS[]"))),
+            ],
+        )
+        length = len(encoder)
+        body, parts = _parse(encoder)
+        encoder.close()
+
+        self.assertEqual(len(body), length)
+        self.assertEqual(
+            [p.get_param("name", header="content-disposition") for p in parts],
+            ["charset", "time", "base_file", "prj_file"],
+        )
+        self.assertEqual(parts[1].get_payload(decode=True), b"False")
+        self.assertEqual(parts[2].get_filename(), "test.shp")
+        self.assertEqual(parts[2].get_payload(decode=True), content)
+        self.assertEqual(parts[3].get_payload(decode=True), b"GEOGCS[]")
+
+    def test_empty_file(self):
+        open(self.path, "wb").close()
+        encoder = MultipartEncoder(
+            files=[("base_file", ("a.csv", open(self.path, "rb")))]
+        )
+        body, parts = _parse(encoder)
+        encoder.close()
+        self.assertEqual(len(body), len(encoder))
+        self.assertEqual(parts[0].get_payload(decode=True), b"")
+
+
+class TestZipStream(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.paths = []
+        for name, content in [("roads.shp", b"s" * 5000), ("roads.dbf", b" " * 300000)]:
+            path = Path(self.tmpdir.name) / name
+            path.write_bytes(content)
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_stored_size_is_exact(self):
+        (Path(self.tmpdir.name) / "straßen.cpg").write_bytes(b"UTF-8")
+        paths = self.paths + [Path(self.tmpdir.name) / "straßen.cpg"]
+        # small limits make zipfile use all zip64 extensions
+        for limits in [
+            {"ZIP64_LIMIT": zipfile.ZIP64_LIMIT},
+            {"ZIP64_LIMIT": 4000, "ZIP_FILECOUNT_LIMIT": 2},
+        ]:
+            with self.subTest(**limits), patch.multiple(zipfile, **limits):
+                stream = ZipArchive(paths).open()
+                data = stream.read(10**7)
+                self.assertEqual(stream.read(), b"")
+                self.assertEqual(len(data), stream.size)
+                with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                    self.assertIsNone(archive.testzip())
+
+    def test_deflated_size_is_counted_without_temporary_file(self):
+        archive = ZipArchive(self.paths, compression=zipfile.ZIP_DEFLATED)
+        with patch("tempfile.TemporaryFile", side_effect=AssertionError):
+            encoder = MultipartEncoder(
+                fields={"charset": "UTF-8"},
+                files=[
+                    (field, ("roads.zip", archive.open(), "application/zip"))
+                    for field in ("base_file", "zip_file")
+                ],
+            )
+            body, parts = _parse(encoder, chunk_size=65536)
+        encoder.close()
+        self.assertEqual(len(body), len(encoder))
+        for part in parts[1:]:
+            payload = part.get_payload(decode=True)
+            self.assertEqual(len(payload), archive.size)
+            self.assertLess(len(payload), 300000)
+            with zipfile.ZipFile(io.BytesIO(payload)) as received:
+                self.assertIsNone(received.testzip())
+                self.assertEqual(received.read("roads.dbf"), b" " * 300000)
+                self.assertEqual(received.namelist(), ["roads.shp", "roads.dbf"])
+
+    def test_deflated_size_is_counted_once(self):
+        archive = ZipArchive(self.paths, compression=zipfile.ZIP_DEFLATED)
+        with patch.object(
+            ZipArchive,
+            "__generate__",
+            autospec=True,
+            side_effect=lambda self: iter([b"z"]),
+        ) as mock_generate:
+            self.assertEqual(archive.size, 1)
+            self.assertEqual(archive.size, 1)
+        self.assertEqual(mock_generate.call_count, 1)
+
+    def test_changed_file_fails_the_size_check(self):
+        archive = ZipArchive(self.paths, compression=zipfile.ZIP_DEFLATED)
+        archive.size
+        self.paths[1].write_bytes(bytes(range(256)) * 1000)
+        stream = archive.open()
+        with self.assertRaises(IOError):
+            while stream.read(65536):
+                pass
+
+    def test_zip_shapefile_upload_sends_archive_with_content_length(self):
+        for name in ["roads.shx", "roads.prj"]:
+            (Path(self.tmpdir.name) / name).write_bytes(b"x")
+        shp = Path(self.tmpdir.name) / "roads.shp"
+        sent = {}
+
+        def _post(url, data, headers, **kwargs):
+            sent["headers"] = headers
+            sent["body"] = b"".join(iter(lambda: data.read(65536), b""))
+            return mock_post.return_value
+
+        handler = GeonodeDatasetsHandler(env={})
+        for compression in ("stored", "deflated"):
+            with (
+                self.subTest(compression=compression),
+                patch.object(GeonodeDatasetsHandler, "url", "https://x/api/v2/"),
+                patch.object(GeonodeDatasetsHandler, "header", {}),
+                patch.object(GeonodeDatasetsHandler, "verify", True),
+                patch.object(handler.session, "post", side_effect=_post) as mock_post,
+            ):
+                mock_post.return_value.json.return_value = {"execution_id": "1"}
+                handler.upload(file_path=shp, validate=False, zip_shapefile=compression)
+                headers, body = sent["headers"], sent["body"]
+                self.assertEqual(headers["Content-Length"], str(len(body)))
+                message = BytesParser(policy=HTTP).parsebytes(
+                    f"Content-Type: {headers['Content-Type']}\r\n\r\n".encode() + body
+                )
+                files = {
+                    part.get_param("name", header="content-disposition"): part
+                    for part in message.iter_parts()
+                    if part.get_filename()
+                }
+                self.assertEqual(set(files), {"base_file", "zip_file"})
+                for part in files.values():
+                    self.assertEqual(part.get_filename(), "roads.zip")
+                    self.assertEqual(part.get_content_type(), "application/zip")
+                    with zipfile.ZipFile(
+                        io.BytesIO(part.get_payload(decode=True))
+                    ) as archive:
+                        self.assertEqual(
+                            sorted(archive.namelist()),
+                            ["roads.dbf", "roads.prj", "roads.shp", "roads.shx"],
+                        )
+
+
+class TestHttpPostMultipart(unittest.TestCase):
+    def test_http_post_streams_files_with_content_length(self):
+        handler = GeonodeDatasetsHandler(env={})
+        fileobj = io.BytesIO(b"x" * 1000)
+        with (
+            patch.object(GeonodeDatasetsHandler, "url", "https://x/api/v2/"),
+            patch.object(
+                GeonodeDatasetsHandler, "header", {"Authorization": "Basic x"}
+            ),
+            patch.object(GeonodeDatasetsHandler, "verify", True),
+            patch.object(handler.session, "post") as mock_post,
+        ):
+            mock_post.return_value.json.return_value = {"execution_id": "1"}
+            handler.http_post(
+                endpoint="uploads/upload",
+                data={"charset": "UTF-8"},
+                files=[("base_file", ("a.gpkg", fileobj))],
+                content_length=1000,
+            )
+        kwargs = mock_post.call_args.kwargs
+        self.assertIsInstance(kwargs["data"], MultipartEncoder)
+        self.assertEqual(kwargs["headers"]["Content-Length"], str(len(kwargs["data"])))
+        self.assertTrue(
+            kwargs["headers"]["Content-Type"].startswith(
+                "multipart/form-data; boundary="
+            )
+        )
+        self.assertNotIn("files", kwargs)
+        self.assertTrue(fileobj.closed)
+
+    def test_http_post_reports_progress(self):
+        handler = GeonodeDatasetsHandler(env={})
+        out = io.StringIO()
+        progress = UploadProgress(name="a.gpkg", format="json", interval=0, stream=out)
+
+        def _post(url, data, **kwargs):
+            while data.read(256):
+                pass
+            return mock_post.return_value
+
+        with (
+            patch.object(GeonodeDatasetsHandler, "url", "https://x/api/v2/"),
+            patch.object(GeonodeDatasetsHandler, "header", {}),
+            patch.object(GeonodeDatasetsHandler, "verify", True),
+            patch.object(handler.session, "post", side_effect=_post) as mock_post,
+        ):
+            mock_post.return_value.json.return_value = {"execution_id": "1"}
+            handler.http_post(
+                endpoint="uploads/upload",
+                files=[("base_file", ("a.gpkg", io.BytesIO(b"x" * 1000)))],
+                progress=progress,
+            )
+        events = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(events[0]["event"], "start")
+        self.assertEqual(events[-2]["event"], "sent")
+        self.assertEqual(events[-1]["event"], "done")
+        self.assertEqual(events[-1]["bytes_sent"], events[-1]["total_bytes"])
+        self.assertGreater(events[-1]["total_bytes"], 1000)
+        self.assertIsNotNone(events[-1]["server_processing_s"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,10 @@
+import tarfile
+import tempfile
 import unittest
-from unittest.mock import patch
+from pathlib import Path
+from unittest.mock import patch, MagicMock
 from geonoderest.resources import GeonodeResourceHandler
+from geonoderest.geonodeobject import PK_FILTER_CHUNK_SIZE
 
 
 class TestGeonodeResourcesHandler(unittest.TestCase):
@@ -19,5 +23,74 @@ class TestGeonodeResourcesHandler(unittest.TestCase):
         self.assertTrue(result["success"])
 
 
+def _resource(pk, *types):
+    return {
+        "pk": pk,
+        "links": [{"name": t, "url": f"https://x/catalogue/{t}/{pk}"} for t in types],
+    }
+
+
+class TestMetadataExport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.handler = GeonodeResourceHandler(env={})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    @patch.object(GeonodeResourceHandler, "http_get")
+    def test_list_by_pks_is_chunked(self, mock_http_get):
+        mock_http_get.return_value = {"resources": []}
+        pks = list(range(1, PK_FILTER_CHUNK_SIZE + 2))
+        self.handler.list_by_pks(pks, include_fields=["pk", "links"])
+        self.assertEqual(mock_http_get.call_count, 2)
+        params = mock_http_get.call_args_list[0].kwargs["params"]
+        self.assertEqual(params["filter{pk.in}"], pks[:PK_FILTER_CHUNK_SIZE])
+        self.assertEqual(params["include[]"], ["pk", "links"])
+
+    @patch.object(GeonodeResourceHandler, "http_get_download")
+    @patch.object(GeonodeResourceHandler, "http_get")
+    def test_export_writes_archive(self, mock_http_get, mock_download):
+        mock_http_get.return_value = {
+            "resources": [_resource(2, "ISO"), _resource(1, "ISO", "Dublin Core")]
+        }
+
+        def download(url):
+            r = MagicMock()
+            r.content = url.encode("utf-8")
+            return r
+
+        mock_download.side_effect = download
+        out = Path(self.tmp.name) / "metadata.tar.gz"
+        exported, failed = self.handler.export_metadata(
+            pks=[1, 2, 3],
+            metadata_types=["ISO", "Dublin Core"],
+            out_path=out,
+            concurrency=2,
+        )
+        self.assertEqual((exported, failed), (3, 0))
+        mock_http_get.assert_called_once()
+        with tarfile.open(out) as tar:
+            self.assertEqual(
+                tar.getnames(), ["1/ISO.xml", "1/Dublin_Core.xml", "2/ISO.xml"]
+            )
+            self.assertEqual(
+                tar.extractfile("2/ISO.xml").read(), b"https://x/catalogue/ISO/2"
+            )
+
+    @patch.object(GeonodeResourceHandler, "http_get_download", return_value=None)
+    @patch.object(GeonodeResourceHandler, "http_get")
+    def test_failed_export_exits(self, mock_http_get, mock_download):
+        mock_http_get.return_value = {"resources": [_resource(1, "ISO")]}
+        with self.assertRaises(SystemExit):
+            self.handler.cmd_metadata(
+                pk_range="1-2", out_path=Path(self.tmp.name) / "metadata.tar"
+            )
+
+    def test_multiple_pks_require_an_archive(self):
+        with self.assertRaises(SystemExit):
+            self.handler.cmd_metadata(pk="1,2", out_path=Path("metadata.xml"))
+
+
 if __name__ == "__main__":
     unittest.main()
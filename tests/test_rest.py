@@ -0,0 +1,448 @@
+import io
+import random
+import tempfile
+import threading
+import unittest
+import requests
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+from geonoderest.apiconf import GeonodeApiConf
+from geonoderest.datasets import GeonodeDatasetsHandler
+from geonoderest.maps import GeonodeMapsHandler
+from geonoderest.session import GeonodeSession
+from geonoderest.executionrequest import GeonodeExecutionRequestHandler
+from geonoderest.exceptions import GeoNodeRestException
+from geonoderest.linkedresources import GeonodeLinkedResourcesHandler
+from geonoderest.ratelimit import (
+    TokenBucket,
+    AdaptiveConcurrencyLimiter,
+    parse_rate,
+    parse_size,
+)
+
+
+def _make_response(json_body, status_code=200):
+    r = MagicMock()
+    r.status_code = status_code
+    r.json.return_value = json_body
+    return r
+
+
+class TestGeonodeSession(unittest.TestCase):
+    def setUp(self):
+        self.conf = GeonodeApiConf(
+            url="https://geonode.example.com/api/v2/",
+            auth_basic="YWRtaW46YWRtaW4=",
+            verify=True,
+            pool_maxsize=32,
+        )
+
+    def test_session_uses_pool_settings_from_conf(self):
+        handler = GeonodeDatasetsHandler(env=self.conf)
+        adapter = handler.session.get_adapter("https://geonode.example.com/")
+        self.assertIsInstance(handler.session, GeonodeSession)
+        self.assertEqual(adapter._pool_maxsize, 32)
+
+    def test_no_keep_alive_sets_connection_close(self):
+        session = GeonodeSession(keep_alive=False)
+        self.assertEqual(session.headers["Connection"], "close")
+
+    def test_http_get_goes_through_session(self):
+        handler = GeonodeDatasetsHandler(env=self.conf)
+        with patch.object(
+            handler.session, "get", return_value=_make_response({"a": 1})
+        ) as mock_get:
+            self.assertEqual(handler.http_get(endpoint="datasets/1"), {"a": 1})
+        mock_get.assert_called_once()
+        self.assertEqual(
+            mock_get.call_args.args[0], "https://geonode.example.com/api/v2/datasets/1"
+        )
+
+    def test_maps_create_shares_session_with_datasets_handler(self):
+        maps_handler = GeonodeMapsHandler(env=self.conf)
+        dataset = {
+            "pk": 1,
+            "title": "ds",
+            "alternate": "geonode:ds",
+            "subtype": "vector",
+            "ptype": "gxp_wmscsource",
+            "links": [{"link_type": "OGC:WFS", "url": "https://x/wfs"}],
+            "extent": {"srid": "EPSG:4326", "coords": [0, 0, 1, 1]},
+        }
+        sessions = []
+
+        def _list_by_pks(ds_handler, pks, **kwargs):
+            sessions.append(ds_handler.session)
+            return [dataset]
+
+        with (
+            patch.object(
+                GeonodeMapsHandler,
+                "__build_blob_data__",
+                return_value={"map": {"layers": []}},
+            ),
+            patch.object(
+                GeonodeDatasetsHandler,
+                "list_by_pks",
+                autospec=True,
+                side_effect=_list_by_pks,
+            ),
+            patch.object(GeonodeMapsHandler, "http_post", return_value=None),
+        ):
+            maps_handler.create(title="t", maplayers=[1])
+        self.assertEqual(sessions, [maps_handler.session])
+
+
+class TestPagination(unittest.TestCase):
+    @staticmethod
+    def _page(page, page_size, total, name="datasets"):
+        first = (page - 1) * page_size
+        records = [
+            {"pk": pk} for pk in range(first + 1, min(first + page_size, total) + 1)
+        ]
+        next_link = "https://x/next" if page * page_size < total else None
+        return {
+            "links": {"next": next_link, "previous": None},
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            name: records,
+        }
+
+    @patch.object(GeonodeDatasetsHandler, "http_get")
+    def test_iter_all_follows_next_links(self, mock_http_get):
+        mock_http_get.side_effect = lambda endpoint, params: self._page(
+            params["page"], 2, 5
+        )
+        handler = GeonodeDatasetsHandler(env={})
+        it = handler.iter_all(page_size=2)
+        self.assertEqual(mock_http_get.call_count, 0)
+        self.assertEqual([r["pk"] for r in it], [1, 2, 3, 4, 5])
+        self.assertEqual(
+            [c.kwargs["params"]["page"] for c in mock_http_get.call_args_list],
+            [1, 2, 3],
+        )
+
+    @patch.object(GeonodeExecutionRequestHandler, "http_get")
+    def test_executionrequest_iter_all_uses_total(self, mock_http_get):
+        def _get(endpoint, params):
+            r = self._page(params["page"], 3, 4, name="requests")
+            r.pop("links")
+            return r
+
+        mock_http_get.side_effect = _get
+        handler = GeonodeExecutionRequestHandler(env={})
+        self.assertEqual(len(list(handler.iter_all(page_size=3))), 4)
+        self.assertEqual(mock_http_get.call_count, 2)
+
+    @patch.object(GeonodeDatasetsHandler, "http_get")
+    def test_iter_all_prefetch_keeps_page_order(self, mock_http_get):
+        import time
+
+        def _get(endpoint, params):
+            time.sleep(0.005 * (6 - params["page"]))
+            return self._page(params["page"], 2, 11)
+
+        mock_http_get.side_effect = _get
+        handler = GeonodeDatasetsHandler(env={})
+        pks = [r["pk"] for r in handler.iter_all(prefetch=4, page_size=2)]
+        self.assertEqual(pks, list(range(1, 12)))
+        self.assertEqual(mock_http_get.call_count, 6)
+
+    @patch.object(GeonodeDatasetsHandler, "http_get")
+    def test_iter_all_raises_on_failed_page(self, mock_http_get):
+        mock_http_get.side_effect = [self._page(1, 2, 5), None]
+        handler = GeonodeDatasetsHandler(env={})
+        with self.assertRaises(GeoNodeRestException):
+            list(handler.iter_all(page_size=2))
+
+
+class TestRetries(unittest.TestCase):
+    def _response(self, status_code, headers=None):
+        r = requests.Response()
+        r.status_code = status_code
+        r.headers.update(headers or {})
+        r._content = b"{}"
+        r.raw = io.BytesIO(b"{}")
+        return r
+
+    @patch("geonoderest.session.time.sleep")
+    @patch.object(requests.Session, "request")
+    def test_retries_transient_status_on_get(self, mock_request, mock_sleep):
+        mock_request.side_effect = [
+            self._response(502),
+            self._response(503, {"Retry-After": "7"}),
+            self._response(200),
+        ]
+        session = GeonodeSession(retries=3)
+        r = session.get("https://x/api/v2/datasets/1")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(mock_request.call_count, 3)
+        self.assertEqual(mock_sleep.call_args_list[1].args[0], 7.0)
+        self.assertEqual(session.retry_stats["retries"], 2)
+        self.assertEqual(session.retry_stats["HTTP 502"], 1)
+
+    @patch("geonoderest.session.time.sleep")
+    @patch.object(requests.Session, "request")
+    def test_post_is_not_retried_by_default(self, mock_request, mock_sleep):
+        mock_request.return_value = self._response(503)
+        session = GeonodeSession(retries=3)
+        self.assertEqual(session.post("https://x/api/v2/maps").status_code, 503)
+        self.assertEqual(mock_request.call_count, 1)
+        mock_sleep.assert_not_called()
+
+    @patch("geonoderest.session.time.sleep")
+    @patch.object(requests.Session, "request")
+    def test_gives_up_after_max_retries(self, mock_request, mock_sleep):
+        mock_request.side_effect = requests.exceptions.ConnectionError()
+        session = GeonodeSession(retries=2, retry_backoff=1, retry_backoff_max=1.5)
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            session.get("https://x/api/v2/datasets/1")
+        self.assertEqual(mock_request.call_count, 3)
+        self.assertTrue(all(0 <= c.args[0] <= 1.5 for c in mock_sleep.call_args_list))
+        self.assertEqual(session.retry_stats["gave up"], 1)
+
+
+class TestRateLimit(unittest.TestCase):
+    @patch("geonoderest.ratelimit.time.sleep")
+    @patch("geonoderest.ratelimit.time.monotonic", return_value=100.0)
+    def test_token_bucket_paces_after_burst(self, mock_monotonic, mock_sleep):
+        bucket = TokenBucket(rate=2)
+        bucket.acquire()
+        bucket.acquire()
+        mock_sleep.assert_not_called()
+        bucket.acquire()
+        mock_sleep.assert_called_once_with(0.5)
+
+    def test_aimd_limit_shrinks_on_overload_and_grows_back(self):
+        limiter = AdaptiveConcurrencyLimiter(max_limit=8)
+        limiter.acquire()
+        limiter.release(latency=0.1, status_code=429)
+        self.assertEqual(limiter.limit, 4)
+        limiter.acquire()
+        limiter.release(latency=0.1, status_code=200)
+        self.assertGreater(limiter.limit, 4)
+        limiter.acquire()
+        limiter.release(timed_out=True)
+        self.assertLess(limiter.limit, 2.5)
+
+    def test_aimd_limit_ignores_latency_jitter(self):
+        rng = random.Random(1)
+        jitters = {
+            "uniform": lambda: rng.uniform(0.05, 0.15),
+            "lognormal": lambda: rng.lognormvariate(-2.3, 0.5),
+        }
+        for name, latency in jitters.items():
+            for tolerance in (0.0, 2.0):
+                with self.subTest(jitter=name, latency_tolerance=tolerance):
+                    limiter = AdaptiveConcurrencyLimiter(
+                        max_limit=16, latency_tolerance=tolerance
+                    )
+                    for _ in range(2000):
+                        limiter.acquire()
+                        limiter.release(latency=latency(), status_code=200)
+                    self.assertGreaterEqual(limiter.limit, 14)
+
+    def test_aimd_limit_shrinks_on_lasting_latency_rise_if_enabled(self):
+        limiter = AdaptiveConcurrencyLimiter(max_limit=16, latency_tolerance=2.0)
+        for latency in [0.1] * 50 + [0.5] * 10:
+            limiter.acquire()
+            limiter.release(latency=latency, status_code=200)
+        self.assertLess(limiter.limit, 12)
+
+    @patch.object(requests.Session, "request")
+    def test_session_requests_pass_the_limiters(self, mock_request):
+        mock_request.return_value = requests.Response()
+        mock_request.return_value.status_code = 503
+        session = GeonodeSession(retries=0, max_rps=1000, max_in_flight=4)
+        with patch.object(session.rate_limiter, "acquire") as mock_acquire:
+            session.get("https://x/api/v2/datasets/1")
+        mock_acquire.assert_called_once()
+        self.assertEqual(session.concurrency_limiter.limit, 2)
+        self.assertEqual(session.concurrency_limiter.in_flight, 0)
+
+
+class TestBandwidthLimit(unittest.TestCase):
+    def setUp(self):
+        self.conf = GeonodeApiConf(
+            url="https://geonode.example.com/api/v2/",
+            auth_basic="YWRtaW46YWRtaW4=",
+            verify=True,
+            max_upload_rate=1024,
+            max_download_rate=2048,
+        )
+
+    def test_parse_rate_units(self):
+        self.assertEqual(parse_rate("1000"), 1000)
+        self.assertEqual(parse_rate("512K"), 512 * 1024)
+        self.assertEqual(parse_rate("1.5m"), 1.5 * 1024**2)
+        self.assertEqual(parse_rate("2MB"), 2 * 1024**2)
+        with self.assertRaises(ValueError):
+            parse_rate("fast")
+
+    def test_parse_size_units(self):
+        self.assertEqual(parse_size("64M"), 64 * 1024**2)
+        self.assertIsInstance(parse_size("1.5K"), int)
+        with self.assertRaisesRegex(ValueError, "^size must be >= 0"):
+            parse_size("-1K")
+
+    def test_session_creates_bandwidth_limiters_from_conf(self):
+        session = GeonodeSession.from_conf(self.conf)
+        self.assertEqual(session.upload_limiter.rate, 1024)
+        self.assertEqual(session.download_limiter.rate, 2048)
+        self.assertIsNone(GeonodeSession().upload_limiter)
+
+    @patch.object(GeonodeSession, "post")
+    def test_upload_body_reads_acquire_tokens(self, mock_post):
+        handler = GeonodeDatasetsHandler(env=self.conf)
+        sent = []
+
+        def consume(url, data, **kwargs):
+            sent.append(data.read(4096))
+            return _make_response({"execution_id": "1"})
+
+        mock_post.side_effect = consume
+        with patch.object(handler.session.upload_limiter, "acquire") as mock_acquire:
+            handler.http_post(
+                endpoint="uploads/upload",
+                files=[("base_file", ("a.tif", io.BytesIO(b"x" * 100)))],
+            )
+        mock_acquire.assert_called_once_with(len(sent[0]))
+
+    @patch.object(GeonodeSession, "get")
+    def test_download_body_is_streamed_at_rate(self, mock_get):
+        handler = GeonodeDatasetsHandler(env=self.conf)
+        r = requests.Response()
+        r.status_code = 200
+        r.raw = io.BytesIO(b"y" * 100_000)
+        mock_get.return_value = r
+        with patch.object(handler.session.download_limiter, "acquire") as mock_acquire:
+            downloaded = handler.http_get_download("https://x/metadata.xml")
+        self.assertTrue(mock_get.call_args.kwargs["stream"])
+        self.assertEqual(downloaded.content, b"y" * 100_000)
+        self.assertEqual(sum(c.args[0] for c in mock_acquire.call_args_list), 100_000)
+
+
+class TestGetMemo(unittest.TestCase):
+    @patch.object(GeonodeDatasetsHandler, "http_get")
+    def test_repeated_gets_send_one_request(self, mock_http_get):
+        mock_http_get.return_value = {"dataset": {"pk": 5, "title": "roads"}}
+        handler = GeonodeDatasetsHandler(env={})
+        handler.get(5)["title"] = "changed by caller"
+        self.assertEqual(handler.get(pk=5)["title"], "roads")
+        mock_http_get.assert_called_once()
+
+    @patch.object(GeonodeDatasetsHandler, "http_get")
+    def test_concurrent_gets_are_coalesced(self, mock_http_get):
+        release = threading.Event()
+
+        def slow_get(**kwargs):
+            release.wait(5)
+            return {"dataset": {"pk": 5}}
+
+        mock_http_get.side_effect = slow_get
+        handler = GeonodeDatasetsHandler(env={})
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(handler.get(5)))
+            for _ in range(4)
+        ]
+        for t in threads:
+            t.start()
+        release.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, [{"pk": 5}] * 4)
+        mock_http_get.assert_called_once()
+
+    @patch.object(GeonodeDatasetsHandler, "http_get")
+    def test_failed_gets_are_not_memoized_and_writes_invalidate(self, mock_http_get):
+        mock_http_get.side_effect = [
+            None,
+            {"dataset": {"pk": 5, "title": "old"}},
+            {"dataset": {"pk": 5, "title": "new"}},
+        ]
+        handler = GeonodeDatasetsHandler(env={})
+        self.assertIsNone(handler.get(5))
+        self.assertEqual(handler.get(5)["title"], "old")
+        handler.__invalidate_cache__("resources/5/delete")
+        self.assertEqual(handler.get(5)["title"], "new")
+
+    @patch.object(GeonodeLinkedResourcesHandler, "http_post", return_value={})
+    @patch.object(GeonodeLinkedResourcesHandler, "http_get")
+    def test_linked_resources_add_sends_only_the_post(self, mock_http_get, _):
+        GeonodeLinkedResourcesHandler(env={}).add(pk=5, linked_to=[6])
+        mock_http_get.assert_not_called()
+
+
+def _make_stream_response(body, status_code=200, headers=None):
+    r = requests.Response()
+    r.status_code = status_code
+    r.raw = io.BytesIO(body)
+    r.headers.update(headers or {})
+    return r
+
+
+class TestDownload(unittest.TestCase):
+    def setUp(self):
+        self.handler = GeonodeDatasetsHandler(
+            env=GeonodeApiConf(
+                url="https://geonode.example.com/api/v2/",
+                auth_basic="YWRtaW46YWRtaW4=",
+                verify=True,
+            )
+        )
+        self.tmp = tempfile.TemporaryDirectory()
+        self.out = Path(self.tmp.name) / "roads.zip"
+        self.part = Path(self.tmp.name) / "roads.zip.part"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    @patch.object(GeonodeSession, "get")
+    def test_download_streams_to_file(self, mock_get):
+        mock_get.return_value = _make_stream_response(
+            b"0123456789", headers={"Content-Length": "10"}
+        )
+        size = self.handler.http_download("https://x/roads.zip", out=self.out)
+        self.assertEqual(size, 10)
+        self.assertEqual(self.out.read_bytes(), b"0123456789")
+        self.assertFalse(self.part.exists())
+        self.assertTrue(mock_get.call_args.kwargs["stream"])
+
+    @patch.object(GeonodeSession, "get")
+    def test_resume_requests_missing_range(self, mock_get):
+        self.part.write_bytes(b"0123")
+        mock_get.return_value = _make_stream_response(
+            b"456789", status_code=206, headers={"Content-Range": "bytes 4-9/10"}
+        )
+        size = self.handler.http_download(
+            "https://x/roads.zip", out=self.out, resume=True
+        )
+        self.assertEqual(mock_get.call_args.kwargs["headers"]["Range"], "bytes=4-")
+        self.assertEqual(size, 10)
+        self.assertEqual(self.out.read_bytes(), b"0123456789")
+
+    @patch.object(GeonodeSession, "get")
+    def test_resume_restarts_if_range_is_ignored(self, mock_get):
+        self.part.write_bytes(b"xxxx")
+        mock_get.return_value = _make_stream_response(
+            b"0123456789", headers={"Content-Length": "10"}
+        )
+        self.handler.http_download("https://x/roads.zip", out=self.out, resume=True)
+        self.assertEqual(self.out.read_bytes(), b"0123456789")
+
+    @patch.object(GeonodeSession, "get")
+    def test_short_body_keeps_partial_file(self, mock_get):
+        mock_get.return_value = _make_stream_response(
+            b"01234", headers={"Content-Length": "10"}
+        )
+        with self.assertRaises(GeoNodeRestException):
+            self.handler.http_download("https://x/roads.zip", out=self.out)
+        self.assertFalse(self.out.exists())
+        self.assertEqual(self.part.read_bytes(), b"01234")
+
+
+if __name__ == "__main__":
+    unittest.main()
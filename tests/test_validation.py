@@ -0,0 +1,85 @@
+import struct
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from geonoderest.exceptions import DatasetValidationError
+from geonoderest.validation import validate_dataset
+
+
+def _shape_file(path: Path, records: int, record_size: int):
+    length = 100 + records * record_size
+    header = struct.pack(">i20xi", 9994, length // 2) + struct.pack("<ii", 1000, 1)
+    path.write_bytes(header.ljust(100, b"\0") + b"\0" * (records * record_size))
+
+
+def _dbf_file(path: Path, records: int, record_length: int = 10):
+    header = struct.pack("<B3xIHH", 3, records, 33, record_length).ljust(33, b"\0")
+    path.write_bytes(header + b" " * (records * record_length) + b"\x1a")
+
+
+def _tiff(path: Path, tags):
+    entries = b"".join(struct.pack("<HHII", tag, 3, 1, 1) for tag in tags)
+    path.write_bytes(
+        b"II*\0" + struct.pack("<I", 8) + struct.pack("<H", len(tags)) + entries
+    )
+
+
+class TestValidateDataset(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmpdir.name)
+        self.shp = self.dir / "roads.shp"
+        _shape_file(self.shp, records=3, record_size=28)
+        _shape_file(self.shp.with_suffix(".shx"), records=3, record_size=8)
+        _dbf_file(self.shp.with_suffix(".dbf"), records=3)
+        self.shp.with_suffix(".prj").write_text('GEOGCS["WGS 84"]')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def assertInvalid(self, path, message):
+        with self.assertRaises(DatasetValidationError) as ctx:
+            validate_dataset(path)
+        self.assertIn(message, str(ctx.exception))
+
+    def test_valid_shapefile(self):
+        validate_dataset(self.shp)
+
+    def test_missing_prj(self):
+        self.shp.with_suffix(".prj").unlink()
+        self.assertInvalid(self.shp, "missing sidecar files roads.prj")
+
+    def test_record_count_mismatch(self):
+        _dbf_file(self.shp.with_suffix(".dbf"), records=4)
+        self.assertInvalid(self.shp, "3 shapes but 4 attribute records")
+
+    def test_truncated_shp(self):
+        with self.shp.open("r+b") as f:
+            f.truncate(120)
+        self.assertInvalid(self.shp, "file has 120 bytes")
+
+    def test_zip(self):
+        path = self.dir / "roads.zip"
+        with zipfile.ZipFile(path, "w") as archive:
+            archive.write(self.shp, "roads.shp")
+            archive.write(self.shp.with_suffix(".dbf"), "roads.dbf")
+        self.assertInvalid(path, "roads.shx, roads.prj")
+        path.write_bytes(b"PK\x03\x04 no central directory")
+        self.assertInvalid(path, "roads.zip")
+
+    def test_geotiff(self):
+        path = self.dir / "dem.tif"
+        _tiff(path, [256, 257, 258])
+        validate_dataset(path)
+        _tiff(path, [258])
+        self.assertInvalid(path, "IFD without image size")
+        path.write_bytes(b"II*\0" + struct.pack("<I", 4096) + b"\0" * 8)
+        self.assertInvalid(path, "first IFD outside of file")
+        path.write_bytes(b"GIF89a" + b"\0" * 10)
+        self.assertInvalid(path, "not a TIFF file")
+
+
+if __name__ == "__main__":
+    unittest.main()